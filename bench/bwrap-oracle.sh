@@ -0,0 +1,98 @@
+#!/usr/bin/env bash
+# bwrap-oracle.sh – stand-in for bwrap used by the benchmark harness (BWRAP_BIN).
+#
+# Nothing is mounted. The mount options are replayed into a table (a later
+# mount at or above a path replaces whatever was mounted below it, like the
+# depth-sorted binds phobos and the pruner emit) and the run passes iff every
+# line of the oracle is granted:
+#
+#   r /abs/path    path must be visible   (covered by --ro-bind or --bind)
+#   w /abs/path    path must be writable  (covered by --bind)
+#
+# Overlays (--overlay-src SRC --tmp-overlay DST, as the pruner's
+# --workdir-mode overlay emits) count as a writable bind of SRC at DST.
+#
+# The oracle is PHOBOS_BENCH_ORACLE, else <host dir bound at
+# /var/tmp/testing-dir>/.bench_required. Without one the command after `--`
+# (or the first non-option) is exec'd on the host, e.g. for launch latency.
+#
+#   PHOBOS_BENCH_STAMP     write $EPOCHREALTIME here first (launch-to-exec)
+#   PHOBOS_BENCH_BUILD_MS  simulated build time of a passing run (default 0)
+[[ -z "${PHOBOS_BENCH_STAMP:-}" ]] || printf '%s\n' "$EPOCHREALTIME" > "$PHOBOS_BENCH_STAMP"
+
+IN_SB_ROOT="/var/tmp/testing-dir"
+mnt_path=(); mnt_mode=()
+host_dir=""
+overlay_src=""   # last --overlay-src, for the overlay mount that follows
+
+# no subshells per path: helpers return through NORM / GRANT
+norm() { NORM=$1; while [[ $NORM == */ && $NORM != / ]]; do NORM=${NORM%/}; done; }
+
+mount_at() {  # mount_at <dst> <n|r|w>
+  local dst i keep_p=() keep_m=()
+  norm "$1"; dst=$NORM
+  for i in "${!mnt_path[@]}"; do
+    [[ $dst == / || ${mnt_path[$i]} == "$dst" || ${mnt_path[$i]} == "$dst"/* ]] && continue
+    keep_p+=("${mnt_path[$i]}"); keep_m+=("${mnt_mode[$i]}")
+  done
+  mnt_path=("${keep_p[@]}" "$dst"); mnt_mode=("${keep_m[@]}" "$2")
+}
+
+while (( $# )); do
+  case "$1" in
+    --ro-bind|--ro-bind-try)   mount_at "$3" r; shift 3;;
+    --bind|--bind-try|--dev-bind|--dev-bind-try)
+      mount_at "$3" w
+      norm "$3"; [[ $NORM == "$IN_SB_ROOT" ]] && host_dir=$2
+      shift 3;;
+    --tmpfs)                   mount_at "$2" n; shift 2;;
+    --overlay-src)             overlay_src=$2; shift 2;;
+    --tmp-overlay|--overlay|--ro-overlay)
+      case "$1" in --overlay) shift 2;; esac
+      [[ $1 == --ro-overlay ]] && mount_at "$2" r || mount_at "$2" w
+      norm "$2"; [[ $NORM == "$IN_SB_ROOT" && -n $overlay_src ]] && host_dir=$overlay_src
+      overlay_src=""; shift 2;;
+    --setenv|--symlink|--file|--bind-data|--ro-bind-data)
+                               shift 3;;
+    --proc|--dev|--dir|--chdir|--remount-ro|--hostname|--uid|--gid|--mqueue|--unsetenv|--perms|--size|--seccomp|--userns|--userns2|--pidns|--lock-file|--sync-fd|--info-fd|--json-status-fd|--block-fd|--args|--cap-add|--cap-drop|--exec-label|--file-label)
+                               shift 2;;
+    --)                        shift; break;;
+    --*)                       shift;;
+    *)                         break;;
+  esac
+done
+
+# grant <path>: GRANT = mode of the deepest mount covering path (n if none)
+grant() {
+  local p i best=-1 len=-1
+  norm "$1"; p=$NORM
+  for i in "${!mnt_path[@]}"; do
+    if [[ ${mnt_path[$i]} == / || $p == "${mnt_path[$i]}" || $p == "${mnt_path[$i]}"/* ]]; then
+      (( ${#mnt_path[$i]} > len )) && { len=${#mnt_path[$i]}; best=$i; }
+    fi
+  done
+  GRANT=n
+  (( best < 0 )) || GRANT=${mnt_mode[$best]}
+}
+
+oracle="${PHOBOS_BENCH_ORACLE:-}"
+[[ -n "$oracle" || -z "$host_dir" ]] || oracle="$host_dir/.bench_required"
+if [[ -z "$oracle" || ! -f "$oracle" ]]; then
+  (( $# )) || exit 0
+  exec "$@"
+fi
+
+rc=0
+while read -r want path; do
+  [[ $want == [rw] && $path == /* ]] || continue
+  grant "$path"
+  case "$want$GRANT" in
+    rr|rw|ww) ;;
+    wr) echo "bench: $path: Read-only file system (EROFS)" >&2; rc=1;;
+    *)  echo "bench: $path: No such file or directory" >&2; rc=1;;
+  esac
+done < "$oracle"
+if (( rc == 0 )) && [[ ${PHOBOS_BENCH_BUILD_MS:-0} != 0 ]]; then
+  sleep "$(printf '%d.%03d' $(( PHOBOS_BENCH_BUILD_MS / 1000 )) $(( PHOBOS_BENCH_BUILD_MS % 1000 )))"
+fi
+exit "$rc"
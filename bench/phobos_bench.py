@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+phobos_bench.py
+---------------
+
+Offline benchmark of the pruning pipeline and the phobos runtime. Needs
+bash, python3 and coreutils only: no Docker, no bwrap, no network.
+
+A seeded synthetic directory tree and exercise corpus are generated under a
+scratch dir; every exercise carries a hidden oracle (.bench_required, 'r /p'
+/ 'w /p' lines) and bench/bwrap-oracle.sh, plugged in through BWRAP_BIN,
+passes an attempt iff its mounts grant the oracle. Stages:
+
+  • prune        run_minimal_fs_all.sh over the corpus (PRUNE_TARGET = tree);
+                 bwrap attempts per exercise, wall time, and whether every
+                 emitted .paths still grants its oracle (--seeded: again,
+                 seeded from the union of the first pass)
+  • emit         emit_artifacts.py --batch over --replicate copies of the logs
+                 (--store: into an artifact store as well)
+  • langsets     make_lang_sets.py over the replicated .paths
+  • orchestrate  orchestrate.py --skip-prune (langsets + Base*.cfg + tail;
+                 --store: language sets queried from the artifact store)
+  • launch       phobos.sh -- /bin/true with the orchestrated BaseLanguage cfg;
+                 launch-to-exec latency (phobos.sh spawn until the bwrap
+                 stand-in starts) with a cold and a warm policy cache
+
+Results go to stdout and, with --json, to a file that can be diffed between
+commits. Same --seed and sizes → same corpus, so only the code varies.
+"""
+
+from __future__ import annotations
+import argparse, json, os, pathlib, platform, random, shutil, stat, subprocess, sys, tempfile, time
+from typing import Dict, List, Optional, Sequence
+
+REPO = pathlib.Path(__file__).resolve().parent.parent
+HELPERS = REPO / "var/tmp/helpers"
+PRUNING = REPO / "var/tmp/pruning"
+CORE = REPO / "core"
+ORCHESTRATE = REPO / "docker/prune_phase/orchestrate/orchestrate.py"
+STUB = REPO / "bench/bwrap-oracle.sh"
+
+sys.path.insert(0, str(HELPERS))
+from pathset import RANK, PathSet  # noqa: E402
+
+STAGES = ("prune", "emit", "langsets", "orchestrate", "launch")
+EX_PREFIX = "bench-ex"
+
+
+# -----------------------------------------------------------------------------
+# Synthetic inputs
+# -----------------------------------------------------------------------------
+def make_tree(root: pathlib.Path, depth: int, fanout: int) -> List[pathlib.Path]:
+    """fanout**depth leaves, d0..d<fanout-1> per level; returns every dir."""
+    dirs: List[pathlib.Path] = []
+    level = [root]
+    for _ in range(depth):
+        nxt = []
+        for parent in level:
+            for i in range(fanout):
+                d = parent / f"d{i}"
+                d.mkdir(parents=True, exist_ok=True)
+                nxt.append(d)
+        dirs += nxt
+        level = nxt
+    return dirs
+
+
+def make_corpus(tests: pathlib.Path, dirs: List[pathlib.Path], langs: Sequence[str],
+                n_ex: int, n_req: int, n_common: int, rng: random.Random) -> Dict[str, Dict[str, List[str]]]:
+    """<tests>/<lang>/bench-exNN/{build_script.sh, assignment/, .bench_required}.
+
+    Each language shares n_common required paths across its exercises (so
+    unions and intersections are non-trivial); the rest are per exercise.
+    About a quarter of the requirements need write access.
+    """
+    def pick(k: int) -> List[str]:
+        return [f"{'w' if rng.random() < 0.25 else 'r'} {d}" for d in rng.sample(dirs, k)]
+
+    oracles: Dict[str, Dict[str, List[str]]] = {}
+    for lang in langs:
+        common = pick(min(n_common, len(dirs)))
+        oracles[lang] = {}
+        for i in range(n_ex):
+            ex = tests / lang / f"{EX_PREFIX}{i:02d}"
+            (ex / "assignment").mkdir(parents=True, exist_ok=True)
+            script = ex / "build_script.sh"
+            script.write_text("#!/bin/bash\nexit 0\n")
+            script.chmod(0o755)
+            req = common + pick(min(n_req, len(dirs)))
+            (ex / ".bench_required").write_text("\n".join(req) + "\n")
+            oracles[lang][ex.name] = req
+    return oracles
+
+
+def install(src: pathlib.Path, dst_dir: pathlib.Path) -> pathlib.Path:
+    """Copy a script and make it executable (checked-in files are not)."""
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    dst = dst_dir / src.name
+    shutil.copy2(src, dst)
+    dst.chmod(dst.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return dst
+
+
+# -----------------------------------------------------------------------------
+# Measurement helpers
+# -----------------------------------------------------------------------------
+def run(cmd: Sequence[str], env: Optional[Dict[str, str]] = None, quiet: bool = True) -> float:
+    """Run cmd, raise on failure, return wall seconds."""
+    t0 = time.perf_counter()
+    res = subprocess.run(list(map(str, cmd)), env=env, text=True,
+                         stdout=subprocess.PIPE if quiet else None,
+                         stderr=subprocess.STDOUT if quiet else None)
+    dt = time.perf_counter() - t0
+    if res.returncode:
+        tail = (res.stdout or "").strip().splitlines()[-15:]
+        raise RuntimeError(f"{pathlib.Path(str(cmd[0])).name} failed (rc={res.returncode})\n" + "\n".join(tail))
+    return dt
+
+
+def pct(values: List[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    s = sorted(values)
+    return s[max(0, min(len(s) - 1, int(round(q / 100 * len(s) + 0.5)) - 1))]
+
+
+def summary(values: List[float]) -> Dict[str, float]:
+    return {"n": len(values), "min": min(values), "p50": pct(values, 50),
+            "p99": pct(values, 99), "max": max(values), "mean": sum(values) / len(values)}
+
+
+def attempts_of(log: pathlib.Path) -> Dict[str, int]:
+    out = {}
+    for line in log.read_text().splitlines():
+        if line.startswith("Total Command Attempts:"):
+            out["total"] = int(line.split(":", 1)[1])
+        elif line.startswith("Prune Attempts"):
+            out["prune"] = int(line.split(":", 1)[1])
+    return out
+
+
+def grants(paths_file: pathlib.Path, required: List[str]) -> bool:
+    ps = PathSet.load(paths_file)
+    for req in required:
+        mode, path = req.split(maxsplit=1)
+        if RANK[ps.effective(path)] < RANK[mode]:
+            return False
+    return True
+
+
+# -----------------------------------------------------------------------------
+# Stages
+# -----------------------------------------------------------------------------
+def _prune_pass(a, env: Dict[str, str], bin_dir: pathlib.Path, oracles, extra: Sequence[str] = ()) -> Dict:
+    """One run_minimal_fs_all.sh per language; attempts and oracle check."""
+    out_dir = pathlib.Path(env["OUTPUT_DIR"])
+    res: Dict = {"langs": {}}
+    attempts: List[float] = []
+    wall = 0.0
+    failed = []
+    for lang in a.langs:
+        dt = run([bin_dir / "run_minimal_fs_all.sh", "--jobs", a.jobs, "--no-result-cache", *extra, lang], env)
+        wall += dt
+        per_ex = {}
+        for ex, req in oracles[lang].items():
+            log = out_dir / f"final_bindings_{lang}_{ex}.txt"
+            paths = out_dir / f"{lang}_{ex}.paths"
+            per_ex[ex] = attempts_of(log) if log.is_file() else {}
+            attempts.append(per_ex[ex].get("total", 0))
+            if not (paths.is_file() and grants(paths, req)):
+                failed.append(f"{lang}/{ex}")
+        res["langs"][lang] = {"wall_s": dt, "exercises": per_ex}
+    n = len(attempts)
+    res.update(wall_s=wall, exercises=n, s_per_exercise=wall / n if n else 0.0,
+               attempts=summary(attempts) if attempts else {}, attempts_total=int(sum(attempts)),
+               oracle_ok=not failed, oracle_failed=failed)
+    return res
+
+
+def stage_prune(a, work: pathlib.Path, bin_dir: pathlib.Path, oracles) -> Dict:
+    out_dir = work / "path_sets"
+    env = dict(os.environ,
+               TESTS_ROOT=str(work / "tests"), PRUNE_SCRIPT=str(bin_dir / "detect_minimal_fs.sh"),
+               OUTPUT_DIR=str(out_dir), HELPER_DIR=str(bin_dir), PRUNE_TARGET=f"{work / 'tree'}/",
+               BWRAP_BIN=str(bin_dir / STUB.name), PHOBOS_KEEP_LOG="1",
+               PRUNE_STRATEGY=a.strategy, PRUNE_WORKDIR=a.workdir_mode, PRUNE_SPEC_JOBS=str(a.spec_jobs),
+               PHOBOS_BENCH_BUILD_MS=str(a.build_ms))
+    env.pop("PHOBOS_BENCH_ORACLE", None)
+    res = _prune_pass(a, env, bin_dir, oracles)
+    res.update(strategy=a.strategy, jobs=a.jobs, workdir_mode=a.workdir_mode, spec_jobs=a.spec_jobs)
+    if a.seeded:
+        # second pass over the same corpus, seeded from the first pass's union
+        for lang in a.langs:
+            run([sys.executable, bin_dir / "make_lang_sets.py", lang, out_dir])
+        res["seeded"] = _prune_pass(a, env, bin_dir, oracles, ("--prior", "auto"))
+        res["oracle_ok"] = res["oracle_ok"] and res["seeded"]["oracle_ok"]
+        res["oracle_failed"] += [f"{f} (seeded)" for f in res["seeded"]["oracle_failed"]]
+    return res
+
+
+def stage_emit(a, work: pathlib.Path, bin_dir: pathlib.Path, oracles) -> Dict:
+    src, dst = work / "path_sets", work / "emit"
+    manifest = work / "emit-manifest.jsonl"
+    with manifest.open("w") as fh:
+        for lang in a.langs:
+            for ex in oracles[lang]:
+                log = src / f"final_bindings_{lang}_{ex}.txt"
+                for r in range(a.replicate):
+                    fh.write(json.dumps({"lang": lang, "exercise": f"{ex}-r{r:03d}", "config_file": str(log),
+                                         "workdir": "/tmp/prune_bench"}) + "\n")
+    n = sum(len(oracles[l]) for l in a.langs) * a.replicate
+    store = ["--store", work / "emit.db"] if a.store else []
+    dt = run([sys.executable, bin_dir / "emit_artifacts.py", "--batch", manifest, "--out-dir", dst, *store])
+    return {"entries": n, "wall_s": dt, "per_s": n / dt}
+
+
+def stage_langsets(a, work: pathlib.Path, bin_dir: pathlib.Path, oracles) -> Dict:
+    res: Dict = {"langs": {}}
+    files = wall = 0
+    for lang in a.langs:
+        n = len(list((work / "emit").glob(f"{lang}_{EX_PREFIX}*.paths")))
+        dt = run([sys.executable, bin_dir / "make_lang_sets.py", lang, work / "emit"])
+        res["langs"][lang] = {"files": n, "wall_s": dt}
+        files += n
+        wall += dt
+    res.update(files=files, wall_s=wall, per_s=files / wall if wall else 0.0)
+    return res
+
+
+def stage_orchestrate(a, work: pathlib.Path, bin_dir: pathlib.Path, oracles) -> Dict:
+    files = len(list((work / "emit").glob(f"*_{EX_PREFIX}*.paths")))
+    store = ["--store", work / "emit.db"] if a.store else []
+    dt = run([sys.executable, ORCHESTRATE, "--skip-prune", "--langs", ",".join(a.langs),
+              "--path-dir", work / "emit", "--helpers-dir", bin_dir, "--core-dir", work / "core_out", *store])
+    return {"files": files, "wall_s": dt, "per_s": files / dt}
+
+
+def stage_launch(a, work: pathlib.Path, bin_dir: pathlib.Path, oracles) -> Dict:
+    rt = work / "runtime"
+    for s in sorted(CORE.glob("phobos*.sh")):
+        install(s, rt)
+    lang = a.langs[0]
+    shutil.copyfile(work / "core_out" / f"BaseLanguage-{lang}.cfg", rt / f"BaseLanguage-{lang}.cfg")
+    shutil.copyfile(work / "core_out" / "TailPhobos.cfg", rt / "TailPhobos.cfg")
+    cache, stamp = work / "policy-cache", work / "launch.stamp"
+    env = dict(os.environ, BWRAP_BIN=str(bin_dir / STUB.name), PHOBOS_POLICY_CACHE=str(cache),
+               PHOBOS_BENCH_STAMP=str(stamp), NETBLOCKER_SO=str(rt / "libnetblocker.so"))
+    env.pop("PHOBOS_BENCH_ORACLE", None)
+
+    def once() -> float:
+        stamp.unlink(missing_ok=True)
+        t0 = time.time()
+        rc = subprocess.call([str(rt / "phobos.sh"), "--", "/bin/true"], env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if rc or not stamp.is_file():
+            raise RuntimeError(f"phobos.sh launch failed (rc={rc})")
+        return (float(stamp.read_text()) - t0) * 1000
+
+    res: Dict = {"lang": lang, "runs": a.launches}
+    cold = []
+    for _ in range(a.launches):
+        shutil.rmtree(cache, ignore_errors=True)
+        cold.append(once())
+    once()  # populate
+    warm = [once() for _ in range(a.launches)]
+    res.update(cold_ms=summary(cold), warm_ms=summary(warm))
+    return res
+
+
+# -----------------------------------------------------------------------------
+# Report
+# -----------------------------------------------------------------------------
+def git_rev() -> str:
+    try:
+        return subprocess.run(["git", "-C", str(REPO), "describe", "--always", "--dirty"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def print_report(rep: Dict) -> None:
+    r = rep["results"]
+    print(f"\nphobos bench  rev={rep['rev'] or '?'}  seed={rep['params']['seed']}  "
+          f"tree={rep['params']['tree_dirs']} dirs  exercises={rep['params']['exercises_total']}")
+    if "prune" in r:
+        for name, p in (("prune", r["prune"]), ("  seeded", r["prune"].get("seeded"))):
+            if not p:
+                continue
+            at = p["attempts"]
+            print(f"  {name:<12} {p['wall_s']:8.2f} s   {p['s_per_exercise'] * 1000:8.1f} ms/exercise   "
+                  f"attempts/exercise p50={at.get('p50', 0):.0f} max={at.get('max', 0):.0f} "
+                  f"total={p['attempts_total']}   oracle {'ok' if p['oracle_ok'] else 'FAILED'}")
+    for name, unit in (("emit", "entries"), ("langsets", "files"), ("orchestrate", "files")):
+        if name in r:
+            s = r[name]
+            print(f"  {name:<12} {s['wall_s']:8.2f} s   {s['per_s']:8.1f} {unit}/s")
+    if "launch" in r:
+        for k in ("cold_ms", "warm_ms"):
+            s = r["launch"][k]
+            print(f"  launch {k[:4]:<5} p50={s['p50']:7.1f} ms  p99={s['p99']:7.1f} ms  (n={s['n']})")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--langs", default="java,python", help="comma-separated (names only)")
+    ap.add_argument("--exercises", type=int, default=4, help="per language")
+    ap.add_argument("--depth", type=int, default=3, help="synthetic tree depth")
+    ap.add_argument("--fanout", type=int, default=4, help="synthetic tree fanout")
+    ap.add_argument("--required", type=int, default=4, help="per-exercise oracle paths")
+    ap.add_argument("--common", type=int, default=2, help="oracle paths shared by a language")
+    ap.add_argument("--strategy", default=os.environ.get("PRUNE_STRATEGY", "ddmin"), choices=("ddmin", "linear"))
+    ap.add_argument("--jobs", type=int, default=1, help="run_minimal_fs_all.sh --jobs")
+    ap.add_argument("--workdir-mode", default="shared",
+                    choices=("shared", "fresh", "overlay", "reflink", "hardlink", "copy"),
+                    help="detect_minimal_fs.sh --workdir-mode for every attempt")
+    ap.add_argument("--spec-jobs", type=int, default=1,
+                    help="detect_minimal_fs.sh --spec-jobs (attempts in flight per prune)")
+    ap.add_argument("--store", action="store_true",
+                    help="emit into an SQLite artifact store too; orchestrate reads the sets from it")
+    ap.add_argument("--seeded", action="store_true",
+                    help="prune a second time with --prior auto (the first pass's union)")
+    ap.add_argument("--build-ms", type=int, default=0, help="simulated build time per passing attempt")
+    ap.add_argument("--replicate", type=int, default=20, help="copies of each log for emit/langsets/orchestrate")
+    ap.add_argument("--launches", type=int, default=30, help="phobos.sh runs per cache state")
+    ap.add_argument("--stages", default=",".join(STAGES), help="subset of " + ",".join(STAGES))
+    ap.add_argument("--work-dir", help="scratch dir (default: fresh dir in /var/tmp, removed afterwards)")
+    ap.add_argument("--keep", action="store_true", help="keep the scratch dir")
+    ap.add_argument("--json", help="also write the report here")
+    a = ap.parse_args()
+    a.langs = [l.strip() for l in a.langs.split(",") if l.strip()]
+    stages = [s.strip() for s in a.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        ap.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    # each stage consumes the previous stage's output
+    stages = list(STAGES[:max(STAGES.index(s) for s in stages) + 1])
+
+    # the tree must not live under /tmp: the pruner's base binds make /tmp writable
+    work = pathlib.Path(a.work_dir) if a.work_dir else pathlib.Path(tempfile.mkdtemp(prefix="phobos-bench.", dir="/var/tmp"))
+    work.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(a.seed)
+    try:
+        dirs = make_tree(work / "tree", a.depth, a.fanout)
+        oracles = make_corpus(work / "tests", dirs, a.langs, a.exercises, a.required, a.common, rng)
+        bin_dir = work / "bin"
+        for s in (PRUNING / "run_minimal_fs_all.sh", PRUNING / "detect_minimal_fs.sh", STUB,
+                  *sorted(HELPERS.glob("*.py"))):
+            install(s, bin_dir)
+
+        rep: Dict = {
+            "rev": git_rev(),
+            "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+            "params": {k: getattr(a, k) for k in ("seed", "langs", "exercises", "depth", "fanout", "required",
+                                                   "common", "strategy", "workdir_mode", "spec_jobs", "seeded", "store", "jobs", "build_ms", "replicate", "launches")},
+            "results": {},
+        }
+        rep["params"].update(tree_dirs=len(dirs), exercises_total=len(a.langs) * a.exercises)
+        for name in stages:
+            print(f"[bench] {name} …", file=sys.stderr)
+            rep["results"][name] = globals()[f"stage_{name}"](a, work, bin_dir, oracles)
+    finally:
+        for lang in a.langs:
+            for p in pathlib.Path("/tmp").glob(f"prune_logs_{lang}_{EX_PREFIX}*"):
+                shutil.rmtree(p, ignore_errors=True)
+        if not (a.keep or a.work_dir):
+            shutil.rmtree(work, ignore_errors=True)
+
+    print_report(rep)
+    if a.json:
+        pathlib.Path(a.json).write_text(json.dumps(rep, indent=2, sort_keys=True) + "\n")
+    ok = rep["results"].get("prune", {}).get("oracle_ok", True)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env bash
+# shellcheck shell=bash
+set -euo pipefail
+HERE="$(cd -- "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# shellcheck source=phobos-common.sh
+source "${HERE}/phobos-common.sh"
+
+usage() {
+  cat <<USAGE
+Usage:
+  phobos-batch.sh [--jobs N] [--results FILE] [--log-dir DIR] [layer options] [JOBS.jsonl|-]
+
+Runs every job of a JSONL stream through the same layers as phobos.sh
+(timeout -> network -> filesystem), at most N at a time (default: nproc).
+
+Job (one JSON object per line):
+  {"id": "sub-42", "cmd": ["mvn", "-q", "test"], "configs": ["ex.cfg"], "workdir": "/path"}
+  - cmd: argv array, or a string run with bash -c
+  - configs: exercise configs, applied like --config (relative to workdir)
+  - id, configs, workdir are optional (id defaults to the line number)
+
+Result (one JSON object per job, written to --results, default stdout):
+  {"id", "exit_code", "phb", "wall_ms", "denials": {"network", "filesystem"},
+   "evidence": {"network": [...], "filesystem": [...]}, "resources",
+   "netblocker", "log"}
+  phb is the PHB-* class of the exit code (PHB-EDENY if the run failed with
+  sandbox denials), "OK" on success and null for a plain build failure.
+  resources is the run's cgroup usage ({"cpu_ms", "mem_peak_bytes",
+  "oom_kills", "pids_max", "limits"}), null when it ran without a cgroup.
+  netblocker sums libnetblocker's counters over the job's processes
+  ({"processes", "getaddrinfo": {"allowed", "denied", "match_ns"}, "connect":
+  {"allowed", "denied", "match_ns", "cache_hits", "cache_misses"}}), null
+  without the network layer.
+
+Layer options: --no-timeout, --no-network, --no-filesystem (as in phobos.sh).
+Base*.cfg and TailPhobos.cfg are parsed once per batch; per-job specs come
+from the policy cache (PHOBOS_POLICY_CACHE) like phobos.sh.
+USAGE
+  exit 2
+}
+
+jobs_n="$(nproc 2>/dev/null || echo 1)"
+results="-"
+log_dir=""
+input="-"
+enable_timeout=1
+enable_network=1
+enable_filesystem=1
+
+while (( "$#" )); do
+  case "$1" in
+    --jobs|-j)
+      [[ $# -ge 2 && "$2" =~ ^[1-9][0-9]*$ ]] || usage
+      jobs_n="$2"; shift 2;;
+    --results|-o)
+      [[ $# -ge 2 ]] || usage
+      results="$2"; shift 2;;
+    --log-dir)
+      [[ $# -ge 2 ]] || usage
+      log_dir="$2"; shift 2;;
+    --no-timeout)
+      enable_timeout=0; shift;;
+    --no-network)
+      enable_network=0; shift;;
+    --no-filesystem|--no-fs)
+      enable_filesystem=0; shift;;
+    -h|--help)
+      usage;;
+    -*)
+      [[ "$1" == "-" ]] || usage
+      input="$1"; shift;;
+    *)
+      input="$1"; shift;;
+  esac
+done
+command -v jq >/dev/null 2>&1 || die "phobos-batch.sh needs jq" "${PHB_ERUNTIME}"
+[[ "$input" == "-" || -f "$input" ]] || { echo "Jobs file not found: $input" >&2; exit "${PHB_EPOLICY}"; }
+
+export PHB_ENABLE_TIMEOUT="$enable_timeout"
+export PHB_ENABLE_NETWORK="$enable_network"
+export PHB_ENABLE_FILESYSTEM="$enable_filesystem"
+
+INI_TMP_DIRS=""
+BATCH_DIR="$(mktemp -d -t phobos-batch.XXXXXX)"
+trap 'rm -rf "$BATCH_DIR" $INI_TMP_DIRS' EXIT
+# job output is only kept when --log-dir is given; deny_scan keeps the evidence
+[[ -z "$log_dir" ]] || mkdir -p "$log_dir"
+if [[ "$results" == "-" ]]; then exec 3>&1; else exec 3>"$results"; fi
+
+# One bash-evaluable line per job; @sh quoting makes eval safe
+if [[ "$input" == "-" ]]; then input="/dev/stdin"; fi
+jq -r '
+  "id=\((.id // input_line_number) | tostring | @sh)"
+  + " workdir=\((.workdir // "") | @sh)"
+  + " cmd=(\(.cmd | if type == "string" then ["bash", "-c", .] else (. // []) end | map(tostring) | @sh))"
+  + " cfgs=(\((.configs // []) | map(tostring) | @sh))"' "$input" > "${BATCH_DIR}/jobs.sh" \
+  || die "Invalid jobs stream: ${input}" "${PHB_EPOLICY}"
+mapfile -t JOBS < "${BATCH_DIR}/jobs.sh"
+
+shopt -s nullglob
+base_cfgs=( "${HERE}"/Base*.cfg )
+shopt -u nullglob
+: "${TAIL_FLAGS_FILE:=${HERE}/TailPhobos.cfg}"
+
+# Base policy once per batch; each job only merges its exercise configs
+BASE_WORK=""
+if [[ ${#base_cfgs[@]} -gt 0 ]]; then
+  BASE_WORK="${BATCH_DIR}/base"
+  compile_base "$BASE_WORK" "${base_cfgs[@]}"
+else
+  _log "No Base*.cfg found; running jobs without sandbox."
+fi
+
+# phb_class <rc> <denials>: PHB-* label of a job's exit status (JSON)
+phb_class() {
+  case "$1" in
+    0)                 printf '"OK"';;
+    "${PHB_EPOLICY}")  printf '"PHB-EPOLICY"';;
+    "${PHB_EMERGE}")   printf '"PHB-EMERGE"';;
+    "${PHB_EBASE}")    printf '"PHB-EBASE"';;
+    "${PHB_ETIMEOUT}") printf '"PHB-ETIMEOUT"';;
+    "${PHB_ERUNTIME}") printf '"PHB-ERUNTIME"';;
+    "${PHB_ELIMIT}")   printf '"PHB-ELIMIT"';;
+    *) if (( $2 > 0 )); then printf '"PHB-EDENY"'; else printf 'null'; fi;;
+  esac
+}
+
+# run_job <n>: resolve the spec, run the layers, write BATCH_DIR/<n>.result
+run_job() {
+  local n="$1" id workdir cmd=() cfgs=() c rc start end ms
+  eval "${JOBS[$n]}"
+  local log="/dev/null" stats="${BATCH_DIR}/${n}.stats"
+  [[ -z "$log_dir" ]] || log="${log_dir}/${n}.log"
+
+  # run_job runs with errexit off (worker), so set -e below is effective
+  start="${EPOCHREALTIME/./}"
+  (
+    set -e
+    trap 'rm -rf $INI_TMP_DIRS' EXIT
+    [[ ${#cmd[@]} -gt 0 ]] || { echo "Job ${id}: empty cmd"; exit "${PHB_EPOLICY}"; }
+    if [[ -n "$workdir" ]]; then cd -- "$workdir"; fi
+    for c in "${cfgs[@]}"; do
+      [[ -f "$c" ]] || { echo "Config not found: $c"; exit "${PHB_EPOLICY}"; }
+    done
+    if [[ -z "$BASE_WORK" ]]; then exec "${cmd[@]}"; fi
+    resolve_spec "$BASE_WORK" "${TAIL_FLAGS_FILE:-}" "${base_cfgs[@]}" -- "${cfgs[@]}"
+    rm -rf $INI_TMP_DIRS
+    PHB_STATS_FILE="$stats" exec "${HERE}/phobos-timeout.sh" "$SPEC_DIR" -- "${cmd[@]}"
+  ) </dev/null >"$log" 2>&1
+  rc=$?
+  end="${EPOCHREALTIME/./}"
+  ms=$(( (end - start) / 1000 ))
+
+  local deny='{"network":0,"filesystem":0,"evidence":{}}'
+  [[ -s "$stats" ]] && deny="$(<"$stats")"
+  [[ -n "$log_dir" ]] || log=""
+  jq -cn --arg id "$id" --argjson rc "$rc" --argjson ms "$ms" --argjson deny "$deny" --arg log "$log" \
+    --argjson phb "$(phb_class "$rc" "$(jq '.network + .filesystem' <<<"$deny")")" \
+    '{id: $id, exit_code: $rc, phb: $phb, wall_ms: $ms,
+      denials: {network: $deny.network, filesystem: $deny.filesystem},
+      evidence: $deny.evidence, resources: $deny.resources, netblocker: $deny.netblocker,
+      log: (if $log == "" then null else $log end)}' > "${BATCH_DIR}/${n}.result"
+}
+
+# Bounded worker pool; results are emitted by this shell as jobs finish, so
+# records never interleave. Workers drop a done marker instead of relying on
+# `wait -n -p` (bash 5.1).
+declare -A worker_job=()
+done_n=0
+reap_one() {
+  wait -n 2>/dev/null || true
+  local pid n id
+  for pid in "${!worker_job[@]}"; do
+    kill -0 "$pid" 2>/dev/null && continue
+    n="${worker_job[$pid]}"
+    if [[ -s "${BATCH_DIR}/${n}.result" ]]; then
+      cat "${BATCH_DIR}/${n}.result" >&3
+    else
+      # the worker died before writing a result: same id as its spec line
+      id="$(eval "${JOBS[$n]}"; printf '%s' "$id")"
+      jq -cn --arg id "$id" '{id: $id, exit_code: null, phb: "PHB-ERUNTIME"}' >&3
+    fi
+    done_n=$(( done_n + 1 ))
+    unset 'worker_job[$pid]'
+  done
+}
+for n in "${!JOBS[@]}"; do
+  while (( ${#worker_job[@]} >= jobs_n )); do reap_one; done
+  ( set +e; run_job "$n" ) &
+  worker_job[$!]="$n"
+done
+while (( ${#worker_job[@]} > 0 )); do reap_one; done
+
+_log "Batch done: ${done_n}/${#JOBS[@]} job(s); per-job status is in the results."
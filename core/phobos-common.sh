@@ -7,6 +7,7 @@ PHB_EMERGE=12
 PHB_EBASE=13
 PHB_ETIMEOUT=14
 PHB_ERUNTIME=15
+PHB_ELIMIT=16
 _log()   { printf '%s\n' "[$(date -u +'%Y-%m-%dT%H:%M:%SZ')] $*" >&2; }
 die()    { _log "$1"; exit "${2:-1}"; }
 report() { printf '%s\n' "$1"; }
@@ -48,7 +49,8 @@ parse_cfg_policy() {
   local tdir; tdir="$(mktemp -d -t phobos-cfg.XXXXXX)"
   INI_TMP_DIRS+=" ${tdir}"
   local ro="${tdir}/ro.paths" rw="${tdir}/rw.paths" hide="${tdir}/hide.paths" net="${tdir}/net.rules"
-  : >"$ro"; : >"$rw"; : >"$hide"; : >"$net"
+  local limits="${tdir}/limits"
+  : >"$ro"; : >"$rw"; : >"$hide"; : >"$net"; : >"$limits"
   local sec=""
   while IFS= read -r line || [[ -n "$line" ]]; do
     line="${line%%#*}"; line="$(echo "$line" | sed -E 's/^[[:space:]]+//; s/[[:space:]]+$//')"
@@ -69,19 +71,50 @@ parse_cfg_policy() {
           local t="${BASH_REMATCH[1]}"; [[ "$t" -eq 0 ]] && PARSED_TIMEOUT="" || PARSED_TIMEOUT="$t"
         elif [[ "$line" =~ ^[0-9]+$ ]]; then
           local t="$line"; [[ "$t" -eq 0 ]] && PARSED_TIMEOUT="" || PARSED_TIMEOUT="$t"
+        elif [[ "$line" =~ ^(mem_mb|pids)[[:space:]]*=[[:space:]]*([0-9]+)$ ]]; then
+          printf '%s=%s\n' "${BASH_REMATCH[1]}" "${BASH_REMATCH[2]}" >>"$limits"
+        elif [[ "$line" =~ ^cpus[[:space:]]*=[[:space:]]*([0-9]+(\.[0-9]+)?)$ ]]; then
+          printf 'cpus=%s\n' "${BASH_REMATCH[1]}" >>"$limits"
         fi ;;
       *) ;;
     esac
   done <"$cfg"
   PARSED_RO_FILE="$ro"; PARSED_RW_FILE="$rw"; PARSED_HIDE_FILE="$hide"; PARSED_NET_FILE="$net"; : "${PARSED_TIMEOUT:=}"
+  PARSED_LIMITS_FILE="$limits"
+}
+
+# limits_merge <limits_file> <parsed_limits>: [limits] keys (mem_mb, pids,
+# cpus) are last-wins per key, like the timeout; 0 lifts an inherited limit.
+limits_merge() {
+  local out="$1" add="$2"
+  [[ -s "$add" ]] || return 0
+  cat "$out" "$add" | awk -F= '{ if (!($1 in v)) k[++n] = $1; v[$1] = $2 }
+                               END { for (i = 1; i <= n; i++) print k[i] "=" v[k[i]] }' > "${out}.tmp"
+  mv "${out}.tmp" "$out"
+}
+# base_mode_of <path>: sets BASE_MODE to the mode the nearest base entry at or
+# above <path> grants (r|w), "n" if a base hide entry is nearer (or at the
+# granting entry itself), or "" if none. Reads BASE_RO/BASE_RW/BASE_HIDE of
+# the caller.
+base_mode_of() {
+  local p="$1"
+  BASE_MODE=""
+  while :; do
+    if [[ -n "${BASE_HIDE["$p"]:-}" ]]; then BASE_MODE=n; return 0; fi
+    if [[ -n "${BASE_RW["$p"]:-}" ]]; then BASE_MODE=w; return 0; fi
+    if [[ -n "${BASE_RO["$p"]:-}" ]]; then BASE_MODE=r; return 0; fi
+    [[ "$p" == "/" || -z "$p" ]] && return 0
+    p="${p%/*}"; [[ -z "$p" ]] && p="/"
+  done
 }
 merge_fs_per_path() {
   local base_ro="$1" base_rw="$2" base_hide="$3"
   local -n cur_ro_ref="$4"; local -n cur_rw_ref="$5"; local -n cur_hide_ref="$6"
   local add_ro="$7" add_rw="$8" add_hide="$9"
-  declare -A BASE_RO=() BASE_RW=()
+  declare -A BASE_RO=() BASE_RW=() BASE_HIDE=()
   if [[ -s "$base_ro" ]]; then while IFS= read -r p; do [[ -z "$p" ]] && continue; BASE_RO["$p"]=1; done < <(canon_paths < "$base_ro"); fi
   if [[ -s "$base_rw" ]]; then while IFS= read -r p; do [[ -z "$p" ]] && continue; BASE_RW["$p"]=1; done < <(canon_paths < "$base_rw"); fi
+  if [[ -s "$base_hide" ]]; then while IFS= read -r p; do [[ -z "$p" ]] && continue; BASE_HIDE["$p"]=1; done < <(canon_paths < "$base_hide"); fi
   declare -A CUR_RO=() CUR_RW=() CUR_HIDE=()
   if [[ -s "$cur_ro_ref"  ]]; then while IFS= read -r p; do [[ -z "$p" ]] && continue; CUR_RO["$p"]=1; done < "$cur_ro_ref"; fi
   if [[ -s "$cur_rw_ref"  ]]; then while IFS= read -r p; do [[ -z "$p" ]] && continue; CUR_RW["$p"]=1; done < "$cur_rw_ref"; fi
@@ -92,8 +125,11 @@ merge_fs_per_path() {
   if [[ -s "$add_ro" ]]; then
     while IFS= read -r p; do
       [[ -z "$p" ]] && continue
-      if [[ -n "${BASE_RO["$p"]:-}" || -n "${BASE_RW["$p"]:-}" ]]; then
+      base_mode_of "$p"
+      if [[ "$BASE_MODE" == [rw] ]]; then
         CUR_RO["$p"]=1; unset CUR_RW["$p"]; unset CUR_HIDE["$p"]
+      elif [[ "$BASE_MODE" == n ]]; then
+        report "Policy merge failed: path '$p' requested RO but base hides it. (PHB-EMERGE)"; exit "${PHB_EMERGE}"
       else
         report "Policy merge failed: path '$p' requested RO but base does not allow access. (PHB-EMERGE)"; exit "${PHB_EMERGE}"
       fi
@@ -102,8 +138,11 @@ merge_fs_per_path() {
   if [[ -s "$add_rw" ]]; then
     while IFS= read -r p; do
       [[ -z "$p" ]] && continue
-      if [[ -n "${BASE_RW["$p"]:-}" ]]; then
+      base_mode_of "$p"
+      if [[ "$BASE_MODE" == w ]]; then
         CUR_RW["$p"]=1; unset CUR_RO["$p"]; unset CUR_HIDE["$p"]
+      elif [[ "$BASE_MODE" == n ]]; then
+        report "Policy merge failed: path '$p' requested RW but base hides it. (PHB-EMERGE)"; exit "${PHB_EMERGE}"
       else
         report "Policy merge failed: path '$p' requested RW but base forbids write. (PHB-EMERGE)"; exit "${PHB_EMERGE}"
       fi
@@ -128,21 +167,134 @@ net_union() {
   done
 }
 
-filter_existing() { while IFS= read -r p; do [[ -n "$p" && -e "$p" ]] && printf '%s\n' "$p"; done; }
+# deny_scan <record> <max_evidence> [transcript]: stderr classifier. Passes
+# every line through unchanged, counts network/filesystem denial lines and
+# keeps the first <max_evidence> of each (truncated to 512 chars) as evidence.
+# Writes a JSON record on EOF: {"network":N,"filesystem":M,"evidence":{...}}.
+PHB_NET_DENY_RE='EAI_AGAIN|EAI_FAIL|EAI_NONAME|Network is unreachable|Connection timed out'
+PHB_FS_DENY_RE='Permission denied|EACCES|EROFS'
+deny_scan() {
+  awk -v rec="$1" -v max="$2" -v tr="${3:-}" -v netre="$PHB_NET_DENY_RE" -v fsre="$PHB_FS_DENY_RE" '
+    function jstr(s,   out, i, c) {
+      # per-char escaping: gsub replacement backslashes differ between awks
+      out = ""
+      for (i = 1; i <= length(s); i++) {
+        c = substr(s, i, 1)
+        if (c == "\\" || c == "\"") out = out "\\" c
+        else if (c == "\t") out = out "\\t"
+        else out = out (c in ctl ? " " : c)
+      }
+      return "\"" out "\""
+    }
+    function jarr(a, n,   i, out) {
+      out = ""
+      for (i = 1; i <= n && i <= max; i++) out = out (i > 1 ? "," : "") jstr(a[i])
+      return "[" out "]"
+    }
+    BEGIN { for (i = 1; i < 32; i++) ctl[sprintf("%c", i)] = 1; n = 0; f = 0 }
+    {
+      print; fflush()
+      if (tr != "") { print >> tr; fflush(tr) }
+      if ($0 ~ netre) { if (++n <= max) ne[n] = substr($0, 1, 512) }
+      if ($0 ~ fsre)  { if (++f <= max) fe[f] = substr($0, 1, 512) }
+    }
+    END {
+      printf "{\"network\":%d,\"filesystem\":%d,\"evidence\":{\"network\":%s,\"filesystem\":%s}}\n", \
+             n, f, jarr(ne, n), jarr(fe, f) > rec
+    }'
+}
+
+# nb_stats_json <file>: add up libnetblocker's per-process counter slots
+# (NETBLOCKER_STATS, "Telemetry" in netblocker.c: a 16-word header of magic,
+# version and slots handed out, then 16-word slots of pid, getaddrinfo
+# allowed/denied/ns, connect allowed/denied/ns, cache hits/misses). Prints
+# one JSON object; nothing if no process of the run loaded the library.
+# The file is writable from inside the sandbox, so anything but the exact
+# layout (size, magic, version, no counts past the slots handed out, no
+# value beyond 2^53) is rejected rather than summed.
+PHB_NB_MAGIC=1312969556
+PHB_NB_VERSION=1
+PHB_NB_SLOTS=1023
+PHB_NB_BYTES=$(( (PHB_NB_SLOTS + 2) * 128 ))
+nb_stats_json() {
+  local size
+  [[ -s "$1" ]] || return 0
+  size="$(stat -c %s "$1" 2>/dev/null || echo 0)"
+  if (( size != PHB_NB_BYTES )); then
+    _log "Ignoring netblocker counters: $1 is ${size} bytes, expected ${PHB_NB_BYTES}."
+    return 0
+  fi
+  od -An -v -t u8 -w128 -N "$PHB_NB_BYTES" "$1" | awk -v magic="$PHB_NB_MAGIC" -v version="$PHB_NB_VERSION" \
+      -v slots="$PHB_NB_SLOTS" '
+    NR == 1 {
+      if ($1 != magic) exit
+      if ($2 != version) { bad = "version " $2; exit }
+      handed = $3 < slots ? $3 : slots
+      next
+    }
+    {
+      used = 0
+      for (i = 2; i <= 9; i++) {
+        if (length($i) > 15) { bad = "implausible count"; exit }
+        sum[i] += $i; if ($i > 0) used = 1
+      }
+      # slot 0 takes the overflow; nobody writes past the slots handed out
+      if (used && NR - 2 > handed) { bad = "counts in unclaimed slot " NR - 2; exit }
+      procs += used
+    }
+    END {
+      if (bad != "") { print "netblocker: " bad > "/dev/stderr"; exit 1 }
+      if (NR < 2) exit
+      printf "{\"processes\":%d,\"getaddrinfo\":{\"allowed\":%.0f,\"denied\":%.0f,\"match_ns\":%.0f},", \
+             procs, sum[2], sum[3], sum[4]
+      printf "\"connect\":{\"allowed\":%.0f,\"denied\":%.0f,\"match_ns\":%.0f,", sum[5], sum[6], sum[7]
+      printf "\"cache_hits\":%.0f,\"cache_misses\":%.0f}}\n", sum[8], sum[9]
+    }' || _log "Ignoring netblocker counters in $1 (layout check failed)."
+}
 
 write_spec() {
-  local spec_dir="$1" ro="$2" rw="$3" hide="$4" net="$5" timeout="$6" tail="$7"
+  local spec_dir="$1" ro="$2" rw="$3" hide="$4" net="$5" timeout="$6" tail="$7" limits="${8:-}"
   mkdir -p "$spec_dir"
 
-  if [[ -s "$ro" ]]; then filter_existing < "$ro" > "${spec_dir}/ro.paths"; else : > "${spec_dir}/ro.paths"; fi
-  if [[ -s "$hide" ]]; then filter_existing < "$hide" > "${spec_dir}/hide.paths"; else : > "${spec_dir}/hide.paths"; fi
-
+  # paths are kept whether they exist or not: a cached spec must not depend
+  # on the files present when it was compiled (ro binds are --ro-bind-try,
+  # hides of missing paths are skipped at launch)
+  cp "$ro"   "${spec_dir}/ro.paths"   2>/dev/null || : > "${spec_dir}/ro.paths"
   cp "$rw"   "${spec_dir}/rw.paths"   2>/dev/null || : > "${spec_dir}/rw.paths"
+  cp "$hide" "${spec_dir}/hide.paths" 2>/dev/null || : > "${spec_dir}/hide.paths"
 
   if [[ -n "$timeout" ]]; then printf '%s\n' "$timeout" > "${spec_dir}/timeout.sec"; else : > "${spec_dir}/timeout.sec"; fi
+  if [[ -n "$limits" && -s "$limits" ]]; then grep -v '=0$' "$limits" > "${spec_dir}/limits" || :; else : > "${spec_dir}/limits"; fi
   if [[ -n "$tail" && -f "$tail" ]]; then sed -E 's/#.*$//' "$tail" | sed '/^[[:space:]]*$/d' > "${spec_dir}/tail.flags"; else : > "${spec_dir}/tail.flags"; fi
   if [[ -n "$net" && -s "$net" ]]; then cp "$net" "${spec_dir}/net.rules"; else : > "${spec_dir}/net.rules"; fi
+  write_bwrap_args "$spec_dir"
+}
+
+# write_bwrap_args <spec_dir>: precompute the filesystem layer's bwrap argv
+# (NUL-separated) from ro/rw/hide.paths + tail.flags. Mounts are ordered by
+# depth so a parent never shadows a child; at equal depth tmpfs < ro < rw.
+# ro binds of missing paths are skipped by bwrap itself (--ro-bind-try).
+write_bwrap_args() {
+  local spec_dir="$1" p k kind rank flag slashes
+  {
+    for k in "hide 0 --tmpfs" "ro 1 --ro-bind-try" "rw 2 --bind"; do
+      read -r kind rank flag <<<"$k"
+      [[ -s "${spec_dir}/${kind}.paths" ]] || continue
+      while IFS= read -r p; do
+        [[ -z "$p" ]] && continue
+        slashes="${p//[^\/]/}"
+        printf '%d\t%s\t%s\t%s\n' "${#slashes}" "$rank" "$flag" "$p"
+      done < "${spec_dir}/${kind}.paths"
+    done
+  } | sort -t$'\t' -k1,1n -k2,2n -s | while IFS=$'\t' read -r _ _ flag p; do
+    if [[ "$flag" == --tmpfs ]]; then printf '%s\0' "$flag" "$p"; else printf '%s\0' "$flag" "$p" "$p"; fi
+  done > "${spec_dir}/bwrap.args"
+  if [[ -s "${spec_dir}/tail.flags" ]]; then
+    # shellcheck disable=SC2046
+    printf '%s\0' $(<"${spec_dir}/tail.flags") >> "${spec_dir}/bwrap.args"
+  fi
 }
+
 fs_union_files() {
   local out_ro="$1" out_rw="$2" out_hide="$3" in_ro="$4" in_rw="$5" in_hide="$6"
   tmpd="$(mktemp -d)"; trap 'rm -rf "$tmpd"' RETURN
@@ -158,3 +310,226 @@ fs_union_files() {
   canon_paths < "${tmpd}/rw.all"   | uniq_keep_order | depth_sort > "$out_rw"   || : > "$out_rw"
   canon_paths < "${tmpd}/hide.all" | uniq_keep_order | depth_sort > "$out_hide" || : > "$out_hide"
 }
+
+# ── policy compiler ──────────────────────────────────────────────────────────
+# compile_base <work_dir> <base.cfg>...
+#   FS union, NET union, TIMEOUT and LIMITS last-wins into
+#   <work_dir>/base.{ro,rw,hide,net,timeout,limits}.
+#   A base built once can be reused by any number of compile_exercise calls.
+compile_base() {
+  local work="$1"; shift
+  local base_ro="${work}/base.ro" base_rw="${work}/base.rw" base_hide="${work}/base.hide" base_net="${work}/base.net"
+  mkdir -p "$work"
+  : >"$base_ro"; : >"$base_rw"; : >"$base_hide"; : >"$base_net"; : >"${work}/base.limits"
+  local timeout_eff="" b tmpnet
+
+  for b in "$@"; do
+    parse_cfg_policy "$b"
+    # FS: union only (no least-privilege checks while building base)
+    fs_union_files "$base_ro" "$base_rw" "$base_hide" \
+                   "$PARSED_RO_FILE" "$PARSED_RW_FILE" "$PARSED_HIDE_FILE"
+    # NET: union
+    tmpnet="${work}/net.tmp"; net_union "$tmpnet" "$base_net" "$PARSED_NET_FILE"; mv "$tmpnet" "$base_net"
+    # TIMEOUT: last base wins
+    [[ -n "${PARSED_TIMEOUT:-}" || "${PARSED_TIMEOUT:-__unset__}" == "" ]] && timeout_eff="${PARSED_TIMEOUT:-}"
+    limits_merge "${work}/base.limits" "$PARSED_LIMITS_FILE"
+  done
+  printf '%s\n' "$timeout_eff" > "${work}/base.timeout"
+}
+
+# compile_exercise <spec_dir> <base_work_dir> <tail_file> <exercise.cfg>...
+#   Per-path FS merge against the base (PHB-EMERGE), NET union, TIMEOUT and
+#   LIMITS last-wins. Writes a complete spec (see write_spec) into <spec_dir>.
+compile_exercise() {
+  local spec_dir="$1" bw="$2" tail="$3"; shift 3
+  local work; work="$(mktemp -d -t phobos-compile.XXXXXX)"
+  INI_TMP_DIRS+=" ${work}"
+  local eff_ro="${work}/eff.ro" eff_rw="${work}/eff.rw" eff_hide="${work}/eff.hide" eff_net="${work}/eff.net"
+  local eff_limits="${work}/eff.limits"
+  local timeout_eff c tmpnet
+  timeout_eff="$(<"${bw}/base.timeout")"
+  # exercise configs without a timeout inherit the base one
+  PARSED_TIMEOUT="$timeout_eff"
+
+  cp "${bw}/base.ro" "$eff_ro"; cp "${bw}/base.rw" "$eff_rw"; cp "${bw}/base.hide" "$eff_hide"; cp "${bw}/base.net" "$eff_net"
+  cp "${bw}/base.limits" "$eff_limits"
+  for c in "$@"; do
+    parse_cfg_policy "$c"
+    merge_fs_per_path "${bw}/base.ro" "${bw}/base.rw" "${bw}/base.hide" eff_ro eff_rw eff_hide \
+                      "$PARSED_RO_FILE" "$PARSED_RW_FILE" "$PARSED_HIDE_FILE"
+    tmpnet="${work}/net.tmp"; net_union "$tmpnet" "$eff_net" "$PARSED_NET_FILE"; mv "$tmpnet" "$eff_net"
+    [[ -n "${PARSED_TIMEOUT:-}" || "${PARSED_TIMEOUT:-__unset__}" == "" ]] && timeout_eff="${PARSED_TIMEOUT:-}"
+    limits_merge "$eff_limits" "$PARSED_LIMITS_FILE"
+  done
+
+  write_spec "$spec_dir" "$eff_ro" "$eff_rw" "$eff_hide" "$eff_net" "$timeout_eff" "$tail" "$eff_limits"
+}
+
+# compile_policy <spec_dir> <tail_file> <base.cfg>... -- <exercise.cfg>...
+compile_policy() {
+  local spec_dir="$1" tail="$2"; shift 2
+  local -a bases=()
+  while (( $# )) && [[ "$1" != "--" ]]; do bases+=("$1"); shift; done
+  (( $# )) && shift
+
+  local bw; bw="$(mktemp -d -t phobos-base.XXXXXX)"
+  INI_TMP_DIRS+=" ${bw}"
+  compile_base "$bw" "${bases[@]}"
+  compile_exercise "$spec_dir" "$bw" "$tail" "$@"
+}
+
+# policy_key <file>... [-- <file>...]: content hash of an ordered config stack
+# (plus this file, which holds the compiler) and of $PWD, which relative
+# config entries are resolved against. "--" and missing files hash as
+# /dev/null, so a config's role and position are part of the key. Names are
+# not: identical stacks at different paths share a spec.
+policy_key() {
+  local -a files=("${BASH_SOURCE[0]}")
+  local f
+  for f in "$@"; do
+    if [[ "$f" != "--" && -f "$f" ]]; then files+=("$f"); else files+=(/dev/null); fi
+  done
+  { sha256sum -- "${files[@]}" | cut -d' ' -f1; printf '%s\n' "$PWD"; } | sha256sum | cut -d' ' -f1
+}
+
+# resolve_spec <base_work_dir|""> <tail_file> <base.cfg>... -- <exercise.cfg>...
+#   Sets SPEC_DIR to the compiled spec for this config stack. Specs are reused
+#   from PHOBOS_POLICY_CACHE (default /var/tmp/phobos-policy), keyed by config
+#   contents and working directory (policy_key); with PHOBOS_POLICY_CACHE=
+#   every call compiles into a fresh temp dir. A prebuilt <base_work_dir>
+#   (compile_base) skips re-parsing the bases; its resolved base paths are
+#   part of the key, since it may have been compiled in another directory.
+resolve_spec() {
+  local bw="$1" tail="$2"; shift 2
+  local -a bases=()
+  while (( $# )) && [[ "$1" != "--" ]]; do bases+=("$1"); shift; done
+  (( $# )) && shift
+  local cache="${PHOBOS_POLICY_CACHE-/var/tmp/phobos-policy}" key stage
+
+  if [[ -n "$cache" ]] && { [[ -d "$cache" ]] || mkdir -p -m 700 "$cache" 2>/dev/null; } \
+     && [[ -O "$cache" ]]; then
+    key="$(policy_key "${bases[@]}" -- "$@" "$tail" ${bw:+"${bw}/base.ro" "${bw}/base.rw" "${bw}/base.hide"})"
+    SPEC_DIR="${cache}/${key}"
+    [[ -f "${SPEC_DIR}/bwrap.args" ]] && return 0
+    stage="$(mktemp -d "${cache}/.${key}.XXXXXX")"
+    INI_TMP_DIRS+=" ${stage}"
+  else
+    SPEC_DIR="$(mktemp -d -t phobos-spec.XXXXXX)"
+    stage="$SPEC_DIR"
+  fi
+
+  if [[ -n "$bw" ]]; then
+    compile_exercise "$stage" "$bw" "$tail" "$@"
+  else
+    compile_policy "$stage" "$tail" "${bases[@]}" -- "$@"
+  fi
+  if [[ "$stage" != "$SPEC_DIR" ]]; then
+    chmod 755 "$stage"
+    # first writer wins; a concurrent launch may have published the same key
+    mv -T "$stage" "$SPEC_DIR" 2>/dev/null || true
+  fi
+}
+
+# ── cgroup v2 ────────────────────────────────────────────────────────────────
+# cg_parent: sets CG_PARENT to the cgroup runs are nested under:
+# PHOBOS_CGROUP_PARENT if set, else the caller's own cgroup on the cgroup2
+# mount. Fails unless it is a writable (delegated) cgroup v2 directory.
+cg_parent() {
+  CG_PARENT="${PHOBOS_CGROUP_PARENT:-}"
+  if [[ -z "$CG_PARENT" ]]; then
+    local mnt rel
+    mnt="$(awk '$(NF-2) == "cgroup2" { print $5; exit }' /proc/self/mountinfo 2>/dev/null)"
+    rel="$(sed -n 's/^0:://p' /proc/self/cgroup 2>/dev/null)"
+    [[ -n "$mnt" && -n "$rel" ]] || return 1
+    CG_PARENT="${mnt%/}${rel%/}"
+  fi
+  [[ -f "${CG_PARENT}/cgroup.procs" && -w "$CG_PARENT" ]]
+}
+
+# cg_create <limits_file>: creates CG_DIR below CG_PARENT and writes
+# memory.max/pids.max/cpu.max for the mem_mb/pids/cpus it lists, enabling the
+# controllers in the parent's subtree_control on demand. Without a usable
+# parent it fails with CG_DIR empty; a limit that cannot be applied (parent
+# has member processes, controller not delegated) is added to CG_UNENFORCED.
+cg_create() {
+  local limits="$1" k v ctl file val
+  CG_DIR=""; CG_UNENFORCED=""
+  cg_parent || return 1
+  CG_DIR="${CG_PARENT}/phobos-$$"
+  mkdir "$CG_DIR" 2>/dev/null || { CG_DIR=""; return 1; }
+  [[ -s "$limits" ]] || return 0
+  while IFS='=' read -r k v; do
+    case "$k" in
+      mem_mb) ctl=memory; file=memory.max; val=$(( v * 1024 * 1024 )) ;;
+      pids)   ctl=pids;   file=pids.max;   val="$v" ;;
+      cpus)   ctl=cpu;    file=cpu.max;    val="$(awk -v c="$v" 'BEGIN { printf "%d 100000", c * 100000 }')" ;;
+      *) continue ;;
+    esac
+    if [[ ! -f "${CG_DIR}/${file}" ]]; then
+      printf '+%s\n' "$ctl" > "${CG_PARENT}/cgroup.subtree_control" 2>/dev/null || true
+    fi
+    if [[ -f "${CG_DIR}/${file}" ]] && printf '%s\n' "$val" > "${CG_DIR}/${file}" 2>/dev/null; then
+      # a memory limit that can be swapped around is no limit
+      [[ "$ctl" != memory ]] || { printf '0\n' > "${CG_DIR}/memory.swap.max"; } 2>/dev/null || true
+    else
+      CG_UNENFORCED+="${k} "
+    fi
+  done < "$limits"
+}
+
+# cg_event <file> <key>: prints the counter <key> of a flat-keyed cgroup file
+# (cpu.stat, memory.events, pids.events), 0 if the file or key is missing.
+cg_event() {
+  local k v
+  if [[ -r "$1" ]]; then
+    while read -r k v; do
+      [[ "$k" == "$2" ]] && { printf '%s\n' "$v"; return 0; }
+    done < "$1"
+  fi
+  printf '0\n'
+}
+
+# cg_collect <cg_dir>: sets CG_CPU_USEC, CG_MEM_PEAK (bytes, "" when the
+# kernel has no memory.peak), CG_OOM_KILLS and CG_PIDS_MAX (fork refusals).
+cg_collect() {
+  local cg="$1"
+  CG_CPU_USEC="$(cg_event "${cg}/cpu.stat" usage_usec)"
+  CG_MEM_PEAK=""
+  [[ -r "${cg}/memory.peak" ]] && CG_MEM_PEAK="$(<"${cg}/memory.peak")"
+  CG_OOM_KILLS="$(cg_event "${cg}/memory.events" oom_kill)"
+  CG_PIDS_MAX="$(cg_event "${cg}/pids.events" max)"
+}
+
+# cg_kill <cg_dir>: SIGKILLs every member of the cgroup (cgroup.kill on
+# 5.14+, else one by one), including processes that escaped the process group.
+cg_kill() {
+  local cg="$1" pid
+  [[ -n "$cg" && -d "$cg" ]] || return 0
+  if [[ -f "${cg}/cgroup.kill" ]]; then
+    printf '1\n' > "${cg}/cgroup.kill" 2>/dev/null || true
+  else
+    while read -r pid; do kill -KILL "$pid" 2>/dev/null || true; done < "${cg}/cgroup.procs"
+  fi
+}
+
+# cg_destroy <cg_dir>: kills whatever is left in the cgroup and removes it.
+cg_destroy() {
+  local cg="$1" i
+  [[ -n "$cg" && -d "$cg" ]] || return 0
+  cg_kill "$cg"
+  for i in 1 2 3 4 5 6 7 8 9 10; do
+    rmdir "$cg" 2>/dev/null && return 0
+    sleep 0.05
+  done
+  _log "cgroup ${cg} still busy; left in place"
+}
+
+# phb_timed_out <rc>: true if <rc> from `timeout` means the wall-clock limit
+# hit. 137 is ambiguous (kill-after, or a SIGKILL from the OOM killer), so it
+# does not count when the run's cgroup (PHB_CGROUP) recorded an OOM kill.
+phb_timed_out() {
+  [[ -n "${PHB_TIMEOUT_SEC:-}" ]] || return 1
+  [[ "$1" -eq 124 ]] && return 0
+  [[ "$1" -eq 137 ]] || return 1
+  [[ -z "${PHB_CGROUP:-}" ]] || (( $(cg_event "${PHB_CGROUP}/memory.events" oom_kill) == 0 ))
+}
@@ -10,6 +10,7 @@ SPEC_DIR="$1"; shift 2
 CMD=("$@")
 
 RO="${SPEC_DIR}/ro.paths"; RW="${SPEC_DIR}/rw.paths"; HIDE="${SPEC_DIR}/hide.paths"; TAIL="${SPEC_DIR}/tail.flags"
+ARGS="${SPEC_DIR}/bwrap.args"
 BWRAP="${BWRAP_BIN:-bwrap}"; TIMEOUT_BIN="${TIMEOUT_BIN:-timeout}"
 
 enable_fs="${PHB_ENABLE_FILESYSTEM:-1}"
@@ -28,7 +29,7 @@ if [[ "$enable_fs" != "1" ]]; then
     "${TIMEOUT_BIN}" "--kill-after=5s" "${PHB_TIMEOUT_SEC}" "${CMD[@]}"
     rc=$?
     set -e
-    if [[ "$rc" -eq 124 || "$rc" -eq 137 ]]; then
+    if phb_timed_out "$rc"; then
       report "Timed out after ${PHB_TIMEOUT_SEC}s. (PHB-ETIMEOUT)"
       exit ${PHB_ETIMEOUT}
     fi
@@ -40,18 +41,7 @@ fi
 
 args=()
 
-# Ensure the LD_PRELOAD library actually exists inside the bwrap sandbox.
-# PHB_NETBLOCKER_SO is set by phobos-network.sh when the lib exists.
-if [[ -n "${PHB_NETBLOCKER_SO:-}" && -f "${PHB_NETBLOCKER_SO}" ]]; then
-  args+=( --ro-bind "$PHB_NETBLOCKER_SO" "$PHB_NETBLOCKER_SO" )
-fi
-
-if [[ -s "${HIDE}" ]]; then
-  while IFS= read -r p; do [[ -z "$p" ]] && continue; args+=( --tmpfs "$p" ); done < "${HIDE}"
-fi
-if [[ -s "${RO}" ]]; then
-  while IFS= read -r p; do [[ -z "$p" ]] && continue; args+=( --ro-bind "$p" "$p" ); done < "${RO}"
-fi
+# Missing rw targets are created on the host so they can be bound.
 if [[ -s "${RW}" ]]; then
   while IFS= read -r p; do
     [[ -z "$p" ]] && continue
@@ -59,11 +49,61 @@ if [[ -s "${RW}" ]]; then
       mkdir -p "$(dirname "$p")" 2>/dev/null || true
       : > "$p" || true
     fi
-    args+=( --bind "$p" "$p" )
   done < "${RW}"
 fi
-if [[ -s "${TAIL}" ]]; then
-  args+=( $(<"${TAIL}") )
+
+if [[ -f "${ARGS}" ]]; then
+  # compiled spec (phobos.sh): mounts already ordered, tail flags appended.
+  # A hidden path that does not exist now has nothing to hide (and bwrap
+  # could not mount over it), so its --tmpfs is skipped; the walk stops at
+  # the first flag that is not a mount, where the tail flags begin.
+  mapfile -d '' -t spec_args < "${ARGS}"
+  i=0
+  while (( i < ${#spec_args[@]} )); do
+    case "${spec_args[i]}" in
+      --tmpfs) [[ -e "${spec_args[i+1]}" ]] && args+=( "${spec_args[@]:i:2}" ); i=$(( i + 2 ));;
+      --ro-bind-try|--bind) args+=( "${spec_args[@]:i:3}" ); i=$(( i + 3 ));;
+      *) break;;
+    esac
+  done
+  args+=( "${spec_args[@]:i}" )
+else
+  if [[ -s "${HIDE}" ]]; then
+    while IFS= read -r p; do [[ -z "$p" || ! -e "$p" ]] && continue; args+=( --tmpfs "$p" ); done < "${HIDE}"
+  fi
+  if [[ -s "${RO}" ]]; then
+    while IFS= read -r p; do [[ -z "$p" ]] && continue; args+=( --ro-bind-try "$p" "$p" ); done < "${RO}"
+  fi
+  if [[ -s "${RW}" ]]; then
+    while IFS= read -r p; do [[ -z "$p" ]] && continue; args+=( --bind "$p" "$p" ); done < "${RW}"
+  fi
+  if [[ -s "${TAIL}" ]]; then
+    args+=( $(<"${TAIL}") )
+  fi
+fi
+
+# Ensure the LD_PRELOAD library actually exists inside the bwrap sandbox;
+# bound last so no directory mount from the spec can shadow it.
+# PHB_NETBLOCKER_SO is set by phobos-network.sh when the lib exists.
+# Every preloaded process adds its getaddrinfo/connect counters to the
+# NETBLOCKER_STATS file (a fresh temp file unless the caller names one),
+# bound writable at the same path. It is created at its final size so the
+# library never grows it; sandboxed code can still write it, so the counts
+# are advisory and nb_stats_json rejects anything off-layout.
+TMP_FILES=()
+trap 'rm -f "${TMP_FILES[@]}"' EXIT
+NB_STATS=""
+if [[ -n "${PHB_NETBLOCKER_SO:-}" && -f "${PHB_NETBLOCKER_SO}" ]]; then
+  args+=( --ro-bind "$PHB_NETBLOCKER_SO" "$PHB_NETBLOCKER_SO" )
+  NB_STATS="${NETBLOCKER_STATS:-}"
+  if [[ -z "$NB_STATS" ]]; then
+    NB_STATS="$(mktemp -t phobos-nb.XXXXXX)"; TMP_FILES+=( "$NB_STATS" )
+  else
+    : > "$NB_STATS"
+  fi
+  truncate -s "$PHB_NB_BYTES" "$NB_STATS"
+  export NETBLOCKER_STATS="$NB_STATS"
+  args+=( --bind "$NB_STATS" "$NB_STATS" )
 fi
 
 if [[ -n "${PHOBOS_DEBUG:-}" ]]; then
@@ -74,29 +114,71 @@ if [[ -n "${PHOBOS_DEBUG:-}" ]]; then
   echo >&2
 fi
 
-OUTLOG="$(mktemp -t phobos-out.XXXXXX)"; ERRLOG="$(mktemp -t phobos-err.XXXXXX)"
-trap 'rm -f "$OUTLOG" "$ERRLOG"' EXIT
+# Denials are classified while stderr streams through deny_scan; nothing is
+# buffered on disk. PHB_STATS_FILE receives the JSON record (PHB-EDENY
+# evidence: first PHB_DENY_EVIDENCE lines per category), PHB_TRANSCRIPT a
+# copy of stdout+stderr if a caller asks for one.
+RECORD="${PHB_STATS_FILE:-}"
+if [[ -z "$RECORD" ]]; then
+  RECORD="$(mktemp -t phobos-deny.XXXXXX)"; TMP_FILES+=( "$RECORD" )
+fi
+: > "$RECORD"
+TRANSCRIPT="${PHB_TRANSCRIPT:-}"
+[[ -z "$TRANSCRIPT" ]] || : > "$TRANSCRIPT"
 
-set +e
-(
+run_sandboxed() {
   if [[ -n "${PHB_TIMEOUT_SEC:-}" ]]; then
     "${TIMEOUT_BIN}" "--kill-after=5s" "${PHB_TIMEOUT_SEC}" "${BWRAP}" "${args[@]}" -- "${CMD[@]}"
   else
     "${BWRAP}" "${args[@]}" -- "${CMD[@]}"
   fi
-) > >(tee "$OUTLOG") 2> >(tee "$ERRLOG" >&2)
+}
+
+set +e
+if [[ -n "$TRANSCRIPT" ]]; then
+  run_sandboxed > >(tee -a "$TRANSCRIPT") 2> >(deny_scan "$RECORD" "${PHB_DENY_EVIDENCE:-5}" "$TRANSCRIPT" >&2)
+else
+  run_sandboxed 2> >(deny_scan "$RECORD" "${PHB_DENY_EVIDENCE:-5}" >&2)
+fi
 rc=$?
+# $! is the stderr scanner (the last process substitution); its record is
+# complete once it has seen EOF
+wait "$!" 2>/dev/null
 set -e
 
-if [[ -n "${PHB_TIMEOUT_SEC:-}" && ( "$rc" -eq 124 || "$rc" -eq 137 ) ]]; then
+# libnetblocker counters: the exact number of denied lookups/connects, which
+# also covers denials a tool swallowed without a word on stderr
+nb=""
+[[ -z "$NB_STATS" ]] || nb="$(nb_stats_json "$NB_STATS")"
+if [[ -n "$nb" ]]; then
+  rec="$(<"$RECORD")"
+  [[ "$rec" == *\} ]] || rec='{"network":0,"filesystem":0,"evidence":{"network":[],"filesystem":[]}}'
+  printf '%s,"netblocker":%s}\n' "${rec%\}}" "$nb" > "$RECORD"
+fi
+
+if phb_timed_out "$rc"; then
   report "Timed out after ${PHB_TIMEOUT_SEC}s. (PHB-ETIMEOUT)"
   exit ${PHB_ETIMEOUT}
 fi
 
 net_denials=0; fs_denials=0
-if [[ -s "$ERRLOG" ]]; then
-  net_denials=$(grep -E -c 'EAI_AGAIN|EAI_FAIL|EAI_NONAME|Network is unreachable|Connection timed out' "$ERRLOG" || true)
-  fs_denials=$(grep -E -c 'Permission denied|EACCES|EROFS' "$ERRLOG" || true)
+if [[ "$(<"$RECORD")" =~ ^\{\"network\":([0-9]+),\"filesystem\":([0-9]+), ]]; then
+  net_denials="${BASH_REMATCH[1]}"; fs_denials="${BASH_REMATCH[2]}"
+fi
+nb_re='"getaddrinfo":\{"allowed":([0-9]+),"denied":([0-9]+),"match_ns":([0-9]+)\},"connect":\{"allowed":([0-9]+),"denied":([0-9]+),"match_ns":([0-9]+),"cache_hits":([0-9]+),"cache_misses":([0-9]+)'
+if [[ "$nb" =~ $nb_re ]]; then
+  m=("${BASH_REMATCH[@]}")
+  if (( m[1] + m[2] + m[4] + m[5] > 0 )); then
+    us=$(( (m[3] + m[6]) / 1000 ))
+    report "$(printf 'Network calls: getaddrinfo allowed=%d denied=%d, connect allowed=%d denied=%d (cache hits=%d misses=%d), rule matching %d.%03dms.' \
+      "${m[1]}" "${m[2]}" "${m[4]}" "${m[5]}" "${m[7]}" "${m[8]}" $(( us / 1000 )) $(( us % 1000 )))"
+  fi
+  # count whichever saw more: stderr lines or the library's own denials
+  if (( m[2] + m[5] > net_denials )); then
+    net_denials=$(( m[2] + m[5] ))
+    [[ "$(<"$RECORD")" =~ ^\{\"network\":[0-9]+(.*)$ ]] \
+      && printf '{"network":%d%s\n' "$net_denials" "${BASH_REMATCH[1]}" > "$RECORD"
+  fi
 fi
 if (( net_denials > 0 || fs_denials > 0 )); then
   report "Sandbox denials: network=${net_denials}, filesystem=${fs_denials}. (PHB-EDENY)"
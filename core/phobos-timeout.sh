@@ -25,4 +25,75 @@ else
   export PHB_TIMEOUT_SEC=""
 fi
 
-exec "${HERE}/phobos-network.sh" "${SPEC_DIR}" -- "${CMD[@]}"
+# Resource limits: each run gets its own cgroup v2 child of a delegated
+# cgroup (PHOBOS_CGROUP_PARENT, default: our own) with memory.max, pids.max
+# and cpu.max from the spec's [limits], and its usage is reported afterwards.
+# PHOBOS_CGROUP=auto (default) runs unconfined when no cgroup is writable,
+# =require fails instead (PHB-ERUNTIME), =off never creates one.
+cg_mode="${PHOBOS_CGROUP:-auto}"
+LIMITS="${SPEC_DIR}/limits"
+[[ -f "$LIMITS" ]] || LIMITS=/dev/null
+
+if [[ "$cg_mode" == off ]] || ! cg_create "$LIMITS"; then
+  if [[ "$cg_mode" == require ]]; then
+    report "No writable cgroup v2 for resource limits. (PHB-ERUNTIME)"
+    exit ${PHB_ERUNTIME}
+  fi
+  if [[ "$cg_mode" != off && -s "$LIMITS" ]]; then
+    _log "No writable cgroup v2; [limits] not enforced: $(tr '\n' ' ' < "$LIMITS")"
+  fi
+  exec "${HERE}/phobos-network.sh" "${SPEC_DIR}" -- "${CMD[@]}"
+fi
+trap 'cg_destroy "$CG_DIR"' EXIT
+if [[ -n "$CG_UNENFORCED" ]]; then
+  if [[ "$cg_mode" == require ]]; then
+    report "cgroup ${CG_PARENT} cannot enforce: ${CG_UNENFORCED% }. (PHB-ERUNTIME)"
+    exit ${PHB_ERUNTIME}
+  fi
+  _log "cgroup ${CG_PARENT} cannot enforce: ${CG_UNENFORCED% } (controller not delegated, or the parent has member processes)"
+fi
+export PHB_CGROUP="$CG_DIR"
+
+# The layers below run in the child cgroup; this shell stays outside to read
+# the counters and to take the whole tree down on TERM/INT.
+trap 'cg_kill "$CG_DIR"' TERM INT
+set +e
+(
+  printf '%s\n' "$BASHPID" > "${CG_DIR}/cgroup.procs" || _log "Cannot join ${CG_DIR}; running unconfined"
+  exec "${HERE}/phobos-network.sh" "${SPEC_DIR}" -- "${CMD[@]}"
+) <&0 &
+child=$!
+while :; do
+  wait "$child"; rc=$?
+  kill -0 "$child" 2>/dev/null || break
+done
+set -e
+
+cg_collect "$CG_DIR"
+cg_destroy "$CG_DIR"
+trap - EXIT
+
+mem_peak="n/a"; mem_json=null
+if [[ -n "$CG_MEM_PEAK" ]]; then
+  mem_peak="$(( (CG_MEM_PEAK + 1048575) / 1048576 ))MB"; mem_json="$CG_MEM_PEAK"
+fi
+report "$(printf 'Resources: cpu=%d.%02ds, mem_peak=%s, oom_kills=%d, pids_max=%d.' \
+  $(( CG_CPU_USEC / 1000000 )) $(( CG_CPU_USEC % 1000000 / 10000 )) "$mem_peak" "$CG_OOM_KILLS" "$CG_PIDS_MAX")"
+
+if [[ -n "${PHB_STATS_FILE:-}" ]]; then
+  limits_json="$(awk -F= '{ printf "%s\"%s\":%s", (NR > 1 ? "," : ""), $1, $2 }' "$LIMITS")"
+  res="$(printf '{"cpu_ms":%d,"mem_peak_bytes":%s,"oom_kills":%d,"pids_max":%d,"limits":{%s}}' \
+    $(( CG_CPU_USEC / 1000 )) "$mem_json" "$CG_OOM_KILLS" "$CG_PIDS_MAX" "$limits_json")"
+  rec=""
+  [[ -s "$PHB_STATS_FILE" ]] && rec="$(<"$PHB_STATS_FILE")"
+  [[ "$rec" == *\} ]] || rec='{"network":0,"filesystem":0,"evidence":{"network":[],"filesystem":[]}}'
+  printf '%s,"resources":%s}\n' "${rec%\}}" "$res" > "$PHB_STATS_FILE"
+fi
+
+# A failed run that hit memory.max or pids.max failed because of the limit
+if [[ "$rc" -ne 0 && "$rc" -ne ${PHB_ETIMEOUT} ]] && (( CG_OOM_KILLS > 0 || CG_PIDS_MAX > 0 )); then
+  (( CG_OOM_KILLS > 0 )) && hit="memory.max" || hit="pids.max"
+  report "Resource limit exceeded: ${hit}. (PHB-ELIMIT)"
+  exit ${PHB_ELIMIT}
+fi
+exit "$rc"
@@ -63,7 +63,9 @@ export PHB_ENABLE_TIMEOUT="$enable_timeout"
 export PHB_ENABLE_NETWORK="$enable_network"
 export PHB_ENABLE_FILESYSTEM="$enable_filesystem"
 
-mapfile -t base_cfgs < <(ls -1 "${HERE}"/Base*.cfg 2>/dev/null | sort || true)
+shopt -s nullglob
+base_cfgs=( "${HERE}"/Base*.cfg )
+shopt -u nullglob
 if [[ ${#base_cfgs[@]} -eq 0 ]]; then
   _log "No Base*.cfg found; running command without sandbox."
   exec "${cmd[@]}"
@@ -71,38 +73,15 @@ fi
 
 : "${TAIL_FLAGS_FILE:=${HERE}/TailPhobos.cfg}"
 INI_TMP_DIRS=""
+trap 'rm -rf $INI_TMP_DIRS' EXIT
 
-base_ro="$(mktemp)"; base_rw="$(mktemp)"; base_hide="$(mktemp)"; base_net="$(mktemp)"
-: >"$base_ro"; : >"$base_rw"; : >"$base_hide"; : >"$base_net"
-timeout_eff=""
-
-# Build base policy (FS union, NET union, TIMEOUT last-wins)
-for b in "${base_cfgs[@]}"; do
-  parse_cfg_policy "$b"
-  # FS: union only (no least-privilege checks while building base)
-  fs_union_files "$base_ro" "$base_rw" "$base_hide" \
-                 "$PARSED_RO_FILE" "$PARSED_RW_FILE" "$PARSED_HIDE_FILE"
-  # NET: union
-  tmpnet="$(mktemp)"; net_union "$tmpnet" "$base_net" "$PARSED_NET_FILE"; mv "$tmpnet" "$base_net"
-  # TIMEOUT: last base wins
-  [[ -n "${PARSED_TIMEOUT:-}" || "${PARSED_TIMEOUT:-__unset__}" == "" ]] && timeout_eff="${PARSED_TIMEOUT:-}"
-done
-
-# Effective policy (start from base, then apply exercise overrides)
-eff_ro="$(mktemp)"; eff_rw="$(mktemp)"; eff_hide="$(mktemp)"; eff_net="$(mktemp)"
-cp "$base_ro" "$eff_ro"; cp "$base_rw" "$eff_rw"; cp "$base_hide" "$eff_hide"; cp "$base_net" "$eff_net"
-
-for c in "${cfgs[@]}"; do
-  parse_cfg_policy "$c"
-  merge_fs_per_path "$base_ro" "$base_rw" "$base_hide" eff_ro eff_rw eff_hide \
-                    "$PARSED_RO_FILE" "$PARSED_RW_FILE" "$PARSED_HIDE_FILE"
-  tmpnet="$(mktemp)"; net_union "$tmpnet" "$eff_net" "$PARSED_NET_FILE"; mv "$tmpnet" "$eff_net"
-  [[ -n "${PARSED_TIMEOUT:-}" || "${PARSED_TIMEOUT:-__unset__}" == "" ]] && timeout_eff="${PARSED_TIMEOUT:-}"
-done
-
-SPEC_DIR="$(mktemp -d -t phobos-spec.XXXXXX)"
-trap 'rm -rf "$SPEC_DIR" $INI_TMP_DIRS "$base_ro" "$base_rw" "$base_hide" "$base_net" "$eff_ro" "$eff_rw" "$eff_hide" "$eff_net"' EXIT
-write_spec "$SPEC_DIR" "$eff_ro" "$eff_rw" "$eff_hide" "$eff_net" "$timeout_eff" "${TAIL_FLAGS_FILE:-}"
+# Compiled policy: the spec (incl. the final bwrap argv) for a given config
+# stack is built once and reused from PHOBOS_POLICY_CACHE, keyed by config
+# contents and the working directory. Non-existent ro/hide paths are skipped
+# at launch, not at compile time, so a cached spec stays valid as paths come
+# and go; set PHOBOS_POLICY_CACHE= to compile on every launch.
+resolve_spec "" "${TAIL_FLAGS_FILE:-}" "${base_cfgs[@]}" -- "${cfgs[@]}"
+rm -rf $INI_TMP_DIRS
 
 # Always enter through the first layer; inner scripts decide whether to apply themselves
 exec "${HERE}/phobos-timeout.sh" "$SPEC_DIR" -- "${cmd[@]}"
@@ -7,10 +7,10 @@ Refactored to consume *pre‑generated* per‑exercise artifacts (.paths/.json)
 cumulative `TailPhobos.cfg` emitted upstream by `run_minimal_fs_all.sh` +
 `emit_artifacts.py`.
 
-### Outputs (all in /var/tmp/opt/core/config)
+### Outputs (all in --core-dir, default /var/tmp/opt/core/config)
 * **BasePhobos.cfg**            – **UNION** of bindings from *all* languages →
   used when the runtime cannot tell which language is running.
-* **BaseLanguage-<lang>.cfg**   – full binding set for that language (duplicates ok).
+* **BaseLanguage-<lang>.cfg**   – full binding set for that language.
 * **BasePhobosIntersect.cfg**   – **INTERSECTION** (common bindings across all
   languages).
 * **Base<lang>Intersect.cfg**   – intersection of that language with BasePhobos
@@ -18,15 +18,36 @@ cumulative `TailPhobos.cfg` emitted upstream by `run_minimal_fs_all.sh` +
 * **TailPhobos.cfg**            – merged tail flags suitable for *runtime* use.
   (Any per‑exercise `--chdir` tokens found during pruning are stripped; a
   runtime chdir is injected via `--runtime-chdir` CLI argument.)
-
-Overlaps are fine; intersection files are for human inspection.
+* **debug/prune_report.{json,txt}** – where pruning time went (slowest
+  exercises, most expensive subtrees, attempts per resulting bind), from the
+  per-attempt events in the exercise .json files (prune_report.py).
+
+All sets are combined with pathset.PathSet (mode lattice n < r < w), so every
+file holds a minimal bind list: children that merely repeat their parent's
+mode are collapsed.  Intersection files are for human inspection.
+
+Outputs are only rewritten when their content changes.  With `--incremental`
+make_lang_sets.py keeps per-language reference counts (.<lang>_langsets.json
+in --path-dir) and folds in only the added / changed / removed exercise
+artifacts; when no language set moved, the Base*.cfg step is skipped.
+
+With `--store DB` the exercises are read from the SQLite artifact store
+(artifact_store.py, filled by `run_minimal_fs_all.sh --store`): language
+unions / intersections and the prune report come from queries instead of
+re-parsing every .paths/.json in --path-dir.
+
+With `--queue DIR` the exercises are not pruned here: they are enqueued in the
+shared work queue (prune_queue.py) and pulled by the language containers
+(`run_minimal_fs_all.sh --queue DIR <lang>`), and orchestrate.py only waits
+for the queue to drain – breaking the leases of crashed workers as it goes –
+before building the Base*.cfg files.
 """
 
 from __future__ import annotations
-import argparse, os, shlex, subprocess, sys, textwrap, time
+import argparse, json, os, shlex, subprocess, sys, textwrap, time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Set, Tuple
+from typing import Dict, Iterable, List, Sequence
 
 # ────────────────────────────────────────── CLI
 ap = argparse.ArgumentParser(
@@ -41,9 +62,27 @@ ap.add_argument('--path-dir', default='/var/tmp/path_sets',
                 help='Where <lang>_*.paths, *.json & TailPhobos.cfg live (input).')
 ap.add_argument('--helpers-dir', default='/var/tmp/helpers',
                 help='Where helper scripts (make_lang_sets.py) reside.')
+ap.add_argument('--core-dir', default='/var/tmp/opt/core/config',
+                help='Where Base*.cfg & TailPhobos.cfg are written (output).')
 ap.add_argument('--jobs', type=int, default=os.cpu_count() or 4)
 ap.add_argument('--skip-prune', action='store_true',
                 help='Skip running prune scripts; use existing artifacts in --path-dir.')
+ap.add_argument('--incremental', action='store_true',
+                help='Update language sets from changed exercise artifacts only (see make_lang_sets.py).')
+ap.add_argument('--seeded', action='store_true',
+                help='Verify each exercise against the previous <lang>_union.paths first (--prior auto).')
+ap.add_argument('--no-result-cache', action='store_true',
+                help='Re-prune every exercise even if its inputs match a cached result.')
+ap.add_argument('--store', metavar='DB',
+                help='SQLite artifact store to record into (prune) and read language sets from.')
+ap.add_argument('--queue', metavar='DIR',
+                help='Enqueue the exercises in this shared work queue and wait for the\n'
+                     'language containers (run_minimal_fs_all.sh --queue) to drain it.')
+ap.add_argument('--queue-ttl', type=float, default=None,
+                help='Seconds without a heartbeat before a worker\'s lease is broken\n'
+                     '(default: prune_queue.py\'s, $PRUNE_QUEUE_TTL).')
+ap.add_argument('--report-top', type=int, default=10,
+                help='Rows per table in debug/prune_report.txt.')
 ap.add_argument('--verbose', action='store_true')
 ap.add_argument('--runtime-chdir', default='/var/tmp/testing-dir',
                 help='Directory the *runtime* sandbox should chdir into (overrides any per‑exercise chdir seen during pruning).')
@@ -51,7 +90,7 @@ args = ap.parse_args()
 
 langs: List[str] = [l.strip() for l in args.langs.split(',') if l.strip()]
 PATH_DIR = Path(args.path_dir);            PATH_DIR.mkdir(parents=True, exist_ok=True)
-CORE_DIR = Path('/var/tmp/opt/core/config'); CORE_DIR.mkdir(parents=True, exist_ok=True)
+CORE_DIR = Path(args.core_dir);           CORE_DIR.mkdir(parents=True, exist_ok=True)
 INTERSECT_DIR = CORE_DIR / 'debug'
 INTERSECT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -59,6 +98,16 @@ HELPERS_DIR = Path(args.helpers_dir)
 PRUNE_SCRIPT = Path('/var/tmp/pruning/run_minimal_fs_all.sh')
 MAKE_LANG_SETS = HELPERS_DIR / 'make_lang_sets.py'
 
+# shared prefix-trie path sets (n < r < w) – lives next to make_lang_sets.py
+sys.path.insert(0, str(HELPERS_DIR))
+from pathset import PathSet, intersect_all, union_all, write_if_changed  # noqa: E402
+import prune_report  # noqa: E402
+
+STORE = None
+if args.store:
+    from artifact_store import ArtifactStore  # noqa: E402
+    STORE = ArtifactStore(Path(args.store))
+
 # ────────────────────────────────────────── helpers
 
 def run(cmd: Sequence[str] | str, tag: str = '') -> None:
@@ -84,6 +133,12 @@ def prune_language(lang: str) -> None:
     cmd: List[str] = [str(PRUNE_SCRIPT)]
     if args.verbose:
         cmd.append('--verbose')
+    if args.no_result_cache:
+        cmd.append('--no-result-cache')
+    if args.seeded:
+        cmd += ['--prior', 'auto']
+    if args.store:
+        cmd += ['--store', args.store]
     # NOTE: PRUNE_SCRIPT infers EX_ROOT from /var/tmp/testing-dir/<lang>.  It
     # writes per‑exercise artifacts into PATH_DIR via emit_artifacts.py.  See
     # run_minimal_fs_all.sh.
@@ -93,51 +148,59 @@ def prune_language(lang: str) -> None:
 
 # ────────────────────────────────────────── language union generation
 
-def gen_lang_sets(lang: str) -> None:
-    """Invoke make_lang_sets.py to produce <lang>_union.paths & _intersection.paths."""
+def _stamp(path: Path):
+    try:
+        st = path.stat()
+        return st.st_size, st.st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def gen_lang_sets(lang: str) -> bool:
+    """Invoke make_lang_sets.py to produce <lang>_union.paths & _intersection.paths.
+    Returns True if the union file was (re)written."""
     if not MAKE_LANG_SETS.exists():
         raise FileNotFoundError(f'make_lang_sets.py not found: {MAKE_LANG_SETS}')
+    union_file = PATH_DIR / f'{lang}_union.paths'
+    if STORE is not None:
+        u, i = STORE.lang_sets(lang)
+        if i is None:
+            print(f'\033[33m[warn]\033[0m no {lang} exercises in {args.store}; skipping langsets.')
+            return False
+        changed = write_if_changed(union_file, ''.join(f'{l}\n' for l in u.lines()))
+        write_if_changed(PATH_DIR / f'{lang}_intersection.paths', ''.join(f'{l}\n' for l in i.lines()))
+        print(f'  • {lang}: sets from the artifact store' + (' (union changed)' if changed else ''))
+        return changed
+    before = _stamp(union_file)
     # Skip languages that have no per‑exercise .paths (all exercises skipped).
     if not any(PATH_DIR.glob(f"{lang}_*.paths")):
         print(f'\033[33m[warn]\033[0m no {lang}_*.paths in {PATH_DIR}; skipping langsets.')
-        return
-    cmd = ['python3', str(MAKE_LANG_SETS), lang, str(PATH_DIR)]
+        return False
+    cmd = ['python3', str(MAKE_LANG_SETS)]
+    if args.incremental:
+        cmd.append('--incremental')
+    cmd += [lang, str(PATH_DIR)]
     run(cmd, f'langsets:{lang}')
+    return _stamp(union_file) != before
 
 
 # ────────────────────────────────────────── utilities
 
-def _read_union(path: Path) -> Tuple[Set[str], Set[str]]:
-    """Return (readonly_set, write_set) from a *_union.paths file.
-
-    Lines are expected in the form `r /abs/path` or `w /abs/path` as written by
-    make_lang_sets.py.  Blank/comment lines are ignored.
-    """
-    readonly, write = set(), set()
-    for raw in path.read_text().splitlines():
-        line = raw.strip()
-        if not line or line.startswith('#'):
-            continue
-        try:
-            mode, p = line.split(maxsplit=1)
-        except ValueError:
-            continue
-        if mode == 'w':
-            write.add(p); readonly.discard(p)
-        elif p not in write:
-            readonly.add(p)
-    return readonly, write
+def _read_union(path: Path) -> PathSet:
+    """Load a *_union.paths file (`r /abs/path` / `w /abs/path` lines as
+    written by make_lang_sets.py) into a PathSet.  Blank/comment lines are
+    ignored; a path listed as both r and w resolves to w."""
+    return PathSet.load(path)
 
 
-def collect_language_data(langs: Iterable[str]) -> Dict[str, Dict[str, Set[str]]]:
-    data: Dict[str, Dict[str, Set[str]]] = {}
+def collect_language_data(langs: Iterable[str]) -> Dict[str, PathSet]:
+    data: Dict[str, PathSet] = {}
     for lang in langs:
         union_file = PATH_DIR / f'{lang}_union.paths'
         if not union_file.exists():
             print(f'\033[33m[warn]\033[0m missing {union_file.name}')
             continue
-        r_set, w_set = _read_union(union_file)
-        data[lang] = {'r': r_set, 'w': w_set}
+        data[lang] = _read_union(union_file)
     return data
 
 
@@ -208,27 +271,82 @@ def build_runtime_tail(runtime_chdir: str) -> None:
 
     deduped += ['--chdir', runtime_chdir]
 
-    dst_tail.write_text(' '.join(deduped) + '\n')
-    print('  • wrote TailPhobos.cfg (runtime chdir set to', runtime_chdir + ')')
+    if write_if_changed(dst_tail, ' '.join(deduped) + '\n'):
+        print('  • wrote TailPhobos.cfg (runtime chdir set to', runtime_chdir + ')')
+    else:
+        print('  • TailPhobos.cfg unchanged')
 
 
 
 # ────────────────────────────────────────── main pipeline
 print('\n\033[1mOrchestrating for:\033[0m', ', '.join(langs), '\n')
 
-# 1) prune in parallel (creates per‑exercise artifacts in PATH_DIR)
-with ThreadPoolExecutor(max_workers=args.jobs) as pool:
-    fut2lang = {pool.submit(prune_language, l): l for l in langs}
-    for fut in as_completed(fut2lang):
-        lang = fut2lang[fut]
+def drain_queue(queue_dir: str) -> None:
+    """Enqueue every exercise of *langs* and block until workers drained them."""
+    from prune_queue import Queue, DEFAULT_TTL  # noqa: E402
+    ttl = args.queue_ttl or float(os.environ.get('PRUNE_QUEUE_TTL', DEFAULT_TTL))
+    q = Queue(Path(queue_dir), ttl)
+    for lang in langs:
         try:
-            fut.result()
-        except Exception as exc:
-            print(f'\033[31m{lang} prune failed:\033[0m', exc)
+            n = q.enqueue(lang, Path(args.tests_dir), PATH_DIR)
+        except FileNotFoundError as exc:
+            print(f'\033[31m{lang} enqueue failed:\033[0m', exc)
+            continue
+        print(f'  • queued {n} {lang} exercise(s) in {queue_dir}')
+    t0 = time.time()
+    q.drain(langs, poll=5.0, log=lambda m: print(f'  • {m}', flush=True))
+    print(f'\033[32m✓ queue drained ({time.time() - t0:.1f}s)\033[0m')
+    for lang in langs:
+        for job in q.failures(lang):
+            print(f'\033[31m{lang}/{job["exercise"]} prune failed:\033[0m',
+                  job.get('reason') or f'rc={job.get("rc")}', f'({job.get("owner", "?")})')
+
+
+# 1) prune in parallel (creates per‑exercise artifacts in PATH_DIR)
+if args.queue and not args.skip_prune:
+    drain_queue(args.queue)
+else:
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        fut2lang = {pool.submit(prune_language, l): l for l in langs}
+        for fut in as_completed(fut2lang):
+            lang = fut2lang[fut]
+            try:
+                fut.result()
+            except Exception as exc:
+                print(f'\033[31m{lang} prune failed:\033[0m', exc)
 
 # 2) generate per‑language union/intersection files
-for L in langs:
-    gen_lang_sets(L)
+sets_changed = [L for L in langs if gen_lang_sets(L)]
+
+def _outputs_present() -> bool:
+    files = [CORE_DIR / 'BasePhobos.cfg', INTERSECT_DIR / 'BasePhobosIntersect.cfg']
+    for L in langs:
+        if (PATH_DIR / f'{L}_union.paths').exists():
+            files += [CORE_DIR / f'BaseLanguage-{L}.cfg', INTERSECT_DIR / f'Base{L.capitalize()}Intersect.cfg']
+    return all(f.exists() for f in files)
+
+def write_prune_report() -> None:
+    """Aggregate per-attempt pruning events into debug/prune_report.*."""
+    if STORE is not None:
+        records = [r for r in (STORE.record(l, ex) for l, ex in STORE.exercises())
+                   if r['lang'] in langs and 'attempts' in r]
+    else:
+        records = prune_report.load_records(PATH_DIR, langs)
+    if not records:
+        return
+    report = prune_report.build_report(records, args.report_top)
+    write_if_changed(INTERSECT_DIR / 'prune_report.json', json.dumps(report, indent=2, sort_keys=True) + '\n')
+    write_if_changed(INTERSECT_DIR / 'prune_report.txt', prune_report.render(report))
+    print(f'  • prune report over {len(records)} exercise(s) → {INTERSECT_DIR / "prune_report.txt"}')
+    for e in report['exercises'][:3]:
+        print(f'      {e["ms"] / 1000:8.1f}s {e["attempts"]:5d} attempts  {e["lang"]}/{e["exercise"]}')
+
+if args.incremental and not sets_changed and _outputs_present():
+    print('[skip] language sets unchanged; Base*.cfg up to date')
+    build_runtime_tail(args.runtime_chdir)
+    write_prune_report()
+    print('\n\033[1mDone.\033[0m')
+    sys.exit(0)
 
 # 3) gather *_union.paths
 lang_data = collect_language_data(langs)
@@ -237,42 +355,33 @@ if not lang_data:
     sys.exit(1)
 
 # 4) BasePhobos (UNION across langs)
-read_union, write_union = set(), set()
-for info in lang_data.values():
-    write_union |= info['w']
-for info in lang_data.values():
-    read_union |= (info['r'] - write_union)
-write_cfg_path = CORE_DIR / 'BasePhobos.cfg'
-
-def _write_cfg(read_set: Set[str], write_set: Set[str], dest: Path) -> None:
+def _write_cfg(paths: PathSet, dest: Path) -> None:
+    """Write the minimal bind list of *paths* as an INI-like Phobos config."""
+    modes = paths.by_mode()
     lines: List[str] = []
-    if read_set:
-        lines += ['[readonly]', *sorted(read_set), '']
-    if write_set:
-        lines += ['[write]', *sorted(write_set), '']
-    dest.write_text('\n'.join(lines))
-
-_write_cfg(read_union, write_union, write_cfg_path)
+    if modes['r']:
+        lines += ['[readonly]', *modes['r'], '']
+    if modes['w']:
+        lines += ['[write]', *modes['w'], '']
+    if modes['n']:
+        lines += ['[hide]', *modes['n'], '']
+    if write_if_changed(dest, '\n'.join(lines)):
+        print('  • wrote', dest.name)
+
+base_union = union_all(lang_data.values())
+_write_cfg(base_union, CORE_DIR / 'BasePhobos.cfg')
 
 # 5) BasePhobosIntersect (intersection across languages)
-all_sets = [(info['r'] | info['w']) for info in lang_data.values()]
-inter_all = set.intersection(*all_sets)
-read_inter_all, write_inter_all = set(), set()
-for p in inter_all:
-    if any(p in info['w'] for info in lang_data.values()):
-        write_inter_all.add(p)
-    else:
-        read_inter_all.add(p)
-_write_cfg(read_inter_all, write_inter_all, INTERSECT_DIR / 'BasePhobosIntersect.cfg')
+_write_cfg(intersect_all(lang_data.values()), INTERSECT_DIR / 'BasePhobosIntersect.cfg')
 
 # 6) per‑language files (full & intersection)
-for L, info in lang_data.items():
-    _write_cfg(info['r'], info['w'], CORE_DIR / f'BaseLanguage-{L}.cfg')
+for L, paths in lang_data.items():
+    _write_cfg(paths, CORE_DIR / f'BaseLanguage-{L}.cfg')
     Lcap = L.capitalize()
-    lang_inter_read  = info['r'] & (read_union | write_union)
-    lang_inter_write = info['w'] & (read_union | write_union)
-    _write_cfg(lang_inter_read, lang_inter_write, INTERSECT_DIR / f'Base{Lcap}Intersect.cfg')
+    _write_cfg(paths & base_union, INTERSECT_DIR / f'Base{Lcap}Intersect.cfg')
 # 7) TailPhobos (sanitize & inject runtime chdir)
 build_runtime_tail(args.runtime_chdir)
+# 8) pruning cost report
+write_prune_report()
 
 print('\n\033[1mDone.\033[0m')
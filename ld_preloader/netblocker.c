@@ -10,6 +10,8 @@
 
 #include <strings.h>
 
+#include <ctype.h>
+
 #include <errno.h>
 
 #include <pthread.h>
@@ -24,79 +26,23 @@
 
 #include <sys/socket.h>
 
-/*=======================  Rule table  =======================*/
-
-typedef struct rule {
-  char * host; /* literal, wildcard, or "*"             */
-  struct in6_addr net6; /* v6‑mapped network base for CIDR rules  */
-  int cidr_bits; /* 0 ⇒ host/IP rule                       */
-  unsigned short port; /* 0 ⇒ any port                           */
-  struct rule * next;
-} rule_t;
+#include <fcntl.h>
 
-static rule_t * rules = NULL;
-static pthread_rwlock_t rules_lock = PTHREAD_RWLOCK_INITIALIZER;
+#include <time.h>
 
-/*=======================  <IP,port> cache  ==================*/
+#include <unistd.h>
 
-typedef struct ip_node {
-  char ip[INET6_ADDRSTRLEN];
-  unsigned short port;
-  struct ip_node * next;
-} ip_t;
-static ip_t * ip_cache = NULL;
-static size_t ip_cache_sz = 0;
-static const size_t IP_CACHE_MAX = 1024;
-static pthread_mutex_t ip_lock = PTHREAD_MUTEX_INITIALIZER;
-
-static int ip_cache_contains(const char *ip, unsigned short port)
-{
-    pthread_mutex_lock(&ip_lock);
-    for (ip_t *n = ip_cache; n; n = n->next) {
-        if (!strcasecmp(n->ip, ip) &&
-            (n->port == 0 || port == 0 || n->port == port)) {
-            pthread_mutex_unlock(&ip_lock);
-            return 1;
-        }
-    }
-    pthread_mutex_unlock(&ip_lock);
-    return 0;
-}
+#include <sys/mman.h>
 
+#include <sys/stat.h>
 
-static void ip_cache_insert(const char * ip, unsigned short port) {
-  if (ip_cache_contains(ip, port)) return;
-  ip_t * n = calloc(1, sizeof * n);
-  strncpy(n -> ip, ip, sizeof n -> ip - 1);
-  n -> port = port;
-  pthread_mutex_lock( & ip_lock);
-  n -> next = ip_cache;
-  ip_cache = n;
-  if (++ip_cache_sz > IP_CACHE_MAX) {
-    ip_t * cur = ip_cache, * prev = NULL;
-    while (cur && cur -> next) {
-      prev = cur;
-      cur = cur -> next;
-    }
-    if (prev) {
-      free(cur);
-      prev -> next = NULL;
-      ip_cache_sz--;
-    }
-  }
-  pthread_mutex_unlock( & ip_lock);
-}
-
-static void ip_cache_clear(void) {
-  pthread_mutex_lock( & ip_lock);
-  while (ip_cache) {
-    ip_t * n = ip_cache -> next;
-    free(ip_cache);
-    ip_cache = n;
-  }
-  ip_cache_sz = 0;
-  pthread_mutex_unlock( & ip_lock);
-}
+typedef int( * gai_f)(const char * ,
+  const char * ,
+    const struct addrinfo * , struct addrinfo ** );
+typedef int( * conn_f)(int,
+  const struct sockaddr * , socklen_t);
+static gai_f real_gai = NULL;
+static conn_f real_conn = NULL;
 
 /*=======================  Helpers  ==========================*/
 
@@ -120,34 +66,622 @@ static int to_canon(const char * src, char * canon, struct in6_addr * out6) {
   return -1;
 }
 
-static int cidr_match(const struct in6_addr * addr,
-  const struct in6_addr * net, int bits) {
-  if (bits <= 0 || bits > 128) return 0;
-  int full = bits / 8, rem = bits % 8;
-  if (memcmp(addr, net, full) != 0) return 0;
-  if (!rem) return 1;
-  uint8_t mask = ~((1 << (8 - rem)) - 1);
-  return ((addr -> s6_addr[full] & mask) == (net -> s6_addr[full] & mask));
+/* sockaddr -> v6-mapped canonical address (+ port); -1 for non-IP families */
+static int sa_canon(const struct sockaddr *sa, struct in6_addr *out6,
+                    unsigned short *port)
+{
+    if (sa->sa_family == AF_INET) {
+        const struct sockaddr_in *s = (const struct sockaddr_in *) sa;
+        memset(out6, 0, sizeof *out6);
+        out6->s6_addr[10] = 0xff;
+        out6->s6_addr[11] = 0xff;
+        memcpy(&out6->s6_addr[12], &s->sin_addr, 4);
+        if (port) *port = ntohs(s->sin_port);
+        return 0;
+    }
+    if (sa->sa_family == AF_INET6) {
+        const struct sockaddr_in6 *s6 = (const struct sockaddr_in6 *) sa;
+        *out6 = s6->sin6_addr;
+        if (port) *port = ntohs(s6->sin6_port);
+        return 0;
+    }
+    return -1;
+}
+
+static void mask_addr(struct in6_addr *a, int bits)
+{
+    for (int i = 0; i < 16; i++) {
+        int keep = bits - 8 * i;
+        if (keep >= 8) continue;
+        a->s6_addr[i] &= keep <= 0 ? 0 : (uint8_t) ~((1 << (8 - keep)) - 1);
+    }
 }
 
-/*=======================  Rule loading  =====================*/
+/* FNV-1a; `fold` hashes ASCII case-insensitively (host names) */
+static uint64_t fnv1a(const void *p, size_t n, int fold)
+{
+    const unsigned char *b = p;
+    uint64_t h = 1469598103934665603ULL;
+    for (size_t i = 0; i < n; i++) {
+        h ^= fold ? (unsigned char) tolower(b[i]) : b[i];
+        h *= 1099511628211ULL;
+    }
+    return h;
+}
+
+static size_t pow2_at_least(size_t n)
+{
+    size_t s = 8;
+    while (s < n) s <<= 1;
+    return s;
+}
+
+/*=======================  Telemetry  ========================*/
+/*
+ * NETBLOCKER_STATS=<file> turns on counters in a shared mmap'd file that the
+ * phobos layers add up after the run (nb_stats_json in phobos-common.sh).
+ * All words are uint64_t: a header (magic, version, slots handed out) and
+ * NB_SLOTS per-process slots, NB_WORDS each (one cache line pair, so
+ * processes never share a line). A process takes its slot with one fetch-add
+ * on its first event and again after fork; once the file is full, slot 0
+ * absorbs the rest. Counters are relaxed atomic adds: no lock on the hot
+ * path, and only a NULL check while the variable is unset.
+ */
+
+#define NB_MAGIC   0x4e425354ULL        /* "NBST" */
+#define NB_VERSION 1
+#define NB_WORDS   16
+#define NB_SLOTS   1023
+
+enum {
+    NB_PID,
+    NB_GAI_ALLOWED, NB_GAI_DENIED, NB_GAI_NS,
+    NB_CONN_ALLOWED, NB_CONN_DENIED, NB_CONN_NS,
+    NB_CACHE_HITS, NB_CACHE_MISSES
+};
+
+typedef struct nb_stats {
+    uint64_t hdr[NB_WORDS];
+    uint64_t slot[NB_SLOTS + 1][NB_WORDS];
+} nb_stats_t;
+
+static nb_stats_t *nb_stats = NULL;
+static uint64_t *nb_slot = NULL;
+
+static void nb_stats_open(void)
+{
+    const char *path = getenv("NETBLOCKER_STATS");
+    if (!path || !*path) return;
+    int fd = open(path, O_RDWR | O_CREAT | O_CLOEXEC, 0600);
+    if (fd < 0) return;
+    /* every process grows the file to the same size; extending never
+     * clobbers counters another process already wrote */
+    struct stat st;
+    if (fstat(fd, &st) != 0 ||
+        (st.st_size < (off_t) sizeof(nb_stats_t) && ftruncate(fd, sizeof(nb_stats_t)) != 0)) {
+        close(fd);
+        return;
+    }
+    void *m = mmap(NULL, sizeof(nb_stats_t), PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    close(fd);
+    if (m == MAP_FAILED) return;
+    nb_stats = m;
+    __atomic_store_n(&nb_stats->hdr[0], NB_MAGIC, __ATOMIC_RELAXED);
+    __atomic_store_n(&nb_stats->hdr[1], NB_VERSION, __ATOMIC_RELAXED);
+}
+
+static uint64_t *nb_slot_take(void)
+{
+    uint64_t i = __atomic_fetch_add(&nb_stats->hdr[2], 1, __ATOMIC_RELAXED) + 1;
+    uint64_t *s = nb_stats->slot[i <= NB_SLOTS ? i : 0];
+    if (i <= NB_SLOTS)
+        __atomic_store_n(&s[NB_PID], (uint64_t) getpid(), __ATOMIC_RELAXED);
+    nb_slot = s;
+    return s;
+}
+
+static void nb_atfork_child(void)
+{
+    nb_slot = NULL;
+}
+
+static inline void nb_add(int field, uint64_t n)
+{
+    if (!nb_stats) return;
+    uint64_t *s = nb_slot ? nb_slot : nb_slot_take();
+    __atomic_fetch_add(&s[field], n, __ATOMIC_RELAXED);
+}
+
+static inline uint64_t nb_clock(void)
+{
+    if (!nb_stats) return 0;
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (uint64_t) ts.tv_sec * 1000000000ULL + (uint64_t) ts.tv_nsec;
+}
+
+/*=======================  <IP,port> cache  ==================*/
+/*
+ * Fixed-size hash table (IPC_SHARDS * IPC_SLOTS slots) split into shards. Lookups
+ * (every connect) take no lock: each shard is a seqlock, readers retry if a
+ * writer was active. Inserts lock one shard and evict with CLOCK (second
+ * chance, an LRU approximation) inside a short probe window.
+ */
+
+#define IPC_SHARDS 16
+#define IPC_SLOTS  64           /* per shard; IP_CACHE_MAX = 1024 entries */
+#define IPC_PROBE  8
+
+typedef struct ip_slot {
+    struct in6_addr addr;
+    unsigned short port;        /* 0 => any port */
+    unsigned char used;
+    unsigned char ref;          /* CLOCK reference bit */
+} ip_slot_t;
+
+typedef struct ip_shard {
+    unsigned seq;               /* odd while a writer is active */
+    pthread_mutex_t lock;       /* writers only */
+    ip_slot_t slot[IPC_SLOTS];
+} __attribute__((aligned(64))) ip_shard_t;
+
+static ip_shard_t ip_cache[IPC_SHARDS] = {
+    [0 ... IPC_SHARDS - 1] = { .lock = PTHREAD_MUTEX_INITIALIZER }
+};
+
+/* bumped on every rule reload; inserts computed under an older rule set are dropped */
+static unsigned rules_gen = 0;
+
+static ip_shard_t *ip_shard_of(const struct in6_addr *a, unsigned *start)
+{
+    uint64_t h = fnv1a(a, sizeof *a, 0);
+    *start = (unsigned) (h >> 32) & (IPC_SLOTS - 1);
+    return &ip_cache[h & (IPC_SHARDS - 1)];
+}
+
+static int ip_slot_match(const ip_slot_t *e, const struct in6_addr *a,
+                         unsigned short port)
+{
+    return e->used && !memcmp(&e->addr, a, sizeof *a) &&
+           (e->port == 0 || port == 0 || e->port == port);
+}
+
+static int ip_cache_contains(const struct in6_addr *a, unsigned short port)
+{
+    unsigned start;
+    ip_shard_t *s = ip_shard_of(a, &start);
+    for (;;) {
+        unsigned seq = __atomic_load_n(&s->seq, __ATOMIC_ACQUIRE);
+        if (seq & 1)
+            continue;
+        ip_slot_t *hit = NULL;
+        for (unsigned i = 0; i < IPC_PROBE && !hit; i++) {
+            ip_slot_t *e = &s->slot[(start + i) & (IPC_SLOTS - 1)];
+            if (ip_slot_match(e, a, port))
+                hit = e;
+        }
+        __atomic_thread_fence(__ATOMIC_ACQUIRE);
+        if (__atomic_load_n(&s->seq, __ATOMIC_RELAXED) != seq)
+            continue;
+        if (hit && !__atomic_load_n(&hit->ref, __ATOMIC_RELAXED))
+            __atomic_store_n(&hit->ref, 1, __ATOMIC_RELAXED);
+        return hit != NULL;
+    }
+}
+
+static void ip_cache_insert(const struct in6_addr *a, unsigned short port,
+                            unsigned gen)
+{
+    unsigned start;
+    ip_shard_t *s = ip_shard_of(a, &start);
+    pthread_mutex_lock(&s->lock);
+    if (__atomic_load_n(&rules_gen, __ATOMIC_ACQUIRE) != gen) {
+        pthread_mutex_unlock(&s->lock);
+        return;
+    }
+    ip_slot_t *victim = NULL;
+    for (unsigned i = 0; i < IPC_PROBE; i++) {
+        ip_slot_t *e = &s->slot[(start + i) & (IPC_SLOTS - 1)];
+        if (e->used && !memcmp(&e->addr, a, sizeof *a) && e->port == port) {
+            pthread_mutex_unlock(&s->lock);     /* already cached */
+            return;
+        }
+        if (!e->used && !victim)
+            victim = e;
+    }
+    /* CLOCK sweep over the probe window: clear reference bits until an
+     * unreferenced slot turns up (at most two passes) */
+    for (unsigned i = 0; !victim && i < 2 * IPC_PROBE; i++) {
+        ip_slot_t *e = &s->slot[(start + i % IPC_PROBE) & (IPC_SLOTS - 1)];
+        if (__atomic_load_n(&e->ref, __ATOMIC_RELAXED))
+            __atomic_store_n(&e->ref, 0, __ATOMIC_RELAXED);
+        else
+            victim = e;
+    }
+    __atomic_store_n(&s->seq, s->seq + 1, __ATOMIC_RELAXED);
+    __atomic_thread_fence(__ATOMIC_RELEASE);
+    victim->addr = *a;
+    victim->port = port;
+    victim->used = 1;
+    victim->ref = 1;
+    __atomic_store_n(&s->seq, s->seq + 1, __ATOMIC_RELEASE);
+    pthread_mutex_unlock(&s->lock);
+}
+
+static void ip_cache_clear(void)
+{
+    for (int i = 0; i < IPC_SHARDS; i++) {
+        ip_shard_t *s = &ip_cache[i];
+        pthread_mutex_lock(&s->lock);
+        __atomic_store_n(&s->seq, s->seq + 1, __ATOMIC_RELAXED);
+        __atomic_thread_fence(__ATOMIC_RELEASE);
+        memset(s->slot, 0, sizeof s->slot);
+        __atomic_store_n(&s->seq, s->seq + 1, __ATOMIC_RELEASE);
+        pthread_mutex_unlock(&s->lock);
+    }
+}
+
+/*=======================  Rule index  =======================*/
+/*
+ * Rules are compiled at load / SIGHUP into an immutable rule set:
+ *   - exact host names and IP literals   -> hash table (case-insensitive)
+ *   - "*.suffix" wildcards               -> trie over reversed labels
+ *   - CIDR rules and IP literals         -> one hash table per prefix length
+ *   - allowlisted names                  -> resolved once, on the first
+ *                                           connect cache miss (pre_resolve)
+ *   - "*"                                -> any_host / any_ip port lists
+ * Each entry keeps the list of ports it allows (0 => any port).
+ */
+
+typedef struct port_node {
+    unsigned short port;
+    struct port_node *next;
+} port_t;
+
+typedef struct host_ent {
+    char *host;
+    port_t *ports;
+    struct host_ent *next;
+} host_ent_t;
+
+typedef struct sfx_node {
+    char *label;
+    port_t *wild;               /* non-NULL: "*.<labels up to here>" rule */
+    struct sfx_node *kids, *sib;
+} sfx_node_t;
+
+typedef struct cidr_ent {
+    struct in6_addr net;        /* masked to the table's prefix length */
+    port_t *ports;
+    struct cidr_ent *next;
+} cidr_ent_t;
+
+typedef struct cidr_tab {
+    int bits;
+    size_t nb;
+    cidr_ent_t **b;
+} cidr_tab_t;
+
+typedef struct pre_name {
+    char *name;
+    unsigned short port;
+    struct pre_name *next;
+} pre_name_t;
+
+typedef struct ruleset {
+    int any_host;               /* "*" without port: every name resolves */
+    port_t *any_ip;             /* ports of "*" rules: every address connects */
+    size_t nhost;
+    host_ent_t **host;
+    sfx_node_t sfx;
+    int ntab;                   /* longest prefix first */
+    cidr_tab_t tab[129];
+    pre_name_t *pre;            /* names whose addresses connect() allows */
+    pthread_mutex_t pre_lock;
+    int pre_done;               /* pre_tab is built (set once, release) */
+    int npre_tab;
+    cidr_tab_t pre_tab[1];      /* resolved addresses, all /128 */
+} ruleset_t;
+
+static ruleset_t * rules = NULL;
+static pthread_rwlock_t rules_lock = PTHREAD_RWLOCK_INITIALIZER;
+
+/* ports_ok: a rule port list allows `port`; `loose` also accepts port 0
+ * (name lookups without a service) */
+static int ports_ok(const port_t *p, unsigned short port, int loose)
+{
+    for (; p; p = p->next)
+        if (p->port == 0 || p->port == port || (loose && port == 0))
+            return 1;
+    return 0;
+}
+
+static void ports_add(port_t **list, unsigned short port)
+{
+    for (port_t *p = *list; p; p = p->next)
+        if (p->port == port) return;
+    port_t *p = calloc(1, sizeof *p);
+    p->port = port;
+    p->next = *list;
+    *list = p;
+}
+
+static void ports_free(port_t *p)
+{
+    while (p) {
+        port_t *n = p->next;
+        free(p);
+        p = n;
+    }
+}
+
+/* ---- exact hosts ---- */
+
+static host_ent_t *host_find(const ruleset_t *rs, const char *h)
+{
+    if (!rs->nhost) return NULL;
+    size_t i = fnv1a(h, strlen(h), 1) & (rs->nhost - 1);
+    for (host_ent_t *e = rs->host[i]; e; e = e->next)
+        if (!strcasecmp(e->host, h)) return e;
+    return NULL;
+}
+
+static void host_add(ruleset_t *rs, const char *h, unsigned short port)
+{
+    host_ent_t *e = host_find(rs, h);
+    if (!e) {
+        size_t i = fnv1a(h, strlen(h), 1) & (rs->nhost - 1);
+        e = calloc(1, sizeof *e);
+        e->host = strdup(h);
+        e->next = rs->host[i];
+        rs->host[i] = e;
+    }
+    ports_add(&e->ports, port);
+}
+
+/* ---- "*.suffix" trie ---- */
+
+static sfx_node_t *sfx_kid(sfx_node_t *n, const char *label, size_t len, int create)
+{
+    for (sfx_node_t *k = n->kids; k; k = k->sib)
+        if (strlen(k->label) == len && !strncasecmp(k->label, label, len))
+            return k;
+    if (!create) return NULL;
+    sfx_node_t *k = calloc(1, sizeof *k);
+    k->label = strndup(label, len);
+    k->sib = n->kids;
+    n->kids = k;
+    return k;
+}
 
-static void free_rules(void) {
-  while (rules) {
-    rule_t * n = rules -> next;
-    free(rules -> host);
-    free(rules);
-    rules = n;
+static void sfx_add(ruleset_t *rs, const char *suffix, unsigned short port)
+{
+    sfx_node_t *n = &rs->sfx;
+    const char *end = suffix + strlen(suffix);
+    while (end > suffix) {
+        const char *dot = memrchr(suffix, '.', end - suffix);
+        const char *lab = dot ? dot + 1 : suffix;
+        n = sfx_kid(n, lab, end - lab, 1);
+        if (!dot) break;
+        end = dot;
+    }
+    ports_add(&n->wild, port);
+}
+
+/* same result as matching h against ".suffix" from the right, one label at a time */
+static int sfx_match(const ruleset_t *rs, const char *h, unsigned short port)
+{
+    const sfx_node_t *n = &rs->sfx;
+    const char *end = h + strlen(h);
+    while (end > h) {
+        const char *dot = memrchr(h, '.', end - h);
+        const char *lab = dot ? dot + 1 : h;
+        n = sfx_kid((sfx_node_t *) n, lab, end - lab, 0);
+        if (!n || !dot) return 0;   /* h must extend past the suffix */
+        if (n->wild && ports_ok(n->wild, port, 1)) return 1;
+        end = dot;
+    }
+    return 0;
+}
+
+static void sfx_free(sfx_node_t *n)
+{
+    sfx_node_t *k = n->kids;
+    while (k) {
+        sfx_node_t *s = k->sib;
+        sfx_free(k);
+        free(k->label);
+        free(k);
+        k = s;
+    }
+    ports_free(n->wild);
+}
+
+/* ---- CIDR / address tables ---- */
+
+typedef struct raw_cidr {
+    struct in6_addr net;
+    int bits;
+    unsigned short port;
+    struct raw_cidr *next;
+} raw_cidr_t;
+
+static void raw_cidr_push(raw_cidr_t **list, const struct in6_addr *a, int bits,
+                          unsigned short port)
+{
+    raw_cidr_t *c = calloc(1, sizeof *c);
+    c->net = *a;
+    mask_addr(&c->net, bits);
+    c->bits = bits;
+    c->port = port;
+    c->next = *list;
+    *list = c;
+}
+
+/* one table per prefix length present in raw, longest first; tab must have
+ * room for every distinct length */
+static void cidr_build(cidr_tab_t *tab, int *ntab, raw_cidr_t *raw)
+{
+    size_t count[129] = { 0 };
+    for (raw_cidr_t *c = raw; c; c = c->next) count[c->bits]++;
+    for (int bits = 128; bits >= 0; bits--) {
+        if (!count[bits]) continue;
+        cidr_tab_t *t = &tab[(*ntab)++];
+        t->bits = bits;
+        t->nb = pow2_at_least(2 * count[bits]);
+        t->b = calloc(t->nb, sizeof *t->b);
+        for (raw_cidr_t *c = raw; c; c = c->next) {
+            if (c->bits != bits) continue;
+            size_t i = fnv1a(&c->net, sizeof c->net, 0) & (t->nb - 1);
+            cidr_ent_t *e = t->b[i];
+            while (e && memcmp(&e->net, &c->net, sizeof c->net)) e = e->next;
+            if (!e) {
+                e = calloc(1, sizeof *e);
+                e->net = c->net;
+                e->next = t->b[i];
+                t->b[i] = e;
+            }
+            ports_add(&e->ports, c->port);
+        }
+    }
+}
+
+static int cidr_match(const cidr_tab_t *tab, int ntab, const struct in6_addr *a,
+                      unsigned short port)
+{
+    for (int k = 0; k < ntab; k++) {
+        const cidr_tab_t *t = &tab[k];
+        struct in6_addr m = *a;
+        mask_addr(&m, t->bits);
+        size_t i = fnv1a(&m, sizeof m, 0) & (t->nb - 1);
+        for (const cidr_ent_t *e = t->b[i]; e; e = e->next)
+            if (!memcmp(&e->net, &m, sizeof m) && ports_ok(e->ports, port, 0))
+                return 1;
+    }
+    return 0;
+}
+
+static void cidr_free(cidr_tab_t *tab, int ntab)
+{
+    for (int k = 0; k < ntab; k++) {
+        for (size_t i = 0; i < tab[k].nb; i++) {
+            cidr_ent_t *e = tab[k].b[i];
+            while (e) {
+                cidr_ent_t *n = e->next;
+                ports_free(e->ports);
+                free(e);
+                e = n;
+            }
+        }
+        free(tab[k].b);
+    }
+}
+
+static void free_rules(ruleset_t *rs) {
+  if (!rs) return;
+  for (size_t i = 0; i < rs -> nhost; i++) {
+    host_ent_t * e = rs -> host[i];
+    while (e) {
+      host_ent_t * n = e -> next;
+      free(e -> host);
+      ports_free(e -> ports);
+      free(e);
+      e = n;
+    }
+  }
+  free(rs -> host);
+  sfx_free( & rs -> sfx);
+  cidr_free(rs -> tab, rs -> ntab);
+  cidr_free(rs -> pre_tab, rs -> npre_tab);
+  while (rs -> pre) {
+    pre_name_t * n = rs -> pre -> next;
+    free(rs -> pre -> name);
+    free(rs -> pre);
+    rs -> pre = n;
   }
+  pthread_mutex_destroy( & rs -> pre_lock);
+  ports_free(rs -> any_ip);
+  free(rs);
+}
+
+/*=======================  Rule loading  =====================*/
+
+/* resolve an allowlisted name for pre_resolve; NETBLOCKER_NO_PRERESOLVE=1
+ * skips this (addresses then only come from hooked getaddrinfo calls) */
+static void preresolve(raw_cidr_t **raw, const char *name, unsigned short port)
+{
+    const char *off = getenv("NETBLOCKER_NO_PRERESOLVE");
+    if (!real_gai || !*name || (off && *off && strcmp(off, "0"))) return;
+    struct addrinfo hints = { .ai_family = AF_UNSPEC, .ai_socktype = SOCK_STREAM };
+    struct addrinfo *res = NULL;
+    if (real_gai(name, NULL, &hints, &res) != 0) return;
+    for (struct addrinfo *ai = res; ai; ai = ai->ai_next) {
+        struct in6_addr a6;
+        if (sa_canon(ai->ai_addr, &a6, NULL) == 0)
+            raw_cidr_push(raw, &a6, 128, port);
+    }
+    freeaddrinfo(res);
+}
+
+static void pre_add(ruleset_t *rs, const char *name, unsigned short port)
+{
+    pre_name_t *n = calloc(1, sizeof *n);
+    n->name = strdup(name);
+    n->port = port;
+    n->next = rs->pre;
+    rs->pre = n;
+}
+
+/*
+ * Resolve the rule set's allowlisted names on its first connect cache miss,
+ * never at load: every preloaded process (each sh, java, mvn fork) runs the
+ * constructor, and none of them should wait on DNS before main. Called with
+ * rules_lock held for reading; concurrent misses wait on pre_lock and then
+ * see the addresses. SIGHUP is blocked meanwhile because its handler takes
+ * rules_lock for writing.
+ */
+static void pre_resolve(ruleset_t *rs)
+{
+    sigset_t hup, old;
+    sigemptyset(&hup);
+    sigaddset(&hup, SIGHUP);
+    pthread_sigmask(SIG_BLOCK, &hup, &old);
+    pthread_mutex_lock(&rs->pre_lock);
+    if (!rs->pre_done) {
+        raw_cidr_t *raw = NULL;
+        for (pre_name_t *n = rs->pre; n; n = n->next)
+            preresolve(&raw, n->name, n->port);
+        cidr_build(rs->pre_tab, &rs->npre_tab, raw);
+        while (raw) {
+            raw_cidr_t *n = raw->next;
+            free(raw);
+            raw = n;
+        }
+        __atomic_store_n(&rs->pre_done, 1, __ATOMIC_RELEASE);
+    }
+    pthread_mutex_unlock(&rs->pre_lock);
+    pthread_sigmask(SIG_SETMASK, &old, NULL);
 }
 
 //TODO: we should supply allow list as an argument to the binary instead of env var NETBLOCKER_CONF
-static void load_rules_inner(void) {
+static ruleset_t * load_rules_inner(void) {
   const char * cfg = getenv("NETBLOCKER_CONF");
-  if (!cfg) return;
+  if (!cfg) return NULL;
   FILE * f = fopen(cfg, "r");
-  if (!f) return;
+  if (!f) return NULL;
+
+  /* pass 1: size the host table */
   char line[512];
+  size_t nlines = 0;
+  while (fgets(line, sizeof line, f)) nlines++;
+  rewind(f);
+
+  ruleset_t * rs = calloc(1, sizeof * rs);
+  rs -> nhost = pow2_at_least(2 * nlines);
+  rs -> host = calloc(rs -> nhost, sizeof * rs -> host);
+  pthread_mutex_init( & rs -> pre_lock, NULL);
+  raw_cidr_t * raw = NULL;
+
   while (fgets(line, sizeof line, f)) {
     char * hash = strchr(line, '#');
     if (hash) * hash = '\0';
@@ -161,7 +695,6 @@ static void load_rules_inner(void) {
       if ( * end || p > 65535) continue;
       port = (unsigned short) p;
     }
-    int cidr = 0;
     struct in6_addr net6;
     char * slash = strchr(tok, '/');
     if (slash) {
@@ -169,26 +702,47 @@ static void load_rules_inner(void) {
       char * end;
       unsigned long bits = strtoul(slash + 1, & end, 10);
       if ( * end || bits == 0 || bits > 128) continue;
-      cidr = (int) bits;
       if (to_canon(tok, NULL, & net6) != 0) continue;
+      /* IPv4 prefixes apply to the low 32 bits of the v6-mapped address */
+      if (!strchr(tok, ':')) {
+        if (bits > 32) continue;
+        bits += 96;
+      }
+      raw_cidr_push( & raw, & net6, (int) bits, port);
+    } else if (!strcmp(tok, "*")) {
+      if (!port) rs -> any_host = 1;
+      ports_add( & rs -> any_ip, port);
+    } else if (tok[0] == '*' && tok[1] == '.') {
+      sfx_add(rs, tok + 2, port);
+      pre_add(rs, tok + 2, port);
+    } else {
+      host_add(rs, tok, port);
+      if (to_canon(tok, NULL, & net6) == 0) raw_cidr_push( & raw, & net6, 128, port);
+      else pre_add(rs, tok, port);
     }
-    rule_t * r = calloc(1, sizeof * r);
-    r -> host = strdup(tok);
-    r -> cidr_bits = cidr;
-    r -> port = port;
-    if (cidr) r -> net6 = net6;
-    r -> next = rules;
-    rules = r;
   }
   fclose(f);
+
+  cidr_build(rs -> tab, & rs -> ntab, raw);
+  while (raw) {
+    raw_cidr_t * n = raw -> next;
+    free(raw);
+    raw = n;
+  }
+  return rs;
 }
 
 static void reload_rules(void) {
+  /* compile outside the lock; only the swap is exclusive (no DNS here:
+   * allowlisted names are resolved lazily by pre_resolve) */
+  ruleset_t * fresh = load_rules_inner();
   pthread_rwlock_wrlock( & rules_lock);
-  free_rules();
-  load_rules_inner();
-  ip_cache_clear();
+  ruleset_t * old = rules;
+  rules = fresh;
+  __atomic_add_fetch( & rules_gen, 1, __ATOMIC_RELEASE);
   pthread_rwlock_unlock( & rules_lock);
+  ip_cache_clear();
+  free_rules(old);
 }
 static void hup_handler(int s) {
   (void) s;
@@ -197,121 +751,49 @@ static void hup_handler(int s) {
 
 /*=======================  Evaluation  =======================*/
 
-static int host_match(const char * h,
-  const rule_t * r) {
-  if (!strcasecmp(r -> host, "*")) return (r -> port == 0);
-  if (r -> host[0] == '*' && r -> host[1] == '.') {
-    size_t hl = strlen(h), sl = strlen(r -> host + 1);
-    return hl >= sl && !strcasecmp(h + hl - sl, r -> host + 1);
-  }
-  return !strcasecmp(h, r -> host);
-}
-
 static int host_allowed(const char * h, unsigned short port) {
   pthread_rwlock_rdlock( & rules_lock);
-  for (rule_t * r = rules; r; r = r -> next) {
-    if (r -> cidr_bits) continue;
-    if (port == 0 && host_match(h, r)) { pthread_rwlock_unlock(&rules_lock); return 1; }
-    if ((!r -> port || r -> port == port || port == 0) && host_match(h, r)) {
-      pthread_rwlock_unlock( & rules_lock);
-      return 1;
-    }
+  const ruleset_t * rs = rules;
+  int ok = 0;
+  if (rs) {
+    const host_ent_t * e;
+    ok = rs -> any_host ||
+      ((e = host_find(rs, h)) && ports_ok(e -> ports, port, 1)) ||
+      sfx_match(rs, h, port);
   }
   pthread_rwlock_unlock( & rules_lock);
-  return 0;
+  return ok;
 }
 
-static int ip_allowed(const char *ip, unsigned short port)
+static int ip_allowed(const struct in6_addr *a6, unsigned short port)
 {
-    if (ip_cache_contains(ip, port))
+    if (ip_cache_contains(a6, port)) {
+        nb_add(NB_CACHE_HITS, 1);
         return 1;
-
-    /* normalise caller-supplied IP into v6 canonical form */
-    struct in6_addr a6;
-    char canon_ip[INET6_ADDRSTRLEN] = "";
-    if (to_canon(ip, canon_ip, &a6) != 0)
-        return 0;
-
-    pthread_rwlock_rdlock(&rules_lock);
-
-    /* ---------- 1st pass: literal & CIDR rules ---------- */
-    for (rule_t *r = rules; r; r = r->next) {      /*  ◀─ r declared here */
-        if (r->port && r->port != port)
-            continue;
-
-        /* literal host/IP rule (cidr_bits == 0) */
-        if (!r->cidr_bits) {
-            /* accept wildcard “*” (all hosts) */
-            if (!strcasecmp(r->host, "*")) {
-                pthread_rwlock_unlock(&rules_lock);
-                return 1;
-            }
-
-            /* exact-IP rule — compare canonical forms */
-            if ((strchr(r->host, '.') || strchr(r->host, ':'))) {
-                char canon_rule[INET6_ADDRSTRLEN] = "";
-                struct in6_addr rule6;
-                if (to_canon(r->host, canon_rule, &rule6) == 0 &&
-                    memcmp(&a6, &rule6, sizeof a6) == 0) {
-                    pthread_rwlock_unlock(&rules_lock);
-                    return 1;
-                }
-            }
-            continue;   /* literal host names handled later */
-        }
-
-        /* CIDR rule */
-        if (cidr_match(&a6, &r->net6, r->cidr_bits)) {
-            pthread_rwlock_unlock(&rules_lock);
-            return 1;
-        }
     }
-
-    /* ---------- 2nd pass: wildcard host back-fill ---------- */
-    for (rule_t *r = rules; r; r = r->next) {
-        if (r->cidr_bits ||
-            r->host[0] != '*' || r->host[1] != '.' ||
-            (r->port && r->port != port))
-            continue;
-
-        /* strip leading "*." */
-        const char *suffix = r->host + 1;
-        struct addrinfo *res = NULL;
-
-        if (getaddrinfo(suffix, NULL, NULL, &res) == 0) {
-            for (struct addrinfo *ai = res; ai; ai = ai->ai_next) {
-                char buf[INET6_ADDRSTRLEN] = "";
-                getnameinfo(ai->ai_addr, ai->ai_addrlen,
-                            buf, sizeof buf, NULL, 0, NI_NUMERICHOST);
-
-                /* cache each discovered IP for speed */
-                ip_cache_insert(buf, r->port);
-
-                if (!strcasecmp(buf, canon_ip)) {
-                    freeaddrinfo(res);
-                    pthread_rwlock_unlock(&rules_lock);
-                    return 1;            /* match found */
-                }
-            }
-            freeaddrinfo(res);
-        }
-    }
-
+    /* only misses are timed: a hit never touches the rules, and two clock
+     * reads would double the cost of the hot path */
+    uint64_t t0 = nb_clock();
+    pthread_rwlock_rdlock(&rules_lock);
+    const ruleset_t *rs = rules;
+    unsigned gen = __atomic_load_n(&rules_gen, __ATOMIC_ACQUIRE);
+    if (rs && rs->pre && !__atomic_load_n(&rs->pre_done, __ATOMIC_ACQUIRE))
+        pre_resolve((ruleset_t *) rs);
+    int ok = rs && (ports_ok(rs->any_ip, port, 0) || cidr_match(rs->tab, rs->ntab, a6, port) ||
+                    cidr_match(rs->pre_tab, rs->npre_tab, a6, port));
     pthread_rwlock_unlock(&rules_lock);
-    return 0;   /* no rule matched */
+    nb_add(NB_CONN_NS, nb_clock() - t0);
+    nb_add(NB_CACHE_MISSES, 1);
+
+    /* next connect to the same <IP,port> is a lock-free cache hit */
+    if (ok)
+        ip_cache_insert(a6, port, gen);
+    return ok;
 }
 
 
 /*=======================  Hooks  ============================*/
 
-typedef int( * gai_f)(const char * ,
-  const char * ,
-    const struct addrinfo * , struct addrinfo ** );
-typedef int( * conn_f)(int,
-  const struct sockaddr * , socklen_t);
-static gai_f real_gai = NULL;
-static conn_f real_conn = NULL;
-
 int getaddrinfo(const char * node,
   const char * svc,
     const struct addrinfo * hints, struct addrinfo ** res) {
@@ -322,18 +804,21 @@ int getaddrinfo(const char * node,
     unsigned long p = strtoul(svc, & end, 10);
     if (! * end && p <= 65535) svc_port = (unsigned short) p;
   }
-  if (node && !host_allowed(node, svc_port)) return EAI_FAIL;
+  if (node) {
+    uint64_t t0 = nb_clock();
+    int ok = host_allowed(node, svc_port);
+    nb_add(NB_GAI_NS, nb_clock() - t0);
+    nb_add(ok ? NB_GAI_ALLOWED : NB_GAI_DENIED, 1);
+    if (!ok) return EAI_FAIL;
+  }
+  unsigned gen = __atomic_load_n( & rules_gen, __ATOMIC_ACQUIRE);
   int rc = real_gai(node, svc, hints, res);
-  if (rc == 0 && node && host_allowed(node, svc_port)) {
+  if (rc == 0 && node) {
     for (struct addrinfo * ai = * res; ai; ai = ai -> ai_next) {
-      char buf[INET6_ADDRSTRLEN] = "";
-      getnameinfo(ai -> ai_addr, ai -> ai_addrlen, buf, sizeof buf, NULL, 0, NI_NUMERICHOST);
-      unsigned short ptmp = svc_port;
-      if (!ptmp) {
-        if (ai -> ai_family == AF_INET) ptmp = ntohs(((struct sockaddr_in * ) ai -> ai_addr) -> sin_port);
-        else if (ai -> ai_family == AF_INET6) ptmp = ntohs(((struct sockaddr_in6 * ) ai -> ai_addr) -> sin6_port);
-      }
-      ip_cache_insert(buf, ptmp);
+      struct in6_addr a6;
+      unsigned short ptmp = 0;
+      if (sa_canon(ai -> ai_addr, & a6, & ptmp) != 0) continue;
+      ip_cache_insert( & a6, svc_port ? svc_port : ptmp, gen);
     }
   }
   return rc;
@@ -342,25 +827,20 @@ int getaddrinfo(const char * node,
 int connect(int fd,
   const struct sockaddr * sa, socklen_t len) {
   if (!real_conn) real_conn = (conn_f) dlsym(RTLD_NEXT, "connect");
-  char ip[INET6_ADDRSTRLEN] = "";
+  struct in6_addr a6;
   unsigned short port = 0;
-  if (sa -> sa_family == AF_INET) {
-    const struct sockaddr_in * s = (const struct sockaddr_in * ) sa;
-    inet_ntop(AF_INET, & s -> sin_addr, ip, sizeof ip);
-    port = ntohs(s -> sin_port);
-  } else if (sa -> sa_family == AF_INET6) {
-    const struct sockaddr_in6 * s6 = (const struct sockaddr_in6 * ) sa;
-    inet_ntop(AF_INET6, & s6 -> sin6_addr, ip, sizeof ip);
-    port = ntohs(s6 -> sin6_port);
-  }
-  if (ip_allowed(ip, port)) return real_conn(fd, sa, len);
+  int ok = sa_canon(sa, & a6, & port) == 0 && ip_allowed( & a6, port);
+  nb_add(ok ? NB_CONN_ALLOWED : NB_CONN_DENIED, 1);
+  if (ok) return real_conn(fd, sa, len);
   errno = EACCES;
   return -1;
 }
 
 __attribute__((constructor)) static void nb_init(void) {
-  reload_rules();
-  signal(SIGHUP, hup_handler);
   real_gai = (gai_f) dlsym(RTLD_NEXT, "getaddrinfo");
   real_conn = (conn_f) dlsym(RTLD_NEXT, "connect");
-}
\ No newline at end of file
+  nb_stats_open();
+  pthread_atfork(NULL, NULL, nb_atfork_child);
+  reload_rules();
+  signal(SIGHUP, hup_handler);
+}
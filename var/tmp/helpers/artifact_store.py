@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+artifact_store.py
+-----------------
+
+One SQLite file for the per-exercise artifacts that emit_artifacts.py
+otherwise writes as <lang>_<exercise>.paths / .json:
+
+  • paths      every path once (interned), with its parent, so ancestors
+               are a join away
+  • exercises  one row per (lang, exercise); everything of the .json that is
+               not a bind list (tail flags, provenance, attempts) as JSON
+  • binds      (exercise, path, source, mode) – source is dynamic / base /
+               all, i.e. paths_dynamic / paths_base / paths_all of the .json;
+               indexed by path for "who needs this path" lookups
+
+Queries use effective modes like pathset.PathSet (a path inherits the mode
+of its nearest listed ancestor, n if none):
+
+  • lang_sets  union / intersection of a language's paths_all, computed in
+               SQL; the same sets make_lang_sets.py builds from .paths files
+  • needs      which exercises get at least r (or w) on a path, and through
+               which bind
+
+CLI:
+  artifact_store.py sets   --db DB <lang> [--out-dir DIR]   print / write <lang>_{union,intersection}.paths
+  artifact_store.py needs  --db DB <path> [--lang L] [--mode r|w]
+  artifact_store.py export --db DB --out-dir DIR [--lang L]  .paths/.json for auditing
+  artifact_store.py import --db DB <exercise.json>...        e.g. result-cache hits
+
+Only SQL that SQLite 3.31 (Ubuntu 20.04) understands is used.
+"""
+
+from __future__ import annotations
+import argparse, json, pathlib, sqlite3, sys
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from pathset import RANK, PathSet, write_if_changed  # noqa: E402
+
+SCHEMA = 1
+SOURCES = {"paths_dynamic": "dynamic", "paths_base": "base", "paths_all": "all"}
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paths (
+    id     INTEGER PRIMARY KEY,
+    path   TEXT NOT NULL UNIQUE,
+    parent INTEGER REFERENCES paths(id)
+);
+CREATE TABLE IF NOT EXISTS exercises (
+    id     INTEGER PRIMARY KEY,
+    lang   TEXT NOT NULL,
+    name   TEXT NOT NULL,
+    record TEXT NOT NULL,
+    UNIQUE (lang, name)
+);
+CREATE TABLE IF NOT EXISTS binds (
+    exercise INTEGER NOT NULL REFERENCES exercises(id),
+    path     INTEGER NOT NULL REFERENCES paths(id),
+    source   TEXT NOT NULL CHECK (source IN ('dynamic', 'base', 'all')),
+    mode     TEXT NOT NULL CHECK (mode IN ('n', 'r', 'w')),
+    PRIMARY KEY (exercise, source, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS binds_by_path ON binds (path, source, mode);
+"""
+
+# effective mode of every listed path of a language in every exercise:
+# walk each node up its parent chain, keep the nearest ancestor-or-self the
+# exercise binds
+_EFFECTIVE = """
+WITH RECURSIVE
+  ex(id) AS (SELECT id FROM exercises WHERE lang = :lang),
+  node(id) AS (
+    SELECT DISTINCT b.path FROM binds b JOIN ex ON ex.id = b.exercise WHERE b.source = 'all'),
+  chain(node, anc, dist) AS (
+    SELECT id, id, 0 FROM node
+    UNION ALL
+    SELECT chain.node, paths.parent, chain.dist + 1
+      FROM chain JOIN paths ON paths.id = chain.anc
+     WHERE paths.parent IS NOT NULL),
+  hit(node, ex, dist) AS (
+    SELECT chain.node, b.exercise, MIN(chain.dist)
+      FROM chain
+      JOIN binds b ON b.path = chain.anc AND b.source = 'all'
+      JOIN ex ON ex.id = b.exercise
+     GROUP BY chain.node, b.exercise),
+  eff(node, ex, mode) AS (
+    SELECT hit.node, hit.ex, b.mode
+      FROM hit
+      JOIN chain ON chain.node = hit.node AND chain.dist = hit.dist
+      JOIN binds b ON b.exercise = hit.ex AND b.path = chain.anc AND b.source = 'all')
+SELECT paths.path,
+       COALESCE(SUM(eff.mode = 'w'), 0),
+       COALESCE(SUM(eff.mode = 'r'), 0),
+       COALESCE(SUM(eff.mode = 'n'), 0),
+       COUNT(eff.ex)
+  FROM node
+  JOIN paths ON paths.id = node.id
+  LEFT JOIN eff ON eff.node = node.id
+ GROUP BY node.id
+"""
+
+
+def _ancestors(path: str) -> List[str]:
+    """path, its parents and '/'."""
+    parts = [p for p in path.split("/") if p]
+    return ["/" + "/".join(parts[:i]) for i in range(len(parts), 0, -1)] + ["/"]
+
+
+class ArtifactStore:
+    """SQLite store of exercise records (see module docstring)."""
+
+    def __init__(self, db: pathlib.Path) -> None:
+        db = pathlib.Path(db)
+        db.parent.mkdir(parents=True, exist_ok=True)
+        # several pruning workers may emit at once; WAL + a busy timeout lets
+        # them queue instead of failing with "database is locked"
+        self.db = sqlite3.connect(str(db), timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")  # WAL: durable up to the last checkpoint
+        with self.db:
+            self.db.executescript(_DDL)
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            if row is None:
+                self.db.execute("INSERT INTO meta VALUES ('schema', ?)", (str(SCHEMA),))
+            elif row[0] != str(SCHEMA):
+                raise RuntimeError(f"{db}: artifact store schema {row[0]}, expected {SCHEMA}")
+        self._ids: Dict[str, int] = {}
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "ArtifactStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ── writing ───────────────────────────────────────────────────────────
+    def _intern(self, path: str) -> int:
+        pid = self._ids.get(path)
+        if pid is not None:
+            return pid
+        parent = None
+        if path != "/":
+            parent = self._intern(path.rsplit("/", 1)[0] or "/")
+        self.db.execute("INSERT OR IGNORE INTO paths (path, parent) VALUES (?, ?)", (path, parent))
+        pid = self.db.execute("SELECT id FROM paths WHERE path = ?", (path,)).fetchone()[0]
+        self._ids[path] = pid
+        return pid
+
+    def put(self, data: Dict) -> None:
+        """Store one exercise record (the .json emit_artifacts.py writes);
+        replaces an earlier record of the same lang/exercise."""
+        lang, ex = data["lang"], data["exercise"]
+        rest = {k: v for k, v in data.items() if k not in SOURCES and k not in ("lang", "exercise")}
+        try:
+            self._put(lang, ex, rest, data)
+        except Exception:
+            self._ids.clear()  # ids interned in the rolled-back transaction
+            raise
+
+    def _put(self, lang: str, ex: str, rest: Dict, data: Dict) -> None:
+        with self.db:
+            self.db.execute(
+                "INSERT INTO exercises (lang, name, record) VALUES (?, ?, ?) "
+                "ON CONFLICT (lang, name) DO UPDATE SET record = excluded.record",
+                (lang, ex, json.dumps(rest, sort_keys=True)))
+            eid = self.db.execute("SELECT id FROM exercises WHERE lang = ? AND name = ?", (lang, ex)).fetchone()[0]
+            self.db.execute("DELETE FROM binds WHERE exercise = ?", (eid,))
+            rows = {}
+            for key, source in SOURCES.items():
+                for e in data.get(key, []):
+                    k = (self._intern(e["path"]), source)
+                    # a path listed twice keeps the higher mode, as in PathSet
+                    if k not in rows or RANK[e["mode"]] > RANK[rows[k]]:
+                        rows[k] = e["mode"]
+            self.db.executemany("INSERT INTO binds (exercise, path, source, mode) VALUES (?, ?, ?, ?)",
+                                [(eid, pid, src, mode) for (pid, src), mode in rows.items()])
+
+    # ── reading ───────────────────────────────────────────────────────────
+    def langs(self) -> List[str]:
+        return [r[0] for r in self.db.execute("SELECT DISTINCT lang FROM exercises ORDER BY lang")]
+
+    def exercises(self, lang: Optional[str] = None) -> List[Tuple[str, str]]:
+        q = "SELECT lang, name FROM exercises"
+        args: Tuple = ()
+        if lang:
+            q, args = q + " WHERE lang = ?", (lang,)
+        return list(self.db.execute(q + " ORDER BY lang, name", args))
+
+    def record(self, lang: str, ex: str) -> Optional[Dict]:
+        """The exercise's .json record; bind lists come back in path order."""
+        row = self.db.execute("SELECT id, record FROM exercises WHERE lang = ? AND name = ?", (lang, ex)).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[1])
+        data.update(lang=lang, exercise=ex)
+        lists: Dict[str, List[Dict[str, str]]] = {key: [] for key in SOURCES}
+        by_source = {v: k for k, v in SOURCES.items()}
+        for source, mode, path in self.db.execute(
+                "SELECT b.source, b.mode, p.path FROM binds b JOIN paths p ON p.id = b.path "
+                "WHERE b.exercise = ? ORDER BY p.path", (row[0],)):
+            lists[by_source[source]].append({"mode": mode, "path": path})
+        data.update(lists)
+        return data
+
+    def lang_sets(self, lang: str) -> Tuple[PathSet, Optional[PathSet]]:
+        """(union, intersection) of the language's paths_all on effective
+        modes; intersection is None without exercises."""
+        total = self.db.execute("SELECT COUNT(*) FROM exercises WHERE lang = ?", (lang,)).fetchone()[0]
+        u, i = PathSet(), PathSet()
+        for path, n_w, n_r, n_hidden, n_bound in self.db.execute(_EFFECTIVE, {"lang": lang}):
+            u.add(path, "w" if n_w else "r" if n_r else "n")
+            # an explicit `n` is bound, but hides the path just like no bind
+            i.add(path, "n" if n_hidden or n_bound < total else "r" if n_r else "w")
+        return u, (i if total else None)
+
+    def needs(self, path: str, lang: Optional[str] = None, mode: str = "r") -> List[Tuple[str, str, str, str]]:
+        """[(lang, exercise, effective mode, granting bind)] of every exercise
+        whose paths_all grants at least `mode` on path."""
+        anc = _ancestors(path)
+        q = ("SELECT e.lang, e.name, b.mode, p.path FROM paths p "
+             "JOIN binds b ON b.path = p.id AND b.source = 'all' "
+             "JOIN exercises e ON e.id = b.exercise "
+             f"WHERE p.path IN ({','.join('?' * len(anc))})")
+        args: List[str] = list(anc)
+        if lang:
+            q += " AND e.lang = ?"
+            args.append(lang)
+        best: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        for l, ex, m, via in self.db.execute(q, args):
+            cur = best.get((l, ex))
+            if cur is None or len(via) > len(cur[1]):
+                best[(l, ex)] = (m, via)
+        return sorted((l, ex, m, via) for (l, ex), (m, via) in best.items() if RANK[m] >= RANK[mode])
+
+    # ── text files ────────────────────────────────────────────────────────
+    def export(self, out_dir: pathlib.Path, lang: Optional[str] = None) -> int:
+        """Write <lang>_<exercise>.paths/.json (unchanged files untouched)."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        n = 0
+        for l, ex in self.exercises(lang):
+            data = self.record(l, ex)
+            pairs = "".join(f"{e['mode']} {e['path']}\n" for e in data["paths_all"])
+            write_if_changed(out_dir / f"{l}_{ex}.paths", pairs or "\n")
+            write_if_changed(out_dir / f"{l}_{ex}.json", json.dumps(data, indent=2, sort_keys=True) + "\n")
+            n += 1
+        return n
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Query the SQLite artifact store.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("sets", help="union/intersection of a language")
+    s.add_argument("lang")
+    s.add_argument("--out-dir", help="write <lang>_{union,intersection}.paths here")
+    n = sub.add_parser("needs", help="exercises that get access to a path")
+    n.add_argument("path")
+    n.add_argument("--lang")
+    n.add_argument("--mode", choices=("r", "w"), default="r")
+    e = sub.add_parser("export", help="write .paths/.json per exercise")
+    e.add_argument("--out-dir", required=True)
+    e.add_argument("--lang")
+    i = sub.add_parser("import", help="load exercise .json records")
+    i.add_argument("json", nargs="+")
+    for p in (s, n, e, i):
+        p.add_argument("--db", required=True)
+    args = ap.parse_args()
+
+    with ArtifactStore(pathlib.Path(args.db)) as store:
+        if args.cmd == "sets":
+            u, i = store.lang_sets(args.lang)
+            if i is None:
+                print(f"artifact_store: no {args.lang} exercises in {args.db}", file=sys.stderr)
+                return 1
+            if args.out_dir:
+                out = pathlib.Path(args.out_dir)
+                u.write(out / f"{args.lang}_union.paths")
+                i.write(out / f"{args.lang}_intersection.paths")
+            else:
+                print("# union", *u.lines(), "# intersection", *i.lines(), sep="\n")
+        elif args.cmd == "needs":
+            for l, ex, m, via in store.needs(args.path, args.lang, args.mode):
+                print(f"{l}\t{ex}\t{m}\t{via}")
+        elif args.cmd == "export":
+            print(f"artifact_store: exported {store.export(pathlib.Path(args.out_dir), args.lang)} exercise(s)")
+        else:
+            for f in args.json:
+                store.put(json.loads(pathlib.Path(f).read_text()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
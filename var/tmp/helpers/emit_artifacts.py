@@ -15,14 +15,28 @@ Parse a `final_bindings.txt` log produced by `detect_minimal_fs.sh` and emit:
          paths_base    : list[ {mode,path} ]       # static Base binds
          paths_all     : list[ {mode,path} ]       # merged r/w (w overrides r)
          tail_flags    : list[str]                 # from 'Tail options:' line
-         provenance    : log SHA256, timestamp, schema_version
+         provenance    : log SHA256, timestamp, schema_version,
+                         cache_key (prune_cache.py key, if given)
+         attempts      : per-attempt events of detect_minimal_fs.sh
+                         (PRUNE_EVENTS JSONL, if given via --events) and
+                         their summary: count, ms, by_phase, reclassified
 
   • <out_dir>/TailPhobos.cfg
       Merges/uniquifies all tail flags across every exercise processed.
+
+  • --store DB: the same record goes into the SQLite artifact store
+      (artifact_store.py: interned paths, indexed binds); --no-text skips
+      the .paths/.json files (artifact_store.py export writes them later).
+
+Batch mode (--batch MANIFEST) does the same for many logs in one process.
+MANIFEST is JSONL, one object per exercise with the keys
+lang, exercise, config_file, workdir and optionally runtime_root, cache_key,
+events.
+TailPhobos.cfg is then merged once at the end.
 """
 
 from __future__ import annotations
-import argparse, hashlib, json, pathlib, re, subprocess, sys, time
+import argparse, fcntl, functools, hashlib, json, os, pathlib, re, sys, time
 from typing import Dict, List, Tuple
 
 # -----------------------------------------------------------------------------
@@ -31,16 +45,15 @@ from typing import Dict, List, Tuple
 RX_DETAIL = re.compile(r"^(\/[^ ]+)\s+->\s+([rwn])$")  # /path -> r|w|n
 
 
+@functools.lru_cache(maxsize=None)
 def canon(p: str) -> str:
-    """Canonicalize path (resolve symlinks, keep non-existent)"""
-    try:
-        out = subprocess.check_output(
-            ["realpath", "--canonicalize-missing", "--no-symlinks", p],
-            text=True,
-        ).strip()
-        return out or p
-    except Exception:
-        return str(pathlib.Path(p).resolve(strict=False))
+    """Canonicalize path lexically, like `realpath --canonicalize-missing
+    --no-symlinks` but without forking: absolute, '.'/'..' folded, no
+    duplicate slashes, symlinks left alone, non-existent paths kept."""
+    out = os.path.abspath(p)
+    if out.startswith("//"):  # POSIX keeps a leading '//'; realpath does not
+        out = "/" + out.lstrip("/")
+    return out
 
 
 # -----------------------------------------------------------------------------
@@ -121,6 +134,44 @@ def merge_pairs(dyn: List[Tuple[str, str]],
     return sorted(((m, p) for p, m in merged.items()), key=lambda t: t[1])
 
 
+# -----------------------------------------------------------------------------
+# Attempt events (PRUNE_EVENTS of detect_minimal_fs.sh)
+# -----------------------------------------------------------------------------
+def load_attempts(path: pathlib.Path, workdir: str, runtime_root: str) -> Dict | None:
+    """Read the pruner's JSONL attempt log; candidate paths are mapped like
+    the bind list (workdir → runtime_root). Unparsable lines are skipped."""
+    if not path.is_file():
+        return None
+    events = []
+    for raw in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        try:
+            ev = json.loads(raw)
+        except ValueError:
+            continue
+        paths = []
+        for p in ev.get("paths", []):
+            cp = canon(p)
+            if workdir and cp.startswith(workdir):
+                cp = cp.replace(workdir, runtime_root, 1)
+            paths.append(cp)
+        ev["paths"] = paths
+        events.append(ev)
+
+    by_phase: Dict[str, Dict[str, int]] = {}
+    reclassified: Dict[str, int] = {}
+    for ev in events:
+        ph = by_phase.setdefault(ev.get("phase", "?"), {"count": 0, "ms": 0})
+        ph["count"] += 1
+        ph["ms"] += int(ev.get("ms", 0))
+        if ev.get("reclassified"):
+            reclassified[ev["reclassified"]] = reclassified.get(ev["reclassified"], 0) + 1
+    return {
+        "events": events,
+        "summary": {"count": len(events), "ms": sum(int(e.get("ms", 0)) for e in events),
+                    "by_phase": by_phase, "reclassified": reclassified},
+    }
+
+
 # -----------------------------------------------------------------------------
 # Writers
 # -----------------------------------------------------------------------------
@@ -133,13 +184,14 @@ def write_paths(lang: str, ex: str,
     return dest
 
 
-def write_json(lang: str, ex: str,
-               dyn_pairs: List[Tuple[str, str]],
-               base_modes: Dict[str, str],
-               merged_pairs: List[Tuple[str, str]],
-               tail: List[str],
-               log_path: pathlib.Path,
-               out_dir: pathlib.Path) -> pathlib.Path:
+def build_record(lang: str, ex: str,
+                 dyn_pairs: List[Tuple[str, str]],
+                 base_modes: Dict[str, str],
+                 merged_pairs: List[Tuple[str, str]],
+                 tail: List[str],
+                 log_path: pathlib.Path,
+                 cache_key: str = "",
+                 attempts: Dict | None = None) -> Dict:
     data = {
         "schema_version": 1,
         "timestamp_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
@@ -152,6 +204,14 @@ def write_json(lang: str, ex: str,
         "log_sha256": hashlib.sha256(log_path.read_bytes()).hexdigest(),
         "log_filename": str(log_path),
     }
+    if cache_key:
+        data["cache_key"] = cache_key
+    if attempts is not None:
+        data["attempts"] = attempts
+    return data
+
+
+def write_json(lang: str, ex: str, data: Dict, out_dir: pathlib.Path) -> pathlib.Path:
     out_dir.mkdir(parents=True, exist_ok=True)
     dest = out_dir / f"{lang}_{ex}.json"
     dest.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
@@ -178,57 +238,170 @@ We do this so ephemeral per‑exercise workdirs never end up in TailPhobos.cfg.
 
 
 def merge_tail(flags: List[str], out_dir: pathlib.Path) -> pathlib.Path | None:
-    if not flags and not (out_dir / "TailPhobos.cfg").exists():
-        return None
+    """
+Read-modify-write TailPhobos.cfg under an exclusive lock.
+Several pruning workers may finish at the same moment; the lock serialises
+the merge and the rename makes sure readers never see a half-written file.
+"""
     dest = out_dir / "TailPhobos.cfg"
-    existing_tokens: List[str] = []
-    if dest.exists():
-        existing_tokens = dest.read_text().split()
-    new_tokens = _filter_tail(flags)
-    old_tokens = _filter_tail(existing_tokens)
-    # merge & distinct, preserve order (old first)
-    merged = []
-    seen = set()
-    for t in old_tokens + new_tokens:
-        if t not in seen:
-            seen.add(t)
-        merged.append(t)
-    dest.write_text(" ".join(merged) + "\n")
+    if not flags and not dest.exists():
+        return None
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / ".TailPhobos.cfg.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        existing_tokens: List[str] = []
+        if dest.exists():
+            existing_tokens = dest.read_text().split()
+        new_tokens = _filter_tail(flags)
+        old_tokens = _filter_tail(existing_tokens)
+        # merge & distinct, preserve order (old first)
+        merged = []
+        seen = set()
+        for t in old_tokens + new_tokens:
+            if t not in seen:
+                seen.add(t)
+                merged.append(t)
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}")
+        tmp.write_text(" ".join(merged) + "\n")
+        os.replace(tmp, dest)
     return dest
 
 
+# -----------------------------------------------------------------------------
+# One exercise
+# -----------------------------------------------------------------------------
+def emit_one(lang: str, ex: str, log_path: pathlib.Path, workdir: str,
+             runtime_root: str, out_dir: pathlib.Path,
+             cache_key: str = "",
+             events: pathlib.Path | None = None,
+             store=None, text: bool = True) -> Tuple[List[pathlib.Path], List[str]]:
+    """Write <lang>_<ex>.paths/.json (text) and/or put the record into the
+    artifact store; return the files written plus the raw tail flags."""
+    dyn_pairs, base_modes, tail_flags = parse_log(log_path, workdir, runtime_root)
+    merged_pairs = merge_pairs(dyn_pairs, base_modes)
+    attempts = load_attempts(events, workdir, runtime_root) if events else None
+    data = build_record(lang, ex, dyn_pairs, base_modes, merged_pairs,
+                        tail_flags, log_path, cache_key, attempts)
+
+    files: List[pathlib.Path] = []
+    if text:
+        files.append(write_paths(lang, ex, merged_pairs, out_dir))
+        files.append(write_json(lang, ex, data, out_dir))
+    if store is not None:
+        store.put(data)
+    return files, tail_flags
+
+
+def open_store(db: str | None):
+    """ArtifactStore for --store (imported only when asked for)."""
+    if not db:
+        return None
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+    from artifact_store import ArtifactStore
+    return ArtifactStore(pathlib.Path(db))
+
+
+def run_batch(manifest: pathlib.Path, out_dir: pathlib.Path,
+              runtime_root: str, store=None, text: bool = True) -> int:
+    all_tail: List[str] = []
+    ok = failed = 0
+    with manifest.open(encoding="utf-8") as fh:
+        for n, raw in enumerate(fh, 1):
+            if not raw.strip():
+                continue
+            try:
+                item = json.loads(raw)
+                lang, ex = item["lang"], item["exercise"]
+                log_path = pathlib.Path(item["config_file"])
+                workdir = item["workdir"]
+            except (ValueError, KeyError) as exc:
+                print(f"emit_artifacts: {manifest}:{n}: bad entry ({exc})", file=sys.stderr)
+                failed += 1
+                continue
+            if not log_path.is_file():
+                print(f"emit_artifacts: no log file {log_path} ({lang}_{ex})", file=sys.stderr)
+                failed += 1
+                continue
+            # one bad exercise must not cost the rest of the batch its artifacts
+            try:
+                _, tail = emit_one(lang, ex, log_path, workdir,
+                                   item.get("runtime_root", runtime_root), out_dir,
+                                   item.get("cache_key", ""),
+                                   pathlib.Path(item["events"]) if item.get("events") else None,
+                                   store, text)
+            except Exception as exc:
+                print(f"emit_artifacts: {lang}_{ex}: {type(exc).__name__}: {exc}", file=sys.stderr)
+                failed += 1
+                continue
+            all_tail.extend(tail)
+            ok += 1
+
+    t_file = merge_tail(all_tail, out_dir)
+    msg = f"emit_artifacts: wrote {ok} exercise(s)"
+    if store is not None:
+        msg += " (into the artifact store" + (")" if text else " only)")
+    if failed:
+        msg += f", {failed} failed"
+    if t_file:
+        msg += f", updated {t_file.name}"
+    print(msg)
+    return 1 if failed else 0
+
+
 # -----------------------------------------------------------------------------
 # CLI
 # -----------------------------------------------------------------------------
 def main() -> int:
     ap = argparse.ArgumentParser()
-    ap.add_argument("--lang", required=True)
-    ap.add_argument("--exercise", required=True)
-    ap.add_argument("--config-file", required=True,
+    ap.add_argument("--lang")
+    ap.add_argument("--exercise")
+    ap.add_argument("--config-file",
                     help="final_bindings.txt from detect_minimal_fs.sh")
     ap.add_argument("--out-dir", required=True)
-    ap.add_argument("--workdir", required=True,
+    ap.add_argument("--workdir",
                     help="Temp workdir used during pruning; will be replaced.")
     ap.add_argument("--runtime-root", default="/var/tmp/testing-dir")
+    ap.add_argument("--cache-key", default="",
+                    help="prune_cache.py key of the inputs; recorded in the .json")
+    ap.add_argument("--events",
+                    help="PRUNE_EVENTS JSONL of detect_minimal_fs.sh; recorded in the .json")
+    ap.add_argument("--store", metavar="DB",
+                    help="also put the record into this SQLite artifact store")
+    ap.add_argument("--no-text", action="store_true",
+                    help="with --store: skip the .paths/.json files")
+    ap.add_argument("--batch", metavar="MANIFEST",
+                    help="JSONL of {lang, exercise, config_file, workdir, ...}; "
+                         "replaces the single-exercise options")
     args = ap.parse_args()
 
-    log_path = pathlib.Path(args.config_file)
     out_dir = pathlib.Path(args.out_dir)
+    if args.no_text and not args.store:
+        ap.error("--no-text needs --store")
+    store = open_store(args.store)
+
+    if args.batch:
+        return run_batch(pathlib.Path(args.batch), out_dir, args.runtime_root, store, not args.no_text)
 
+    missing = [o for o in ("lang", "exercise", "config_file", "workdir") if not getattr(args, o)]
+    if missing:
+        ap.error("the following arguments are required without --batch: "
+                 + ", ".join("--" + m.replace("_", "-") for m in missing))
+
+    log_path = pathlib.Path(args.config_file)
     if not log_path.is_file():
         print(f"emit_artifacts: no log file {log_path}", file=sys.stderr)
         return 2
 
-    dyn_pairs, base_modes, tail_flags = parse_log(log_path, args.workdir, args.runtime_root)
-    merged_pairs = merge_pairs(dyn_pairs, base_modes)
-
-    p_file = write_paths(args.lang, args.exercise, merged_pairs, out_dir)
-    j_file = write_json(args.lang, args.exercise,
-                        dyn_pairs, base_modes, merged_pairs,
-                        tail_flags, log_path, out_dir)
+    files, tail_flags = emit_one(args.lang, args.exercise, log_path,
+                                 args.workdir, args.runtime_root,
+                                 out_dir, args.cache_key,
+                                 pathlib.Path(args.events) if args.events else None,
+                                 store, not args.no_text)
     t_file = merge_tail(tail_flags, out_dir)
 
-    msg = f"emit_artifacts: wrote {p_file.name}, {j_file.name}"
+    msg = f"emit_artifacts: wrote {', '.join(f.name for f in files) or 'nothing'}"
+    if store is not None:
+        msg += f", stored {args.lang}_{args.exercise} in {args.store}"
     if t_file:
         msg += f", updated {t_file.name}"
     print(msg)
@@ -1,26 +1,90 @@
 #!/usr/bin/env python3
-import sys, pathlib, functools
+import hashlib, json, sys, pathlib
 
-lang = sys.argv[1]
-P    = pathlib.Path(sys.argv[2])
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from pathset import PathCounts, PathSet, union_and_intersection, write_if_changed, write_json_if_changed  # noqa: E402
+
+args = [a for a in sys.argv[1:] if not a.startswith("--")]
+INCREMENTAL = "--incremental" in sys.argv[1:]
+if len(args) != 2:
+    sys.exit("usage: make_lang_sets.py [--incremental] <lang> <path_dir>")
+lang = args[0]
+P    = pathlib.Path(args[1])
 
 # 1) collect only the “real” run-result files; skip union/intersection outputs
-input_paths = [
+input_paths = sorted(
     p for p in P.glob(f"{lang}_*.paths")
     if not (p.name.endswith("_union.paths") or p.name.endswith("_intersection.paths"))
-]
+)
 
-if not input_paths:
-    sys.exit("no run-result .paths files found")
+if not INCREMENTAL:
+    if not input_paths:
+        sys.exit("no run-result .paths files found")
+
+    # 2) stream them through the path-set trie: union & intersection on
+    #    effective modes (n < r < w), one file in memory at a time
+    u, i = union_and_intersection(input_paths)
+
+    # 3) write out the minimal bind lists (untouched if unchanged)
+    u.write(P / f"{lang}_union.paths")
+    i.write(P / f"{lang}_intersection.paths")
+    sys.exit(0)
 
-# 2) read them into Python sets
-sets = [set(p.read_text().splitlines()) for p in input_paths]
+# --incremental: P/.<lang>_langsets.json remembers every exercise's bind list
+# and the reference counts of the current union/intersection. Only files
+# whose size/mtime moved are read (and hashed); the rest of the corpus is
+# just stat()ed.
+MANIFEST = P / f".{lang}_langsets.json"
+SCHEMA = 1
 
-# 3) union & intersection
-u = sorted(functools.reduce(set.union,     sets))
-i = sorted(functools.reduce(set.intersection, sets))
+state = {}
+if MANIFEST.is_file():
+    try:
+        state = json.loads(MANIFEST.read_text())
+    except ValueError:
+        state = {}
+if state.get("schema") != SCHEMA:
+    state = {}
+counts = PathCounts.from_json(state.get("counts", {}))
+members = state.get("exercises", {})
 
-# 4) write out
-(P / f"{lang}_union.paths").write_text("\n".join(u))
-(P / f"{lang}_intersection.paths").write_text("\n".join(i))
+present = {p.name[len(lang) + 1:-len(".paths")]: p for p in input_paths}
+added = changed = removed = 0
 
+for ex in [e for e in members if e not in present]:
+    counts.remove(PathSet.from_lines(members.pop(ex)["lines"]))
+    removed += 1
+
+for ex, path in present.items():
+    st = path.stat()
+    old = members.get(ex)
+    if old and old["stat"] == [st.st_size, st.st_mtime_ns]:
+        continue
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if old and old["sha256"] == digest:
+        old["stat"] = [st.st_size, st.st_mtime_ns]
+        continue
+    ps = PathSet.from_lines(data.decode("utf-8").splitlines())
+    if old:
+        counts.remove(PathSet.from_lines(old["lines"]))
+        changed += 1
+    else:
+        added += 1
+    counts.add(ps)
+    members[ex] = {"sha256": digest, "stat": [st.st_size, st.st_mtime_ns],
+                   "lines": [f"{m} {p}" for m, p in ps.items(include_hidden=True)]}
+
+if added or changed or removed or not all((P / f"{lang}_{n}.paths").exists() for n in ("union", "intersection")):
+    u, i = counts.union(), counts.intersection()
+    wrote = [name for name, s in (("union", u), ("intersection", i))
+             if s is not None and write_if_changed(P / f"{lang}_{name}.paths",
+                                                   "".join(f"{l}\n" for l in s.lines()))]
+else:
+    wrote = []
+write_json_if_changed(MANIFEST, {"schema": SCHEMA, "lang": lang,
+                                 "exercises": members, "counts": counts.to_json()})
+print(f"{lang}: +{added} ~{changed} -{removed} of {len(present)} exercise(s); "
+      f"rewrote: {', '.join(wrote) or 'nothing'}")
+if not present:
+    sys.exit("no run-result .paths files found")
@@ -0,0 +1,330 @@
+"""
+pathset.py
+----------
+
+Prefix-trie path sets with the access lattice  n < r < w.
+
+A PathSet stores explicit modes on directories; every other path inherits
+the mode of its nearest explicit ancestor (the root defaults to 'n'). That is
+exactly how a depth-sorted list of bwrap binds behaves, so
+
+  • union / intersection / difference work on *effective* modes
+    (max / min / "what A grants beyond B"), and
+  • items() yields the minimal bind list: an entry is emitted only where
+    the effective mode changes, so redundant children of an identically
+    moded parent disappear and a path is never listed as both r and w.
+
+Used by make_lang_sets.py (per-language union/intersection, streamed one
+.paths file at a time, or maintained incrementally through PathCounts) and
+orchestrate.py (BasePhobos*.cfg).
+"""
+
+from __future__ import annotations
+import json, os, pathlib, tempfile
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+RANK = {"n": 0, "r": 1, "w": 2}
+MODES = ("n", "r", "w")
+
+
+class _Node:
+    __slots__ = ("mode", "kids")
+
+    def __init__(self) -> None:
+        self.mode: Optional[str] = None
+        self.kids: Dict[str, "_Node"] = {}
+
+
+def _parts(path: str) -> List[str]:
+    return [p for p in path.split("/") if p and p != "."]
+
+
+def _join(a: str, b: str) -> str:
+    return a if RANK[a] >= RANK[b] else b
+
+
+def _meet(a: str, b: str) -> str:
+    return a if RANK[a] <= RANK[b] else b
+
+
+def _minus(a: str, b: str) -> str:
+    return a if RANK[a] > RANK[b] else "n"
+
+
+class PathSet:
+    """Set of (path, mode) binds with subsumption-aware algebra."""
+
+    __slots__ = ("root",)
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]] = ()) -> None:
+        self.root = _Node()
+        for mode, path in pairs:
+            self.add(path, mode)
+
+    # ── construction ──────────────────────────────────────────────────────
+    def add(self, path: str, mode: str) -> None:
+        """Set an explicit mode on path; repeated adds keep the highest."""
+        if mode not in RANK:
+            raise ValueError(f"bad mode {mode!r} for {path}")
+        node = self.root
+        for part in _parts(path):
+            node = node.kids.setdefault(part, _Node())
+        node.mode = mode if node.mode is None else _join(node.mode, mode)
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "PathSet":
+        """Parse 'r /p' / 'w /p' (and 'n /p') lines; blanks and '#' ignored."""
+        ps = cls()
+        for raw in lines:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                mode, path = line.split(maxsplit=1)
+            except ValueError:
+                continue
+            if mode in RANK and path.startswith("/"):
+                ps.add(path, mode)
+        return ps
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "PathSet":
+        with path.open(encoding="utf-8") as fh:
+            return cls.from_lines(fh)
+
+    # ── queries ───────────────────────────────────────────────────────────
+    def effective(self, path: str) -> str:
+        node, eff = self.root, self.root.mode or "n"
+        for part in _parts(path):
+            node = node.kids.get(part)
+            if node is None:
+                break
+            if node.mode is not None:
+                eff = node.mode
+        return eff
+
+    def items(self, include_hidden: bool = False) -> Iterator[Tuple[str, str]]:
+        """Minimal bind list as (mode, path), sorted by path.
+
+        'n' entries only appear below a visible parent (e.g. after
+        difference()); they are skipped unless include_hidden is set.
+        """
+        out: List[Tuple[str, str]] = []
+
+        def walk(node: _Node, path: str, inherited: str) -> None:
+            eff = inherited
+            if node.mode is not None and node.mode != inherited:
+                eff = node.mode
+                if eff != "n" or include_hidden:
+                    out.append((eff, path or "/"))
+            for name, kid in node.kids.items():
+                walk(kid, f"{path}/{name}", eff)
+
+        walk(self.root, "", "n")
+        out.sort(key=lambda t: t[1])
+        return iter(out)
+
+    def by_mode(self) -> Dict[str, List[str]]:
+        """{'r': [...], 'w': [...], 'n': [...]} of the minimal bind list."""
+        res: Dict[str, List[str]] = {m: [] for m in MODES}
+        for mode, path in self.items(include_hidden=True):
+            res[mode].append(path)
+        return res
+
+    def lines(self) -> List[str]:
+        return [f"{m} {p}" for m, p in self.items()]
+
+    def write(self, dest: pathlib.Path) -> pathlib.Path:
+        text = "\n".join(self.lines())
+        write_if_changed(dest, text + "\n" if text else "")
+        return dest
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.items())
+
+    def __bool__(self) -> bool:
+        return next(self.items(), None) is not None
+
+    # ── algebra ───────────────────────────────────────────────────────────
+    def _combine(self, other: "PathSet", op: Callable[[str, str], str]) -> "PathSet":
+        res = PathSet()
+
+        def walk(a: Optional[_Node], ea: str, b: Optional[_Node], eb: str, out: _Node) -> None:
+            if a is not None and a.mode is not None:
+                ea = a.mode
+            if b is not None and b.mode is not None:
+                eb = b.mode
+            out.mode = op(ea, eb)
+            names = set(a.kids if a else ()) | set(b.kids if b else ())
+            for name in names:
+                ka = a.kids.get(name) if a else None
+                kb = b.kids.get(name) if b else None
+                kid = out.kids[name] = _Node()
+                walk(ka, ea, kb, eb, kid)
+
+        walk(self.root, "n", other.root, "n", res.root)
+        return res
+
+    def union(self, other: "PathSet") -> "PathSet":
+        return self._combine(other, _join)
+
+    def intersection(self, other: "PathSet") -> "PathSet":
+        return self._combine(other, _meet)
+
+    def difference(self, other: "PathSet") -> "PathSet":
+        """Access granted by self beyond what other grants."""
+        return self._combine(other, _minus)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, PathSet) and list(self.items(True)) == list(other.items(True))
+
+
+# -----------------------------------------------------------------------------
+# Reference-counted union / intersection
+# -----------------------------------------------------------------------------
+def _key(parts: List[str]) -> str:
+    return "/" + "/".join(parts)
+
+
+class PathCounts:
+    """Union and intersection of many PathSets that can be updated one set at
+    a time.
+
+    Nodes are every prefix of every explicit path of any member. Per node it
+    keeps how many members have effective mode n / r / w there, plus how many
+    list the node explicitly (refs). The union mode of a node is the highest
+    mode with a non-zero count, the intersection mode the lowest, so adding or
+    removing a member only touches the counts, never the other members.
+    A node nobody lists explicitly and with no listed descendant has the
+    counts of its parent and is dropped.
+    """
+
+    __slots__ = ("members", "nodes")
+
+    def __init__(self) -> None:
+        self.members = 0
+        self.nodes: Dict[str, List[int]] = {"/": [0, 0, 0, 0]}  # n, r, w, refs
+
+    def _ancestor(self, parts: List[str]) -> List[int]:
+        for i in range(len(parts) - 1, -1, -1):
+            node = self.nodes.get(_key(parts[:i]))
+            if node is not None:
+                return node
+        return self.nodes["/"]
+
+    def _apply(self, ps: PathSet, delta: int) -> None:
+        explicit = [p for _, p in ps.items(include_hidden=True)]
+        if delta > 0:
+            # new nodes start with the counts every other member inherits there
+            for path in sorted(explicit, key=lambda p: len(_parts(p))):
+                parts = _parts(path)
+                for i in range(1, len(parts) + 1):
+                    k = _key(parts[:i])
+                    if k not in self.nodes:
+                        self.nodes[k] = self._ancestor(parts[:i])[:3] + [0]
+        for k, node in self.nodes.items():
+            node[RANK[ps.effective(k)]] += delta
+        for path in explicit:
+            self.nodes[_key(_parts(path))][3] += delta
+        self.members += delta
+        if delta < 0:
+            self._gc()
+
+    def _gc(self) -> None:
+        keep = {"/"}
+        for k, node in self.nodes.items():
+            if node[3] > 0:
+                parts = _parts(k)
+                keep.update(_key(parts[:i]) for i in range(1, len(parts) + 1))
+        for k in [k for k in self.nodes if k not in keep]:
+            del self.nodes[k]
+
+    def add(self, ps: PathSet) -> None:
+        self._apply(ps, 1)
+
+    def remove(self, ps: PathSet) -> None:
+        """ps must be exactly a set that was added before."""
+        self._apply(ps, -1)
+
+    def _select(self, pick: Callable[[List[int]], str]) -> PathSet:
+        res = PathSet()
+        if self.members:
+            for k, node in self.nodes.items():
+                res.add(k, pick(node))
+        return res
+
+    def union(self) -> PathSet:
+        return self._select(lambda c: "w" if c[2] else "r" if c[1] else "n")
+
+    def intersection(self) -> Optional[PathSet]:
+        if not self.members:
+            return None
+        return self._select(lambda c: "n" if c[0] else "r" if c[1] else "w")
+
+    def to_json(self) -> Dict:
+        return {"members": self.members, "nodes": self.nodes}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "PathCounts":
+        pc = cls()
+        pc.members = int(data.get("members", 0))
+        pc.nodes.update({k: list(v) for k, v in data.get("nodes", {}).items()})
+        return pc
+
+
+# -----------------------------------------------------------------------------
+# Output
+# -----------------------------------------------------------------------------
+def write_if_changed(dest: pathlib.Path, text: str) -> bool:
+    """Replace dest atomically, but only if its content differs.
+
+    Untouched outputs keep their mtime, so downstream policy caches and
+    images keyed on them stay valid. Returns True if dest was written.
+    """
+    try:
+        if dest.read_text() == text:
+            return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+    mode = dest.stat().st_mode & 0o777 if dest.exists() else 0o644
+    fd, tmp = tempfile.mkstemp(prefix=f".{dest.name}.", dir=dest.parent)
+    with os.fdopen(fd, "w") as fh:
+        fh.write(text)
+    os.chmod(tmp, mode)
+    os.replace(tmp, dest)
+    return True
+
+
+def write_json_if_changed(dest: pathlib.Path, data: Dict) -> bool:
+    return write_if_changed(dest, json.dumps(data, indent=1, sort_keys=True) + "\n")
+
+
+# -----------------------------------------------------------------------------
+# Streaming helpers
+# -----------------------------------------------------------------------------
+def union_all(sets: Iterable[PathSet]) -> PathSet:
+    acc = PathSet()
+    for s in sets:
+        acc = acc | s
+    return acc
+
+
+def intersect_all(sets: Iterable[PathSet]) -> Optional[PathSet]:
+    acc: Optional[PathSet] = None
+    for s in sets:
+        acc = s if acc is None else acc & s
+    return acc
+
+
+def union_and_intersection(files: Iterable[pathlib.Path]) -> Tuple[PathSet, Optional[PathSet]]:
+    """One pass over the files; only the accumulators and one input are live."""
+    u, i = PathSet(), None
+    for f in files:
+        s = PathSet.load(f)
+        u = u | s
+        i = s if i is None else i & s
+    return u, i
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+prune_cache.py
+--------------
+
+Content-addressed cache for per-exercise pruning results, so an exercise
+whose inputs did not change is never pruned again.
+
+  • key    – print the cache key of one exercise. The key is the SHA256 of a
+             manifest covering
+               - every file (path, mode, content / symlink target) of the
+                 exercise tree, build script included
+               - a toolchain fingerprint file (JDK/Python/gcc versions,
+                 /usr/lib listing – produced by run_minimal_fs_all.sh)
+               - the pruner options (--option k=v, repeatable)
+               - the pruner and emitter scripts themselves (--script, repeatable)
+
+  • fetch  – on a hit, copy <cache>/<key>/entry.{paths,json} to
+             <out_dir>/<lang>_<exercise>.{paths,json} and merge the stored
+             tail flags into <out_dir>/TailPhobos.cfg. Exit 1 on a miss.
+
+  • store  – copy freshly emitted artifacts into <cache>/<key>/. With
+             --batch, store every entry of an emit_artifacts.py batch
+             manifest that carries a cache_key (and key_manifest) whose
+             .json in <out_dir> records that same key.
+
+  • fresh  – exit 0 if <out_dir>/<lang>_<exercise>.json was emitted for
+             --key, 1 if it is missing or left over from another run.
+
+emit_artifacts.py records the same key as `cache_key` in the .json.
+"""
+
+from __future__ import annotations
+import argparse, hashlib, json, os, pathlib, shutil, stat, sys, tempfile
+from typing import Dict, List
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from emit_artifacts import merge_tail  # noqa: E402
+
+SCHEMA = 1
+
+
+# -----------------------------------------------------------------------------
+# Key computation
+# -----------------------------------------------------------------------------
+def _sha256_file(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def tree_digest(root: pathlib.Path) -> str:
+    """Hash relative path, type, exec bit and content of everything below root."""
+    h = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        base = pathlib.Path(dirpath)
+        for name in sorted(filenames + [d for d in dirnames if (base / d).is_symlink()]):
+            p = base / name
+            rel = p.relative_to(root).as_posix()
+            st = p.lstat()
+            if stat.S_ISLNK(st.st_mode):
+                entry = f"l {rel} {os.readlink(p)}"
+            elif stat.S_ISREG(st.st_mode):
+                entry = f"f {rel} {st.st_mode & 0o111:o} {_sha256_file(p)}"
+            else:
+                continue
+            h.update(entry.encode() + b"\n")
+    return h.hexdigest()
+
+
+def compute_key(lang: str, ex_dir: pathlib.Path, toolchain: pathlib.Path | None,
+                options: List[str], scripts: List[str]) -> tuple[str, Dict]:
+    manifest = {
+        "schema": SCHEMA,
+        "lang": lang,
+        "exercise_tree": tree_digest(ex_dir),
+        "toolchain": _sha256_file(toolchain) if toolchain else "",
+        "options": sorted(options),
+        "scripts": {pathlib.Path(s).name: _sha256_file(pathlib.Path(s)) for s in scripts},
+    }
+    blob = json.dumps(manifest, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest(), manifest
+
+
+# -----------------------------------------------------------------------------
+# Store / fetch
+# -----------------------------------------------------------------------------
+def fetch(cache: pathlib.Path, key: str, lang: str, ex: str,
+          out_dir: pathlib.Path) -> bool:
+    entry = cache / key
+    src_paths, src_json = entry / "entry.paths", entry / "entry.json"
+    if not (src_paths.is_file() and src_json.is_file()):
+        return False
+    data = json.loads(src_json.read_text())
+    # artifacts are keyed by content, not name: re-label for this exercise
+    data["lang"], data["exercise"] = lang, ex
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(src_paths, out_dir / f"{lang}_{ex}.paths")
+    (out_dir / f"{lang}_{ex}.json").write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+    merge_tail(data.get("tail_flags", []), out_dir)
+    return True
+
+
+def store(cache: pathlib.Path, key: str, lang: str, ex: str,
+          out_dir: pathlib.Path, manifest: Dict | None = None) -> pathlib.Path:
+    src_paths = out_dir / f"{lang}_{ex}.paths"
+    src_json = out_dir / f"{lang}_{ex}.json"
+    cache.mkdir(parents=True, exist_ok=True)
+    # build in a private dir, then rename: concurrent workers never see a
+    # half-written entry, and the first writer wins
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix=f".{key}.", dir=cache))
+    shutil.copyfile(src_paths, tmp / "entry.paths")
+    shutil.copyfile(src_json, tmp / "entry.json")
+    if manifest is not None:
+        (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    dest = cache / key
+    try:
+        os.rename(tmp, dest)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return dest
+
+
+def fresh_artifacts(out_dir: pathlib.Path, lang: str, ex: str, key: str) -> bool:
+    """True if <out_dir>/<lang>_<ex>.json was emitted for *key* – not left
+    over from an earlier run whose emit this one skipped or crashed in."""
+    try:
+        return json.loads((out_dir / f"{lang}_{ex}.json").read_text()).get("cache_key") == key
+    except (OSError, ValueError):
+        return False
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    k = sub.add_parser("key", help="print the cache key for an exercise")
+    k.add_argument("--lang", required=True)
+    k.add_argument("--exercise-dir", required=True)
+    k.add_argument("--toolchain-file")
+    k.add_argument("--option", action="append", default=[], help="k=v pruner option")
+    k.add_argument("--script", action="append", default=[], help="script whose content is part of the key")
+    k.add_argument("--manifest-out", help="also write the key manifest here")
+
+    for name in ("fetch", "store"):
+        c = sub.add_parser(name)
+        c.add_argument("--cache-dir", required=True)
+        c.add_argument("--key", required=(name == "fetch"))
+        c.add_argument("--lang", required=(name == "fetch"))
+        c.add_argument("--exercise", required=(name == "fetch"))
+        c.add_argument("--out-dir", required=True)
+        if name == "store":
+            c.add_argument("--manifest", help="manifest written by `key --manifest-out`")
+            c.add_argument("--batch", metavar="MANIFEST",
+                           help="emit_artifacts.py batch manifest; replaces --key/--lang/--exercise")
+
+    f = sub.add_parser("fresh", help="did the last emit write this exercise for --key?")
+    f.add_argument("--out-dir", required=True)
+    f.add_argument("--key", required=True)
+    f.add_argument("--lang", required=True)
+    f.add_argument("--exercise", required=True)
+
+    args = ap.parse_args()
+
+    if args.cmd == "fresh":
+        return 0 if fresh_artifacts(pathlib.Path(args.out_dir), args.lang, args.exercise, args.key) else 1
+
+    if args.cmd == "key":
+        ex_dir = pathlib.Path(args.exercise_dir)
+        if not ex_dir.is_dir():
+            print(f"prune_cache: no exercise dir {ex_dir}", file=sys.stderr)
+            return 2
+        toolchain = pathlib.Path(args.toolchain_file) if args.toolchain_file else None
+        key, manifest = compute_key(args.lang, ex_dir, toolchain, args.option, args.script)
+        if args.manifest_out:
+            pathlib.Path(args.manifest_out).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+        print(key)
+        return 0
+
+    cache, out_dir = pathlib.Path(args.cache_dir), pathlib.Path(args.out_dir)
+    if args.cmd == "fetch":
+        return 0 if fetch(cache, args.key, args.lang, args.exercise, out_dir) else 1
+
+    if args.batch:
+        stored = 0
+        for raw in pathlib.Path(args.batch).read_text().splitlines():
+            if not raw.strip():
+                continue
+            item = json.loads(raw)
+            key = item.get("cache_key")
+            if not key or not fresh_artifacts(out_dir, item["lang"], item["exercise"], key):
+                continue
+            km = item.get("key_manifest")
+            manifest = json.loads(pathlib.Path(km).read_text()) if km and pathlib.Path(km).is_file() else None
+            store(cache, key, item["lang"], item["exercise"], out_dir, manifest)
+            stored += 1
+        print(f"prune_cache: stored {stored} entr{'y' if stored == 1 else 'ies'}")
+        return 0
+
+    if not (args.key and args.lang and args.exercise):
+        ap.error("store needs --key, --lang and --exercise (or --batch)")
+    manifest = json.loads(pathlib.Path(args.manifest).read_text()) if args.manifest else None
+    dest = store(cache, args.key, args.lang, args.exercise, out_dir, manifest)
+    print(f"prune_cache: stored {dest.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+prune_queue.py
+--------------
+
+File-based work queue of exercises to prune, shared by every prune container
+through the common /var/tmp mount.  Instead of each container pruning a fixed
+list, any container whose toolchain can build a language keeps pulling that
+language's next pending exercise until none is left, and work held by a
+crashed container is handed to the others.
+
+Layout below the queue directory (default /var/tmp/prune_queue):
+
+  pending/<lang>/<exercise>.json  the job: exercise dir, cost hint, attempts
+  leases/<lang>/<exercise>/       held while a worker prunes the exercise;
+                                  created with mkdir (the lock), `owner` names
+                                  the holder and its mtime is the heartbeat
+  done/<lang>/<exercise>.json     the job plus rc, owner and wall time
+  failed/<lang>/<exercise>.json   the same for rc != 0 or too many lost leases
+
+  • enqueue – add every exercise below <tests-dir>/<lang> as pending and drop
+              its done/failed record from an earlier run.  With --path-dir the
+              previous run's attempt time is kept as a cost hint, and claims
+              hand out the most expensive exercises first.
+  • claim   – lease the next pending job of a language and print
+              `<exercise>\\t<exercise_dir>`.  With --wait, keep polling while
+              other workers still hold leases of that language (one of them
+              may die); exit 1 once nothing is pending or leased.
+  • hold    – refresh a lease's heartbeat every --every seconds until killed,
+              the lease is lost or the worker given by --pid is gone.
+  • finish  – record the exercise under done/ or failed/ and drop the job.
+  • wait    – block until no job of the given languages is pending or leased,
+              then list failures (exit 1 if any).
+  • status  – print pending / leased / done / failed counts per language.
+
+A lease whose heartbeat did not move for --ttl seconds, as observed by a
+polling `claim --wait` or `wait`, is broken: the job is pending again with
+attempts + 1, or failed after --max-attempts.  Staleness is judged on the
+poller's own clock, so workers on different hosts need not agree on time.
+A worker that lost its lease but finishes anyway still records its result;
+artifacts are per exercise, so a second prune of the same job is harmless.
+"""
+
+from __future__ import annotations
+import argparse, json, os, pathlib, shutil, socket, sys, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_QUEUE = "/var/tmp/prune_queue"
+DEFAULT_TTL = 300
+DEFAULT_MAX_ATTEMPTS = 3
+STATES = ("pending", "leases", "done", "failed")
+
+
+# -----------------------------------------------------------------------------
+# Small file helpers
+# -----------------------------------------------------------------------------
+def _write_json(path: pathlib.Path, data: dict) -> None:
+    """Atomically replace *path* (tmp + rename in the same directory)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, sort_keys=True) + "\n")
+    os.replace(tmp, path)
+
+
+def _read_json(path: pathlib.Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Queue:
+    def __init__(self, root: pathlib.Path, ttl: float = DEFAULT_TTL,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.root = root
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        # lease dir -> (heartbeat mtime last seen, local time it was first seen)
+        self._seen: Dict[pathlib.Path, Tuple[float, float]] = {}
+
+    def _dir(self, state: str, lang: str) -> pathlib.Path:
+        return self.root / state / lang
+
+    def _job(self, lang: str, ex: str) -> pathlib.Path:
+        return self._dir("pending", lang) / f"{ex}.json"
+
+    def _lease(self, lang: str, ex: str) -> pathlib.Path:
+        return self._dir("leases", lang) / ex
+
+    def langs(self) -> List[str]:
+        found = set()
+        for state in STATES:
+            d = self.root / state
+            if d.is_dir():
+                found.update(p.name for p in d.iterdir() if p.is_dir())
+        return sorted(found)
+
+    # -------------------------------------------------------------------------
+    # Producer
+    # -------------------------------------------------------------------------
+    def enqueue(self, lang: str, tests_dir: pathlib.Path,
+                path_dir: Optional[pathlib.Path] = None) -> int:
+        ex_root = tests_dir / lang
+        if not ex_root.is_dir():
+            raise FileNotFoundError(f"language folder not found: {ex_root}")
+        added = 0
+        for ex_dir in sorted(p for p in ex_root.iterdir() if p.is_dir()):
+            ex = ex_dir.name
+            for state in ("done", "failed"):
+                (self._dir(state, lang) / f"{ex}.json").unlink(missing_ok=True)
+            job = self._job(lang, ex)
+            if job.exists():
+                continue                      # still pending or being pruned
+            cost = 0
+            if path_dir is not None:
+                prev = _read_json(path_dir / f"{lang}_{ex}.json") or {}
+                cost = int(prev.get("attempts", {}).get("summary", {}).get("ms", 0))
+            _write_json(job, {"lang": lang, "exercise": ex, "exercise_dir": str(ex_dir.resolve()),
+                              "cost_ms": cost, "attempts": 0, "enqueued": time.time()})
+            added += 1
+        return added
+
+    # -------------------------------------------------------------------------
+    # Leases
+    # -------------------------------------------------------------------------
+    def _pending(self, lang: str) -> List[dict]:
+        jobs = []
+        d = self._dir("pending", lang)
+        if d.is_dir():
+            for p in d.glob("*.json"):
+                job = _read_json(p)
+                if job is not None:
+                    jobs.append(job)
+        jobs.sort(key=lambda j: (-j.get("cost_ms", 0), j.get("enqueued", 0), j["exercise"]))
+        return jobs
+
+    def _leases(self, lang: str) -> List[pathlib.Path]:
+        d = self._dir("leases", lang)
+        return sorted(p for p in d.iterdir() if p.is_dir() and not p.name.startswith(".")) if d.is_dir() else []
+
+    def claim(self, lang: str, owner: str) -> Optional[dict]:
+        """Lease the next pending job of *lang* or return None."""
+        self._dir("leases", lang).mkdir(parents=True, exist_ok=True)
+        for job in self._pending(lang):
+            lease = self._lease(lang, job["exercise"])
+            try:
+                lease.mkdir()
+            except FileExistsError:
+                continue                      # someone else holds it
+            if not self._job(lang, job["exercise"]).exists():
+                shutil.rmtree(lease, ignore_errors=True)   # finished in the meantime
+                continue
+            _write_json(lease / "owner", {"owner": owner, "since": time.time()})
+            return job
+        return None
+
+    def owns(self, lang: str, ex: str, owner: str) -> bool:
+        return (_read_json(self._lease(lang, ex) / "owner") or {}).get("owner") == owner
+
+    def heartbeat(self, lang: str, ex: str, owner: str) -> bool:
+        if not self.owns(lang, ex, owner):
+            return False
+        try:
+            os.utime(self._lease(lang, ex) / "owner")
+        except FileNotFoundError:
+            return False
+        return True
+
+    def finish(self, lang: str, ex: str, owner: str, rc: int, seconds: float = 0.0) -> str:
+        job = _read_json(self._job(lang, ex)) or {"lang": lang, "exercise": ex}
+        state = "done" if rc == 0 else "failed"
+        _write_json(self._dir(state, lang) / f"{ex}.json",
+                    dict(job, rc=rc, owner=owner, seconds=round(seconds, 1), finished=time.time()))
+        self._job(lang, ex).unlink(missing_ok=True)
+        if self.owns(lang, ex, owner):
+            shutil.rmtree(self._lease(lang, ex), ignore_errors=True)
+        return state
+
+    def reclaim(self, lang: str) -> List[str]:
+        """Break leases whose heartbeat has not moved for ttl seconds."""
+        now, broken = time.monotonic(), []
+        for lease in self._leases(lang):
+            hb = lease / "owner"
+            try:
+                mtime = hb.stat().st_mtime
+            except FileNotFoundError:
+                mtime = -1.0                  # mkdir'ed, owner not written yet
+            seen = self._seen.get(lease)
+            if seen is None or seen[0] != mtime:
+                self._seen[lease] = (mtime, now)
+                continue
+            if now - seen[1] < self.ttl:
+                continue
+            # rename is the tie-breaker between pollers breaking the same lease
+            grave = lease.with_name(f".{lease.name}.stale.{os.getpid()}")
+            try:
+                os.rename(lease, grave)
+            except OSError:
+                continue
+            self._seen.pop(lease, None)
+            owner = (_read_json(grave / "owner") or {}).get("owner", "?")
+            shutil.rmtree(grave, ignore_errors=True)
+            job_file = self._job(lang, lease.name)
+            job = _read_json(job_file)
+            if job is None:
+                continue
+            job["attempts"] = job.get("attempts", 0) + 1
+            if job["attempts"] >= self.max_attempts:
+                _write_json(self._dir("failed", lang) / f"{lease.name}.json",
+                            dict(job, rc=None, owner=owner, finished=time.time(),
+                                 reason=f"lease lost {job['attempts']} times"))
+                job_file.unlink(missing_ok=True)
+            else:
+                _write_json(job_file, job)
+            broken.append(f"{lang}/{lease.name} ({owner})")
+        return broken
+
+    def counts(self, lang: str) -> Dict[str, int]:
+        return {"pending": len(self._pending(lang)) - len(self._leases(lang)),
+                "leased": len(self._leases(lang)),
+                "done": len(list(self._dir("done", lang).glob("*.json"))),
+                "failed": len(list(self._dir("failed", lang).glob("*.json")))}
+
+    def failures(self, lang: str) -> List[dict]:
+        return [j for j in (_read_json(p) for p in sorted(self._dir("failed", lang).glob("*.json"))) if j]
+
+    # -------------------------------------------------------------------------
+    # Pollers
+    # -------------------------------------------------------------------------
+    def claim_wait(self, lang: str, owner: str, poll: float) -> Optional[dict]:
+        while True:
+            job = self.claim(lang, owner)
+            if job is not None:
+                return job
+            if not self._leases(lang):
+                return None
+            for b in self.reclaim(lang):
+                print(f"prune_queue: broke expired lease {b}", file=sys.stderr)
+            time.sleep(poll)
+
+    def drain(self, langs: Iterable[str], poll: float, log=print) -> Dict[str, Dict[str, int]]:
+        """Block until nothing of *langs* is pending or leased."""
+        langs, last = list(langs), None
+        while True:
+            for lang in langs:
+                for b in self.reclaim(lang):
+                    log(f"prune_queue: broke expired lease {b}")
+            counts = {l: self.counts(l) for l in langs}
+            line = ", ".join(f"{l} {c['done']} done/{c['leased']} leased/{c['pending']} pending"
+                             + (f"/{c['failed']} failed" if c["failed"] else "")
+                             for l, c in counts.items())
+            if line != last:
+                log(f"prune_queue: {line}")
+                last = line
+            if all(c["pending"] == 0 and c["leased"] == 0 for c in counts.values()):
+                return counts
+            time.sleep(poll)
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queue", default=os.environ.get("PRUNE_QUEUE", DEFAULT_QUEUE))
+    ap.add_argument("--ttl", type=float, default=float(os.environ.get("PRUNE_QUEUE_TTL", DEFAULT_TTL)),
+                    help="seconds without a heartbeat before a lease is broken")
+    ap.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                    help="lost leases after which a job is failed")
+    ap.add_argument("--poll", type=float, default=5.0)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    e = sub.add_parser("enqueue", help="queue every exercise of the given languages")
+    e.add_argument("--tests-dir", default="/var/tmp/testing-dir")
+    e.add_argument("--path-dir", help="previous artifacts; their attempt time orders the queue")
+    e.add_argument("langs", nargs="+")
+
+    c = sub.add_parser("claim", help="lease the next pending exercise of a language")
+    c.add_argument("--lang", required=True)
+    c.add_argument("--owner", default=default_owner())
+    c.add_argument("--wait", action="store_true", help="poll while other workers hold leases")
+
+    for name in ("hold", "finish"):
+        h = sub.add_parser(name)
+        h.add_argument("--lang", required=True)
+        h.add_argument("--exercise", required=True)
+        h.add_argument("--owner", required=True)
+        if name == "hold":
+            h.add_argument("--every", type=float, help="heartbeat interval (default ttl/4)")
+            h.add_argument("--pid", type=int, help="stop once this process (the worker) is gone")
+        else:
+            h.add_argument("--rc", type=int, required=True)
+            h.add_argument("--seconds", type=float, default=0.0)
+
+    w = sub.add_parser("wait", help="block until the languages are drained")
+    w.add_argument("langs", nargs="*")
+    s = sub.add_parser("status")
+    s.add_argument("langs", nargs="*")
+
+    args = ap.parse_args()
+    q = Queue(pathlib.Path(args.queue), args.ttl, args.max_attempts)
+
+    if args.cmd == "enqueue":
+        path_dir = pathlib.Path(args.path_dir) if args.path_dir else None
+        for lang in args.langs:
+            try:
+                n = q.enqueue(lang, pathlib.Path(args.tests_dir), path_dir)
+            except FileNotFoundError as exc:
+                print(f"prune_queue: {exc}", file=sys.stderr)
+                return 2
+            print(f"prune_queue: queued {n} {lang} exercise(s)")
+        return 0
+
+    if args.cmd == "claim":
+        job = q.claim_wait(args.lang, args.owner, args.poll) if args.wait else q.claim(args.lang, args.owner)
+        if job is None:
+            return 1
+        print(f"{job['exercise']}\t{job['exercise_dir']}")
+        return 0
+
+    if args.cmd == "hold":
+        every = args.every or max(args.ttl / 4, 1.0)
+        while q.heartbeat(args.lang, args.exercise, args.owner):
+            time.sleep(every)
+            if args.pid and not _alive(args.pid):
+                return 0
+        print(f"prune_queue: lost lease on {args.lang}/{args.exercise}", file=sys.stderr)
+        return 1
+
+    if args.cmd == "finish":
+        q.finish(args.lang, args.exercise, args.owner, args.rc, args.seconds)
+        return 0
+
+    langs = args.langs or q.langs()
+    if args.cmd == "wait":
+        q.drain(langs, args.poll, log=lambda m: print(m, flush=True))
+        failed = [j for l in langs for j in q.failures(l)]
+        for j in failed:
+            print(f"prune_queue: failed {j['lang']}/{j['exercise']}: "
+                  f"{j.get('reason') or 'rc=%s' % j.get('rc')} ({j.get('owner', '?')})")
+        return 1 if failed else 0
+
+    for lang in langs:
+        c = q.counts(lang)
+        print(f"{lang:10} pending {c['pending']:5}  leased {c['leased']:5}  "
+              f"done {c['done']:5}  failed {c['failed']:5}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
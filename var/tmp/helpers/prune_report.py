@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+prune_report.py
+---------------
+
+Where did pruning time go? Aggregates the per-attempt events that
+emit_artifacts.py stores under "attempts" in every <lang>_<exercise>.json:
+
+  • exercises – slowest exercises: attempts, wall time spent in builds,
+                resulting binds and attempts per bind
+  • subtrees  – per language, the directories whose candidates cost the most
+                (inclusive of everything below; a directory whose cost comes
+                from a single child is folded into that child)
+  • binds     – per language, the resulting binds (paths_all) that took the
+                most attempts to settle: every attempt is charged to the
+                nearest bind above its candidates ('(hidden)' if none)
+
+A batched attempt (ddmin) is split evenly across its candidates.
+Used by orchestrate.py (debug/prune_report.{json,txt}); also runs standalone.
+"""
+
+from __future__ import annotations
+import argparse, json, pathlib, sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HIDDEN = "(hidden)"
+
+
+def _parents(path: str) -> Iterable[str]:
+    """path and all its ancestors except '/'."""
+    parts = [p for p in path.split("/") if p]
+    for i in range(len(parts), 0, -1):
+        yield "/" + "/".join(parts[:i])
+
+
+def load_records(path_dir: pathlib.Path, langs: Optional[List[str]] = None) -> List[Dict]:
+    recs = []
+    for f in sorted(path_dir.glob("*_*.json")):
+        try:
+            data = json.loads(f.read_text())
+        except (OSError, ValueError):
+            continue
+        if not isinstance(data, dict) or "attempts" not in data:
+            continue
+        if langs and data.get("lang") not in langs:
+            continue
+        recs.append(data)
+    return recs
+
+
+def _nearest_bind(path: str, binds: Dict[str, str]) -> Optional[Tuple[str, str]]:
+    for p in _parents(path):
+        if p in binds:
+            return binds[p], p
+    return (binds["/"], "/") if "/" in binds else None
+
+
+def build_report(records: List[Dict], top: int = 10) -> Dict:
+    exercises = []
+    per_lang: Dict[str, Dict] = {}
+    for rec in records:
+        lang, ex = rec.get("lang", "?"), rec.get("exercise", "?")
+        att = rec["attempts"]
+        events = att.get("events", [])
+        binds = {e["path"]: e["mode"] for e in rec.get("paths_all", [])}
+        n_binds = len(binds)
+        exercises.append({
+            "lang": lang, "exercise": ex,
+            "attempts": len(events),
+            "ms": sum(int(e.get("ms", 0)) for e in events),
+            "binds": n_binds,
+            "attempts_per_bind": round(len(events) / n_binds, 2) if n_binds else None,
+            "reclassified": att.get("summary", {}).get("reclassified", {}),
+        })
+
+        L = per_lang.setdefault(lang, {"subtrees": {}, "binds": {}})
+        for ev in events:
+            paths = ev.get("paths") or []
+            if not paths:
+                continue
+            ms = int(ev.get("ms", 0)) / len(paths)
+            share = 1 / len(paths)
+            for p in paths:
+                for anc in _parents(p):
+                    node = L["subtrees"].setdefault(anc, [0.0, 0.0, set()])
+                    node[0] += ms
+                    node[1] += share
+                    node[2].add(ex)
+                hit = _nearest_bind(p, binds)
+                key = f"{hit[0]} {hit[1]}" if hit else HIDDEN
+                b = L["binds"].setdefault(key, [0.0, 0.0, set()])
+                b[0] += ms
+                b[1] += share
+                b[2].add(ex)
+
+    exercises.sort(key=lambda e: (-e["ms"], -e["attempts"], e["lang"], e["exercise"]))
+    report: Dict = {"exercises": exercises[:top], "langs": {}}
+    for lang in sorted(per_lang):
+        L = per_lang[lang]
+        sub = L["subtrees"]
+        # fold a directory into its only costly child: keep the deepest node
+        # that still carries the cost
+        kids: Dict[str, List[str]] = {}
+        for p in sub:
+            parent = p.rsplit("/", 1)[0] or "/"
+            kids.setdefault(parent, []).append(p)
+        rows = []
+        for p, (ms, att, exs) in sub.items():
+            if any(abs(sub[k][1] - att) < 1e-9 for k in kids.get(p, [])):
+                continue
+            rows.append({"path": p, "ms": round(ms), "attempts": round(att, 2), "exercises": len(exs)})
+        rows.sort(key=lambda r: (-r["ms"], -r["attempts"], r["path"]))
+        binds = [{"bind": k, "ms": round(v[0]), "attempts": round(v[1], 2), "exercises": len(v[2])}
+                 for k, v in L["binds"].items()]
+        binds.sort(key=lambda r: (-r["attempts"], -r["ms"], r["bind"]))
+        report["langs"][lang] = {"subtrees": rows[:top], "binds": binds[:top]}
+    return report
+
+
+def render(report: Dict) -> str:
+    out = ["Slowest exercises", f"  {'ms':>9} {'attempts':>8} {'binds':>5} {'att/bind':>8}  exercise"]
+    for e in report["exercises"]:
+        apb = "-" if e["attempts_per_bind"] is None else f"{e['attempts_per_bind']:.1f}"
+        why = ", ".join(f"{k}={v}" for k, v in sorted(e["reclassified"].items()))
+        out.append(f"  {e['ms']:>9} {e['attempts']:>8} {e['binds']:>5} {apb:>8}  "
+                   f"{e['lang']}/{e['exercise']}" + (f"  [{why}]" if why else ""))
+    for lang, L in report["langs"].items():
+        out += ["", f"[{lang}] most expensive subtrees", f"  {'ms':>9} {'attempts':>8} {'ex':>4}  path"]
+        out += [f"  {r['ms']:>9} {r['attempts']:>8.1f} {r['exercises']:>4}  {r['path']}" for r in L["subtrees"]]
+        out += ["", f"[{lang}] attempts per resulting bind", f"  {'attempts':>8} {'ms':>9} {'ex':>4}  bind"]
+        out += [f"  {r['attempts']:>8.1f} {r['ms']:>9} {r['exercises']:>4}  {r['bind']}" for r in L["binds"]]
+    return "\n".join(out) + "\n"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Aggregate pruning attempt events.")
+    ap.add_argument("path_dir", help="directory with <lang>_<exercise>.json")
+    ap.add_argument("--langs", help="comma-separated subset")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--json", help="write the report as JSON here")
+    args = ap.parse_args()
+
+    langs = [l for l in (args.langs or "").split(",") if l]
+    records = load_records(pathlib.Path(args.path_dir), langs or None)
+    if not records:
+        print("prune_report: no exercise records with attempt events", file=sys.stderr)
+        return 1
+    report = build_report(records, args.top)
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    sys.stdout.write(render(report))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,25 +5,40 @@ set -euo pipefail
 # ── logging ──────────────────────────────────────────────────────────────────
 err()   { echo -e "\e[31m[error]\e[0m $*" >&2; exit 1; }
 warn()  { echo -e "\e[33m[warn]\e[0m  $*" >&2; }
-log()   { [[ "${LOG_ENABLED:-0}" -eq 1 ]] && echo "[LOG] $*"; }
+log()   { [[ "${LOG_ENABLED:-0}" -eq 1 ]] && echo "[LOG] $*"; return 0; }
 error() { err "$@"; }
 
 # returns 0 if $1 has prefix of any subsequent args
 is_in_list() { local p=$1; shift; for x; do [[ $p == "$x"* ]] && return 0; done; return 1; }
 
 # ── CLI / defaults ───────────────────────────────────────────────────────────
-TARGET="/"
+TARGET="${PRUNE_TARGET:-/}"                 # must end in '/' (its children are pruned)
 BUILD_SCRIPT="/bin/true"
 BUILD_ENV_VARS=""
 TEST_DIR=""
 ASSIGN_DIR=""
 LOG_ENABLED=0
 LANG=""
+PRUNE_STRATEGY="${PRUNE_STRATEGY:-ddmin}"   # ddmin (batched) | linear (one child at a time)
+PRUNE_TRACE="${PRUNE_TRACE:-0}"             # 1 = seed the config from an strace of the baseline
+PRUNE_PRIOR="${PRUNE_PRIOR:-}"              # <lang>_union.paths or BaseLanguage-<lang>.cfg to verify first
+PRUNE_PRIOR_KEEP="${PRUNE_PRIOR_KEEP:-}"    # binds not worth retrying (default: <lang>_intersection.paths)
+BWRAP_BIN="${BWRAP_BIN:-bwrap}"             # stand-ins (bench/bwrap-oracle.sh) take the same argv
+PRUNE_WORKDIR="${PRUNE_WORKDIR:-shared}"    # shared | fresh (best of:) overlay | reflink | hardlink | copy
+PRUNE_SPEC_JOBS="${PRUNE_SPEC_JOBS:-1}"     # attempts in flight at once; >1 runs likely next ones speculatively
 
 IGNORABLE_FAILURE_PATTERNS=${IGNORABLE_FAILURE_PATTERNS:-"There were failing tests|> Task :(compileJava|compileTestJava) NO-SOURCE"}
 UNIGNORABLE_SUCCESS_PATTERNS=${UNIGNORABLE_SUCCESS_PATTERNS:-"> Task :(compileJava|compileTestJava) NO-SOURCE"}
 # single alternation regex (grep -E)
 INFRA_FAILURE_PATTERNS=${INFRA_FAILURE_PATTERNS:-'^(Could not import runpy module|Traceback \(most recent call last\):|Fatal [[:alpha:]].*error:|ModuleNotFoundError: No module named )'}
+# a line matching this while the build streams ends the attempt as failed
+# right away (infra lines fail an attempt whatever else it prints); empty = off
+PRUNE_ABORT_PATTERNS=${PRUNE_ABORT_PATTERNS-$INFRA_FAILURE_PATTERNS}
+# attempts after the baseline get max(PRUNE_TIMEOUT_MIN s, factor × baseline);
+# a timed-out attempt is a failure. factor 0 = no timeout
+PRUNE_TIMEOUT_FACTOR=${PRUNE_TIMEOUT_FACTOR:-5}
+PRUNE_TIMEOUT_MIN=${PRUNE_TIMEOUT_MIN:-30}
+TIMEOUT_BIN="${TIMEOUT_BIN:-timeout}"
 
 readonly PSEUDO_FS=( /proc /dev /sys /run )
 
@@ -36,12 +51,38 @@ while [[ $# -gt 0 ]]; do
     --test-dir)       TEST_DIR="$2"; shift 2;;
     --verbose)        LOG_ENABLED=1; shift;;
     --lang)           LANG="$2"; shift 2;;
+    --strategy)       PRUNE_STRATEGY="$2"; shift 2;;
+    --trace)          PRUNE_TRACE=1; shift;;
+    --prior)          PRUNE_PRIOR="$2"; shift 2;;
+    --prior-keep)     PRUNE_PRIOR_KEEP="$2"; shift 2;;
+    --workdir-mode)   PRUNE_WORKDIR="$2"; shift 2;;
+    --spec-jobs)      PRUNE_SPEC_JOBS="$2"; shift 2;;
     *)                echo "Unknown argument: $1" >&2; exit 1;;
   esac
 done
 
+case "$PRUNE_STRATEGY" in ddmin|linear) ;; *) err "unknown --strategy: $PRUNE_STRATEGY (ddmin|linear)";; esac
+case "$PRUNE_WORKDIR" in
+  shared|fresh|overlay|reflink|hardlink|copy) ;;
+  *) err "unknown --workdir-mode: $PRUNE_WORKDIR (shared|fresh|overlay|reflink|hardlink|copy)";;
+esac
+[[ "$PRUNE_SPEC_JOBS" =~ ^[1-9][0-9]*$ ]] || err "--spec-jobs needs a positive integer: $PRUNE_SPEC_JOBS"
+if (( PRUNE_SPEC_JOBS > 1 )) && [[ "$PRUNE_WORKDIR" == shared ]]; then
+  # concurrent attempts must not build in the same tree
+  log "--spec-jobs $PRUNE_SPEC_JOBS needs private workdirs; using --workdir-mode fresh"
+  PRUNE_WORKDIR=fresh
+fi
+[[ -z "$PRUNE_PRIOR" || -f "$PRUNE_PRIOR" ]] || err "--prior file not found: $PRUNE_PRIOR"
+if [[ -z "$PRUNE_PRIOR_KEEP" && "$PRUNE_PRIOR" == *_union.paths ]]; then
+  [[ -f "${PRUNE_PRIOR%_union.paths}_intersection.paths" ]] && PRUNE_PRIOR_KEEP="${PRUNE_PRIOR%_union.paths}_intersection.paths"
+fi
+
 PERSISTENT_BUILD_HOME="${PERSISTENT_BUILD_HOME:-}"
 BUILD_OPTS="${BUILD_OPTS:-}"
+# per-run scratch for attempt logs; wrappers running several pruners at once
+# must give each its own directory
+BUILD_LOG_DIR="${BUILD_LOG_DIR:-/tmp}"
+mkdir -p "$BUILD_LOG_DIR" || err "cannot create BUILD_LOG_DIR: $BUILD_LOG_DIR"
 IFS=',' read -r -a EXTRA_RO <<<"${BWRAP_EXTRA_RO:-}"
 IFS=',' read -r -a EXTRA_RW <<<"${BWRAP_EXTRA_RW:-}"
 for p in "${EXTRA_RO[@]}"; do [[ -z "$p" ]] || [[ -e $p ]] || err "BWRAP_EXTRA_RO path does not exist: $p"; done
@@ -78,6 +119,53 @@ log "HOST_WORKDIR=${HOST_WORKDIR:-<unset>}"
 log "SANDBOX_WORKDIR=${SANDBOX_WORKDIR}"
 log "IN_SB_SCRIPT=${IN_SB_SCRIPT}"
 
+# ── per-attempt workdir ──────────────────────────────────────────────────────
+# shared: every attempt binds HOST_WORKDIR itself, so build output of one
+# attempt is still there for the next. The other modes start every attempt
+# from the same clean state:
+#   overlay   bwrap --tmp-overlay over the exercise (writes land in a tmpfs)
+#   reflink   cp --reflink=always into BUILD_LOG_DIR (CoW filesystems)
+#   hardlink  cp -al: new, removed and renamed files stay private to the
+#             attempt; a file rewritten in place is shared with the original
+#   copy      plain cp -a
+# fresh picks the first of these that works here.
+WS_SRC="${HOST_WORKDIR:-$SANDBOX_WORKDIR}"
+WS_DIR="${BUILD_LOG_DIR}/workdir"
+
+workdir_mode_ok() {
+  case "$1" in
+    overlay)
+      "$BWRAP_BIN" --dev-bind / / --overlay-src "$WS_SRC" --tmp-overlay "$WS_SRC" /bin/true >/dev/null 2>&1 ;;
+    reflink|hardlink)
+      rm -rf "$WS_DIR"
+      if [[ $1 == reflink ]]; then cp -a --reflink=always "$WS_SRC" "$WS_DIR"; else cp -al "$WS_SRC" "$WS_DIR"; fi >/dev/null 2>&1
+      local rc=$?; rm -rf "$WS_DIR"; return $rc ;;
+    *) return 0 ;;
+  esac
+}
+
+if [[ "$PRUNE_WORKDIR" != shared ]]; then
+  [[ -d "$WS_SRC" ]] || err "--workdir-mode $PRUNE_WORKDIR needs the exercise dir (HOST_WORKDIR)"
+  if [[ "$PRUNE_WORKDIR" == fresh ]]; then
+    for m in overlay reflink hardlink copy; do workdir_mode_ok "$m" && { PRUNE_WORKDIR=$m; break; }; done
+  elif ! workdir_mode_ok "$PRUNE_WORKDIR"; then
+    err "--workdir-mode $PRUNE_WORKDIR is not available here"
+  fi
+  trap 'rm -rf "$WS_DIR"' EXIT
+fi
+log "Attempt workdir: $PRUNE_WORKDIR"
+
+# fresh_workdir: the clean copy the next attempt binds (copying modes only)
+fresh_workdir() {
+  case "$PRUNE_WORKDIR" in shared|overlay) return 0;; esac
+  rm -rf "$WS_DIR"
+  case "$PRUNE_WORKDIR" in
+    reflink)  cp -a --reflink=always "$WS_SRC" "$WS_DIR" ;;
+    hardlink) cp -al "$WS_SRC" "$WS_DIR" ;;
+    copy)     cp -a "$WS_SRC" "$WS_DIR" ;;
+  esac || err "cannot create the attempt workdir ($PRUNE_WORKDIR): $WS_DIR"
+}
+
 # ── state ────────────────────────────────────────────────────────────────────
 unset -v PROTECTED_R CONFIG 2>/dev/null || true
 declare -A PROTECTED_R
@@ -85,6 +173,18 @@ declare -A CONFIG
 PROTECTED_R["$SANDBOX_WORKDIR"]=1   # never hide the mountpoint
 
 BWRAP_COMMAND_COUNT=0
+TRACE_PREFIX=""       # set only for the traced baseline run
+TRACE_FILE="${BUILD_LOG_DIR}/trace.log"
+# one JSON object per attempt: phase, tried state + candidate paths, duration,
+# raw exit code, final status and the pattern that reclassified it (if any)
+PRUNE_EVENTS="${PRUNE_EVENTS:-${BUILD_LOG_DIR}/attempts.jsonl}"
+: > "$PRUNE_EVENTS" || err "cannot write PRUNE_EVENTS: $PRUNE_EVENTS"
+ATTEMPT_PHASE="baseline"   # baseline | trace | prior | prune | compact
+ATTEMPT_TIMEOUT_MS=0       # set from the baseline run
+LAST_ATTEMPT_MS=0
+ATTEMPT_SPEC=0             # 1 while the current attempt's result came from spec_take
+SETSID=$(command -v setsid || true)
+BASELINE_ATTEMPTS=0   # attempts spent before pruning starts (full-writable check)
 
 # ── base & tail options ──────────────────────────────────────────────────────
 BASE_OPTIONS=(
@@ -121,7 +221,7 @@ build_bwrap_command() {
   local list=() path depth weight state
   for path in "${!CONFIG[@]}"; do
     [[ -z "$path" ]] && continue
-    depth=$(grep -o "/" <<<"$path" | wc -l || true)
+    depth=${path//[^\/]/}; depth=${#depth}
     state="${CONFIG[$path]}"
     case "$state" in n) weight=0;; r) weight=1;; w) weight=2;; esac
     list+=("$depth:$weight:$path")
@@ -146,7 +246,13 @@ build_bwrap_command() {
   for p in "${EXTRA_RW[@]}"; do [[ -z "$p" ]] || options+=( --bind    "$p" "$p" ); done
   # Ensure sandbox path exists, then bind the host exercise *after* parent mounts
   options+=( --dir /var --dir /var/tmp --dir "$SANDBOX_WORKDIR" )
-  options+=( --bind "$HOST_WORKDIR" "$SANDBOX_WORKDIR" )
+  case "$PRUNE_WORKDIR" in
+    shared)  options+=( --bind "$HOST_WORKDIR" "$SANDBOX_WORKDIR" ) ;;
+    overlay) options+=( --overlay-src "$WS_SRC" --tmp-overlay "$SANDBOX_WORKDIR" ) ;;
+    *)       options+=( --bind "$WS_DIR" "$SANDBOX_WORKDIR" ) ;;
+  esac
+  # the tracer writes from inside the sandbox
+  [[ -n "$TRACE_PREFIX" ]] && options+=( --bind "$BUILD_LOG_DIR" "$BUILD_LOG_DIR" )
   options+=("${TAIL_OPTIONS[@]}")
 
   local env_part=""
@@ -154,77 +260,642 @@ build_bwrap_command() {
   [[ -n "$BUILD_OPTS"           ]] && env_part+=" BUILD_OPTS='$BUILD_OPTS'"
   [[ -n "$BUILD_ENV_VARS"       ]] && env_part+=" $BUILD_ENV_VARS"
 
-  echo "bwrap $(printf '%s ' "${options[@]}")${env_part} /bin/bash -c '$IN_SB_SCRIPT'"
+  echo "$(printf '%q' "$BWRAP_BIN") $(printf '%s ' "${options[@]}")${env_part} ${TRACE_PREFIX}/bin/bash -c '$IN_SB_SCRIPT'"
 }
 
 # ── run one attempt ──────────────────────────────────────────────────────────
+# json_q <var> <string>: JSON string literal into <var> (no subshell)
+json_q() { local s=${2//\\/\\\\}; s=${s//\"/\\\"}; s=${s//[[:cntrl:]]/ }; printf -v "$1" '"%s"' "$s"; }
+
+# record_attempt <ms> <rc> <status> <reclassified> <pattern> <state> <path>...
+record_attempt() {
+  local ms=$1 rc=$2 status=$3 why=null pat=null state p q paths="" spec=false
+  (( ATTEMPT_SPEC )) && spec=true
+  [[ -z $4 ]] || { json_q why "$4"; json_q pat "$5"; }
+  json_q state "$6"; shift 6
+  for p; do json_q q "$p"; paths+="${paths:+,}$q"; done
+  printf '{"n":%d,"phase":"%s","state":%s,"paths":[%s],"ms":%d,"rc":%d,"status":"%s","reclassified":%s,"pattern":%s,"speculative":%s}\n' \
+    "$BWRAP_COMMAND_COUNT" "$ATTEMPT_PHASE" "$state" "$paths" "$ms" "$rc" "$status" "$why" "$pat" \
+    "$spec" >> "$PRUNE_EVENTS"
+}
+
+# run_attempt <cmd> <logfile> [<fifo>]: run one build with its output streamed
+# through the abort watcher into <logfile>. The build gets its own process
+# group (setsid), so an abort or timeout takes down bwrap and everything in
+# it. Sets ATTEMPT_ABORT (""|abort|timeout) and ATTEMPT_MATCH; returns the rc.
+run_attempt() {
+  local cmd=$1 out=$2 fifo=${3:-${BUILD_LOG_DIR}/.attempt.fifo} pid rc target line
+  local -a pre=()
+  ATTEMPT_ABORT=""; ATTEMPT_MATCH=""
+  (( ATTEMPT_TIMEOUT_MS > 0 )) && pre=( "$TIMEOUT_BIN" --kill-after=5s
+    "$(printf '%d.%03d' $(( ATTEMPT_TIMEOUT_MS / 1000 )) $(( ATTEMPT_TIMEOUT_MS % 1000 )))" )
+  [[ -n "$SETSID" ]] && pre=( "$SETSID" "${pre[@]}" )
+
+  if [[ -z "$PRUNE_ABORT_PATTERNS" ]]; then
+    "${pre[@]}" bash -c "$cmd" >>"$out" 2>&1 &
+    pid=$!
+    wait "$pid"; rc=$?
+  else
+    # tee copies every line into <logfile> (-p: it keeps copying once the
+    # watcher has gone); grep stops at the first match, which kills the
+    # build's group – just the build without setsid, never our own group
+    rm -f "$fifo" "${fifo}.match"; mkfifo "$fifo"
+    "${pre[@]}" bash -c "$cmd" >"$fifo" 2>&1 &
+    pid=$!
+    target="${SETSID:+-}${pid}"
+    tee -p -a "$out" <"$fifo" 2>/dev/null | {
+      if line=$(grep -E --line-buffered -o -m1 -e "$PRUNE_ABORT_PATTERNS"); then
+        printf '%s' "${line%%$'\n'*}" >"${fifo}.match"
+        kill -TERM "$target" 2>/dev/null
+        ( sleep 5; kill -KILL "$target" ) </dev/null >/dev/null 2>&1 &
+      fi
+    }
+    if [[ -e "${fifo}.match" ]]; then
+      ATTEMPT_ABORT="abort"; ATTEMPT_MATCH=$(<"${fifo}.match")
+      rm -f "${fifo}.match"
+    fi
+    wait "$pid"; rc=$?
+    rm -f "$fifo"
+    if [[ -n "$ATTEMPT_ABORT" ]]; then
+      echo "[prune] attempt aborted on: $ATTEMPT_MATCH" >>"$out"
+      return 1
+    fi
+  fi
+  if (( ATTEMPT_TIMEOUT_MS > 0 )) && (( rc == 124 || rc == 137 )); then
+    ATTEMPT_ABORT="timeout"; ATTEMPT_MATCH="${ATTEMPT_TIMEOUT_MS}ms"
+    echo "[prune] attempt timed out after ${ATTEMPT_TIMEOUT_MS}ms" >>"$out"
+  fi
+  return "$rc"
+}
+
+# test_build_script [<state> <candidate>...] – the optional arguments only
+# label the attempt in PRUNE_EVENTS; CONFIG is what gets tested
 test_build_script() {
-  local cmd tmpfile exit_code status
+  local cmd tmpfile exit_code raw_exit status start why="" hit="" m
+  local state="${1:-}"; (( $# )) && shift
   cmd=$(build_bwrap_command)
   ((BWRAP_COMMAND_COUNT++))
   log "Testing command number: $BWRAP_COMMAND_COUNT"
 
-  tmpfile="/tmp/build-${BWRAP_COMMAND_COUNT}.log"
+  tmpfile="${BUILD_LOG_DIR}/build-${BWRAP_COMMAND_COUNT}.log"
   { echo "=== Run #${BWRAP_COMMAND_COUNT} Command ==="; echo "$cmd"; echo; } >"$tmpfile"
 
-  set +e
-  bash -c "$cmd" >>"$tmpfile" 2>&1
-  exit_code=$?
-  set -e
+  start=${EPOCHREALTIME/./}
+  ATTEMPT_SPEC=0
+  if [[ -v SPEC_JOB["$cmd"] ]] && spec_take "$cmd" "$tmpfile"; then
+    exit_code=$SPEC_RC; ATTEMPT_SPEC=1
+  else
+    fresh_workdir
+    set +e
+    run_attempt "$cmd" "$tmpfile"
+    exit_code=$?
+    set -e
+  fi
+  raw_exit=$exit_code
+  # aborted or timed out: a failure, whatever the log says
+  if [[ -n "$ATTEMPT_ABORT" ]]; then
+    exit_code=1; why=$ATTEMPT_ABORT; hit=$ATTEMPT_MATCH
+  fi
 
   # non-zero but ignorable → success
-  if (( exit_code != 0 )) && [[ -n ${IGNORABLE_FAILURE_PATTERNS:-} ]] \
-     && grep -Eq "${IGNORABLE_FAILURE_PATTERNS}" "$tmpfile"; then
-    exit_code=0
+  if (( exit_code != 0 )) && [[ -z "$ATTEMPT_ABORT" && -n ${IGNORABLE_FAILURE_PATTERNS:-} ]] \
+     && m=$(grep -Eo -m1 "${IGNORABLE_FAILURE_PATTERNS}" "$tmpfile"); then
+    hit=$m; exit_code=0; why="ignorable"
   fi
   # zero but infra-fatal lines present → failure
   if (( exit_code == 0 )) && [[ -n ${INFRA_FAILURE_PATTERNS:-} ]] \
-     && grep -Eq "${INFRA_FAILURE_PATTERNS}" "$tmpfile"; then
-    exit_code=1
+     && m=$(grep -Eo -m1 "${INFRA_FAILURE_PATTERNS}" "$tmpfile"); then
+    hit=$m; exit_code=1; why="infra"
   fi
   # zero but “unignorable success” → failure
   if (( exit_code == 0 )) && [[ -n ${UNIGNORABLE_SUCCESS_PATTERNS:-} ]] \
-     && grep -Eq "${UNIGNORABLE_SUCCESS_PATTERNS}" "$tmpfile"; then
-    exit_code=1
+     && m=$(grep -Eo -m1 "${UNIGNORABLE_SUCCESS_PATTERNS}" "$tmpfile"); then
+    hit=$m; exit_code=1; why="unignorable"
   fi
 
   [[ $exit_code -eq 0 ]] && status="success" || status="fail"
-  mv "$tmpfile" "/tmp/build-${BWRAP_COMMAND_COUNT}-${status}.log"
-  log "Logs for run #${BWRAP_COMMAND_COUNT}: /tmp/build-${BWRAP_COMMAND_COUNT}-${status}.log"
+  LAST_ATTEMPT_MS=$(( (${EPOCHREALTIME/./} - start) / 1000 ))
+  (( ATTEMPT_SPEC )) && LAST_ATTEMPT_MS=$SPEC_MS
+  record_attempt "$LAST_ATTEMPT_MS" "$raw_exit" "$status" \
+    "$why" "${hit%%$'\n'*}" "$state" "$@"
+  mv "$tmpfile" "${BUILD_LOG_DIR}/build-${BWRAP_COMMAND_COUNT}-${status}.log"
+  log "Logs for run #${BWRAP_COMMAND_COUNT}: ${BUILD_LOG_DIR}/build-${BWRAP_COMMAND_COUNT}-${status}.log"
   return $exit_code
 }
 
+# ── speculative attempts ─────────────────────────────────────────────────────
+# With --spec-jobs N (PRUNE_SPEC_JOBS) the searches start up to N-1 attempts
+# for configs they are likely to test next – the following siblings, the
+# other half of a batch – while the current one runs. Each gets a private
+# copy of the command (its own CONFIG snapshot), log and workdir under
+# BUILD_LOG_DIR/spec-<slot>. test_build_script uses such a result only when
+# it is about to run exactly the same command, and records it at that point,
+# so CONFIG, attempt numbers and PRUNE_EVENTS come out as in a sequential
+# run. A prediction that misses is cancelled; it only cost a slot.
+declare -A SPEC_JOB=()   # command -> slot, until taken or cancelled
+SPEC_CMDS=()             # slot -> command
+SPEC_PIDS=()             # slot -> pid of the attempt's subshell, "" once settled
+SPEC_TAKEN=0
+SPEC_RC=0; SPEC_MS=0
+
+if (( PRUNE_SPEC_JOBS > 1 )); then
+  trap 'spec_cancel_since 0; rm -rf "$WS_DIR" "$BUILD_LOG_DIR"/spec-*' EXIT
+fi
+
+# spec_start <cmd>: run <cmd> in the background in the next slot
+spec_start() {
+  local cmd=$1 slot=${#SPEC_CMDS[@]} dir run
+  dir="${BUILD_LOG_DIR}/spec-${slot}"
+  mkdir -p "$dir"
+  run=$cmd
+  case "$PRUNE_WORKDIR" in
+    shared|overlay) ;;
+    *) run=${cmd/"--bind $WS_DIR $SANDBOX_WORKDIR "/"--bind $dir/workdir $SANDBOX_WORKDIR "} ;;
+  esac
+  (
+    set +e
+    # cancelled: take the build down with us (pid is run_attempt's)
+    trap 'if [[ -n "${pid:-}" ]]; then
+            kill -TERM "${SETSID:+-}${pid}"; ( sleep 5; kill -KILL "${SETSID:+-}${pid}" ) &
+          fi 2>/dev/null; exit 143' TERM
+    trap - EXIT
+    start=${EPOCHREALTIME/./}
+    WS_DIR="${dir}/workdir"; fresh_workdir
+    run_attempt "$run" "${dir}/out.log" "${dir}/fifo"
+    rc=$?
+    printf '%d %d %s\n%s\n' "$rc" $(( (${EPOCHREALTIME/./} - start) / 1000 )) \
+      "${ATTEMPT_ABORT:--}" "$ATTEMPT_MATCH" >"${dir}/result.tmp"
+    mv "${dir}/result.tmp" "${dir}/result"
+  ) </dev/null >>"${dir}/out.log" 2>&1 &
+  SPEC_PIDS[slot]=$!
+  SPEC_CMDS[slot]=$cmd
+  SPEC_JOB["$cmd"]=$slot
+  log "speculative attempt #${slot} started"
+}
+
+# spec_running: number of speculative attempts still in flight
+spec_running() {
+  local slot n=0
+  for slot in "${!SPEC_PIDS[@]}"; do
+    [[ -n "${SPEC_PIDS[slot]}" ]] || continue
+    if [[ -e "${BUILD_LOG_DIR}/spec-${slot}/result" ]]; then
+      wait "${SPEC_PIDS[slot]}" 2>/dev/null || true
+      SPEC_PIDS[slot]=""
+    else
+      n=$(( n + 1 ))
+    fi
+  done
+  SPEC_IN_FLIGHT=$n
+}
+
+# spec_prefetch <path> <state>...: start an attempt for CONFIG with these
+# entries changed ("-" = unset) if a slot is free and it is not running yet
+spec_prefetch() {
+  (( PRUNE_SPEC_JOBS > 1 )) || return 0
+  spec_running
+  (( SPEC_IN_FLIGHT < PRUNE_SPEC_JOBS - 1 )) || return 1
+  local -A saved=()
+  local -a args=("$@")
+  local i p cmd
+  for (( i = 0; i < ${#args[@]}; i += 2 )); do
+    p=${args[i]}
+    [[ -v saved["$p"] ]] && continue
+    if [[ -v CONFIG["$p"] ]]; then saved["$p"]=${CONFIG[$p]}; else saved["$p"]=-; fi
+  done
+  for (( i = 0; i < ${#args[@]}; i += 2 )); do
+    if [[ ${args[i+1]} == - ]]; then unset 'CONFIG[${args[i]}]'; else CONFIG["${args[i]}"]=${args[i+1]}; fi
+  done
+  cmd=$(build_bwrap_command)
+  for p in "${!saved[@]}"; do
+    if [[ ${saved[$p]} == - ]]; then unset 'CONFIG[$p]'; else CONFIG["$p"]=${saved[$p]}; fi
+  done
+  [[ -v SPEC_JOB["$cmd"] ]] || spec_start "$cmd"
+}
+
+# spec_take <cmd> <logfile>: wait for the speculative attempt of <cmd> and
+# hand over its result (SPEC_RC, SPEC_MS, ATTEMPT_ABORT/ATTEMPT_MATCH) with
+# its output appended to <logfile>; fails if the attempt left no result
+spec_take() {
+  local cmd=$1 out=$2 slot dir line
+  slot=${SPEC_JOB[$cmd]}; unset 'SPEC_JOB[$cmd]'
+  dir="${BUILD_LOG_DIR}/spec-${slot}"
+  [[ -z "${SPEC_PIDS[slot]}" ]] || wait "${SPEC_PIDS[slot]}" 2>/dev/null || true
+  SPEC_PIDS[slot]=""
+  [[ -s "${dir}/result" ]] || { rm -rf "$dir"; return 1; }
+  { read -r SPEC_RC SPEC_MS ATTEMPT_ABORT; IFS= read -r ATTEMPT_MATCH || true; } <"${dir}/result"
+  [[ "$ATTEMPT_ABORT" != - ]] || ATTEMPT_ABORT=""
+  cat "${dir}/out.log" >>"$out"
+  rm -rf "$dir"
+  SPEC_TAKEN=$(( SPEC_TAKEN + 1 ))
+  log "speculative attempt #${slot} used"
+}
+
+# spec_mark: current slot count, for spec_cancel_since
+spec_mark() { SPEC_MARK=${#SPEC_CMDS[@]}; }
+
+# spec_cancel_since <slot>: drop the attempts started at or after <slot>
+# that were not taken (their predictions can no longer come true)
+spec_cancel_since() {
+  local from=$1 cmd slot
+  for cmd in "${!SPEC_JOB[@]}"; do
+    slot=${SPEC_JOB[$cmd]}
+    (( slot >= from )) || continue
+    unset 'SPEC_JOB[$cmd]'
+    if [[ -n "${SPEC_PIDS[slot]}" ]]; then
+      kill -TERM "${SPEC_PIDS[slot]}" 2>/dev/null || true
+      wait "${SPEC_PIDS[slot]}" 2>/dev/null || true
+      SPEC_PIDS[slot]=""
+    fi
+    rm -rf "${BUILD_LOG_DIR}/spec-${slot}"
+  done
+  return 0
+}
+
 # ── pruning (hide → ro → rw) ─────────────────────────────────────────────────
 prune_tree() {
-  local parent="$1"
+  local parent="$1" child i mark
+  local -a kids=()
   log "Pruning subdirectories of $parent"
   for child in "${parent%/}"/*; do
     [[ -d "$child" ]] || continue
     is_in_list "$child" "${PSEUDO_FS[@]}" && continue
     [[ -n "${PROTECTED_R[$child]:-}" ]] && continue
+    kids+=("$child")
+  done
+  # speculation: while kids[i] is tested as n, the next siblings are tested
+  # as if everything before them had been hidden too; the chain breaks (and
+  # is cancelled) at the first sibling that stays visible
+  spec_mark; mark=$SPEC_MARK
+  for (( i = 0; i < ${#kids[@]}; i++ )); do
+    spec_siblings "${kids[@]:i}"
+    prune_child "${kids[i]}" "$mark"
+    [[ "${CONFIG[${kids[i]}]}" == n ]] || { spec_mark; mark=$SPEC_MARK; }
+  done
+  spec_cancel_since "$mark"
+}
+
+# spec_siblings <dir>...: prefetch "<dir 1..j> all n" for j = 2, 3, ...
+spec_siblings() {
+  local -a chain=("$1" n)
+  shift
+  while (( $# )); do
+    chain+=("$1" n); shift
+    spec_prefetch "${chain[@]}" || return 0
+  done
+}
 
-    log "Testing candidate: $child"
-    CONFIG["$child"]="n"
-    if test_build_script; then
-      log "$child => not required (n)"
+# prune_child <dir> [<spec_mark>]: n, else r, else w for one directory, then
+# its children; a failing n cancels the sibling attempts since <spec_mark>
+prune_child() {
+  local child="$1"
+  log "Testing candidate: $child"
+  CONFIG["$child"]="n"
+  if test_build_script n "$child"; then
+    log "$child => not required (n)"
+  else
+    [[ -z "${2:-}" ]] || spec_cancel_since "$2"
+    CONFIG["$child"]="r"
+    if test_build_script r "$child"; then
+      log "$child => read-only (r)"
     else
-      CONFIG["$child"]="r"
-      if test_build_script; then
-        log "$child => read-only (r)"
+      CONFIG["$child"]="w"
+      if test_build_script w "$child"; then
+        log "$child => must be writable (w)"
       else
+        log "$child => fails even with w, keep as w"
         CONFIG["$child"]="w"
-        if test_build_script; then
-          log "$child => must be writable (w)"
-        else
-          log "$child => fails even with w, keep as w"
-          CONFIG["$child"]="w"
-        fi
       fi
     fi
-    if [[ -v CONFIG["$child"] ]] && [[ "${CONFIG[$child]}" != "n" ]]; then
-      prune_tree "$child"
+  fi
+  if [[ -v CONFIG["$child"] ]] && [[ "${CONFIG[$child]}" != "n" ]]; then
+    prune_tree "$child"
+  fi
+}
+
+# ── pruning, batched (delta-debugging style) ─────────────────────────────────
+# group_test <try> <fallback> <known_fail> <path>...
+#   Put every path into state <try> and run one build. On success the whole
+#   batch keeps <try>; on failure the batch is restored and bisected. A single
+#   path that still fails is restored and, if <fallback> is set, put into that
+#   state; it is appended to DD_FAILED either way. <known_fail>=1 skips the
+#   batch build when the caller already knows it fails (the other half of a
+#   failing batch passed on its own).
+DD_FAILED=()
+group_test() {
+  local try=$1 fallback=$2 known_fail=$3; shift 3
+  local -a items=("$@")
+  local n=${#items[@]} p
+  (( n )) || return 0
+
+  local -A prior=()
+  for p in "${items[@]}"; do
+    [[ -v CONFIG["$p"] ]] && prior["$p"]="${CONFIG[$p]}"
+  done
+
+  # speculation: should this batch fail, the left half is tested next. If
+  # all of it fails, the right half is tested as a whole; if all of it
+  # passes, the right half is known to fail and its own left half is next
+  local mark half=$(( n / 2 ))
+  spec_mark; mark=$SPEC_MARK
+  if (( n > 1 && PRUNE_SPEC_JOBS > 1 )); then
+    local -a left_try=() right_try=() right_left_try=()
+    local rhalf=$(( (n - half) / 2 ))
+    for p in "${items[@]:0:half}"; do
+      left_try+=("$p" "$try")
+      right_try+=("$p" "${fallback:-${prior[$p]:--}}")
+      right_left_try+=("$p" "$try")
+    done
+    for p in "${items[@]:half}"; do
+      left_try+=("$p" "${prior[$p]:--}")
+      right_try+=("$p" "$try")
+    done
+    for p in "${items[@]:half:rhalf}"; do right_left_try+=("$p" "$try"); done
+    for p in "${items[@]:half+rhalf}"; do right_left_try+=("$p" "${prior[$p]:--}"); done
+    spec_prefetch "${left_try[@]}" && spec_prefetch "${right_try[@]}" \
+      && (( rhalf )) && spec_prefetch "${right_left_try[@]}" || true
+  fi
+
+  if (( ! known_fail )); then
+    for p in "${items[@]}"; do CONFIG["$p"]="$try"; done
+    if test_build_script "$try" "${items[@]}"; then
+      log "batch of $n => $try: ${items[*]}"
+      spec_cancel_since "$mark"
+      return 0
     fi
+    for p in "${items[@]}"; do
+      if [[ -v prior["$p"] ]]; then CONFIG["$p"]="${prior[$p]}"; else unset 'CONFIG[$p]'; fi
+    done
+  fi
+
+  if (( n == 1 )); then
+    p="${items[0]}"
+    [[ -n "$fallback" ]] && CONFIG["$p"]="$fallback"
+    log "$p => cannot be $try${fallback:+, using $fallback}"
+    DD_FAILED+=("$p")
+    return 0
+  fi
+
+  local -a left=("${items[@]:0:half}") right=("${items[@]:half}")
+  group_test "$try" "$fallback" 0 "${left[@]}"
+  local left_ok=1
+  for p in "${left[@]}"; do [[ "${CONFIG[$p]:-}" == "$try" ]] || { left_ok=0; break; }; done
+  group_test "$try" "$fallback" "$left_ok" "${right[@]}"
+  spec_cancel_since "$mark"
+}
+
+prune_tree_ddmin() {
+  local parent="$1" child
+  log "Pruning subdirectories of $parent (ddmin)"
+  local -a children=()
+  for child in "${parent%/}"/*; do
+    [[ -d "$child" ]] || continue
+    is_in_list "$child" "${PSEUDO_FS[@]}" && continue
+    [[ -n "${PROTECTED_R[$child]:-}" ]] && continue
+    children+=("$child")
+  done
+  prune_children_ddmin "${children[@]}"
+}
+
+# prune_children_ddmin <dir>...: batched search over these siblings
+prune_children_ddmin() {
+  local child
+  local -a children=("$@")
+  (( ${#children[@]} )) || return 0
+
+  # 1) hide as many siblings as possible at once
+  DD_FAILED=()
+  group_test n "" 0 "${children[@]}"
+  local -a needed=("${DD_FAILED[@]}")
+  (( ${#needed[@]} )) || return 0
+
+  # 2) required siblings: read-only unless proven to need writes
+  DD_FAILED=()
+  group_test r w 0 "${needed[@]}"
+
+  for child in "${needed[@]}"; do
+    [[ "${CONFIG[$child]:-}" != "n" ]] && prune_tree_ddmin "$child"
+  done
+  return 0
+}
+
+# ── trace seeding (record once, then verify) ─────────────────────────────────
+# Turn `strace -f -e trace=%file` output into "<dir>\t<r|w>" lines, one per
+# directory that is an ancestor of an accessed path. Failed calls (= -1) are
+# ignored; anything that creates, removes, renames or opens for writing makes
+# the path's directories w.
+trace_dirs() {
+  awk '
+    / = -1 / { next }
+    {
+      if (!match($0, /[a-z_0-9]+\(/)) next
+      sc = substr($0, RSTART, RLENGTH - 1); w = 0
+      if (sc ~ /^open(at|at2)?$/) { if ($0 ~ /O_WRONLY|O_RDWR|O_CREAT|O_TRUNC/) w = 1 }
+      else if (sc ~ /^(mkdir|mkdirat|unlink|unlinkat|rmdir|rename|renameat|renameat2|link|linkat|symlink|symlinkat|creat|truncate|chmod|fchmodat|chown|lchown|fchownat|utime|utimes|utimensat|futimesat|mknod|mknodat)$/) w = 1
+      rest = $0
+      while (match(rest, /"\/[^"]*"/)) {
+        p = substr(rest, RSTART + 1, RLENGTH - 2); rest = substr(rest, RSTART + RLENGTH)
+        n = split(p, part, "/"); d = ""
+        for (i = 2; i <= n; i++) {
+          if (part[i] == "") continue
+          d = d "/" part[i]
+          if (w) mode[d] = "w"; else if (!(d in mode)) mode[d] = "r"
+        }
+      }
+    }
+    END { for (d in mode) print d "\t" mode[d] }
+  ' "$1"
+}
+
+# seed_walk <dir>: same traversal as prune_tree, but states come from TRACED
+seed_walk() {
+  local parent="$1" child
+  for child in "${parent%/}"/*; do
+    [[ -d "$child" ]] || continue
+    is_in_list "$child" "${PSEUDO_FS[@]}" && continue
+    [[ -n "${PROTECTED_R[$child]:-}" ]] && continue
+    if [[ -v TRACED["$child"] ]]; then
+      CONFIG["$child"]="${TRACED[$child]}"
+      seed_walk "$child"
+    else
+      CONFIG["$child"]="n"
+    fi
+  done
+  return 0
+}
+
+# seed_from_trace: apply the traced config and confirm it with at most two
+# builds (as traced, then with every traced dir writable). Returns 1 and
+# restores the all-writable config if neither passes.
+seed_from_trace() {
+  [[ -s "$TRACE_FILE" ]] || { warn "trace empty: $TRACE_FILE"; return 1; }
+  unset -v TRACED; declare -gA TRACED=()
+  local d m
+  while IFS=$'\t' read -r d m; do TRACED["$d"]="$m"; done < <(trace_dirs "$TRACE_FILE")
+  log "Trace touched ${#TRACED[@]} directories"
+
+  local -A baseline=()
+  for d in "${!CONFIG[@]}"; do baseline["$d"]="${CONFIG[$d]}"; done
+
+  seed_walk "$TARGET"
+  if test_build_script seed; then
+    log "Trace-derived configuration confirmed"
+    return 0
+  fi
+  for d in "${!CONFIG[@]}"; do [[ "${CONFIG[$d]}" == r ]] && CONFIG["$d"]="w"; done
+  if test_build_script seed+w; then
+    log "Trace-derived configuration confirmed with traced dirs writable"
+    return 0
+  fi
+
+  log "Trace-derived configuration fails; falling back to $PRUNE_STRATEGY search"
+  unset -v CONFIG; declare -gA CONFIG=()
+  for d in "${!baseline[@]}"; do CONFIG["$d"]="${baseline[$d]}"; done
+  return 1
+}
+
+# ── prior seeding (a language's known-good binds) ─────────────────────────────
+# load_binds <file> <array>: "<mode> /path" lines (*.paths) or a Phobos cfg
+# ([readonly]/[write]/[hide] sections) into an assoc array; a path listed
+# twice keeps the higher mode, as in pathset.py
+load_binds() {
+  local file=$1 line mode="" m p
+  local -n into=$2
+  while IFS= read -r line || [[ -n "$line" ]]; do
+    line="${line%$'\r'}"
+    line="${line#"${line%%[![:space:]]*}"}"; line="${line%"${line##*[![:space:]]}"}"
+    [[ -z "$line" || "$line" == [\#\;]* ]] && continue
+    case "$line" in
+      '[readonly]') mode=r; continue;;
+      '[write]')    mode=w; continue;;
+      '[hide]')     mode=n; continue;;
+      '['*']')      mode="";  continue;;
+    esac
+    if [[ "$line" =~ ^([nrw])[[:space:]]+(/.*)$ ]]; then
+      m=${BASH_REMATCH[1]}; p=${BASH_REMATCH[2]}
+    elif [[ -n "$mode" && "$line" == /* ]]; then
+      m=$mode; p=$line
+    else
+      continue
+    fi
+    [[ "$p" == / ]] || p="${p%/}"
+    case "${into[$p]:-}$m" in wr|wn|rn) ;; *) into["$p"]=$m;; esac
+  done < "$file"
+}
+
+# bind_mode <array> <path>: effective mode of <path> (nearest listed
+# ancestor, default n) into BIND_MODE
+bind_mode() {
+  local -n binds=$1
+  local p=$2
+  while :; do
+    [[ -v binds["$p"] ]] && { BIND_MODE=${binds[$p]}; return 0; }
+    [[ "$p" == / || -z "$p" ]] && break
+    p="${p%/*}"; [[ -n "$p" ]] || p=/
+  done
+  BIND_MODE=n
+}
+
+declare -A PRIOR=() PRIOR_KEEP=() PRIOR_APPLIED=()
+PRIOR_FAILED=()
+
+# prior_apply <top>: put the prior's binds into the subtree <top>
+prior_apply() {
+  local top=$1 k
+  for k in "${!CONFIG[@]}"; do [[ "$k" == "$top"/* ]] && unset 'CONFIG[$k]'; done
+  bind_mode PRIOR "$top"; CONFIG["$top"]=$BIND_MODE
+  for k in "${!PRIOR[@]}"; do
+    [[ "$k" == "$top"/* && -d "$k" ]] || continue
+    is_in_list "$k" "${PSEUDO_FS[@]}" "$SANDBOX_WORKDIR" && continue
+    CONFIG["$k"]=${PRIOR[$k]}
+  done
+  PRIOR_APPLIED["$top"]=1
+}
+
+# prior_reset <top>: back to the baseline (whole subtree writable)
+prior_reset() {
+  local top=$1 k
+  for k in "${!CONFIG[@]}"; do [[ "$k" == "$top"/* ]] && unset 'CONFIG[$k]'; done
+  CONFIG["$top"]="w"
+  unset 'PRIOR_APPLIED[$top]'
+}
+
+# prior_group <known_fail> <top>...: the prior for these top-level subtrees
+# in one build; a failing batch is reset and bisected like group_test.
+# Subtrees the prior cannot explain stay writable and go to PRIOR_FAILED.
+prior_group() {
+  local known_fail=$1; shift
+  local -a items=("$@")
+  local n=${#items[@]} t
+  (( n )) || return 0
+  if (( ! known_fail )); then
+    for t in "${items[@]}"; do prior_apply "$t"; done
+    if test_build_script prior "${items[@]}"; then
+      log "prior holds for: ${items[*]}"
+      return 0
+    fi
+    for t in "${items[@]}"; do prior_reset "$t"; done
+  fi
+  if (( n == 1 )); then
+    log "${items[0]} => prior fails, searching it"
+    PRIOR_FAILED+=("${items[0]}")
+    return 0
+  fi
+  local half=$(( n / 2 ))
+  local -a left=("${items[@]:0:half}") right=("${items[@]:half}")
+  prior_group 0 "${left[@]}"
+  local left_ok=1
+  for t in "${left[@]}"; do [[ -v PRIOR_APPLIED["$t"] ]] || { left_ok=0; break; }; done
+  prior_group "$left_ok" "${right[@]}"
+}
+
+# seed_from_prior: verify the prior (one build when it holds), run the
+# $PRUNE_STRATEGY search only below top-level dirs where it fails, then try
+# to drop the prior's binds this exercise does not need. Binds the keep set
+# (the language intersection) grants at the same mode are not retried.
+seed_from_prior() {
+  local -a tops=() contested=() writable=()
+  local k top
+  for k in "${!CONFIG[@]}"; do tops+=("$k"); done
+  ((${#tops[@]})) && mapfile -t tops < <(printf '%s\n' "${tops[@]}" | sort)
+  PRIOR_FAILED=()
+  prior_group 0 "${tops[@]}"
+
+  if (( ${#PRIOR_FAILED[@]} )); then
+    ATTEMPT_PHASE="prune"
+    log "Prior fails below: ${PRIOR_FAILED[*]}"
+    case "$PRUNE_STRATEGY" in
+      ddmin)  prune_children_ddmin "${PRIOR_FAILED[@]}" ;;
+      linear) for k in "${PRIOR_FAILED[@]}"; do prune_child "$k"; done ;;
+    esac
+    ATTEMPT_PHASE="prior"
+  fi
+
+  for k in "${!PRIOR[@]}"; do
+    [[ "${PRIOR[$k]}" != n && "${CONFIG[$k]:-}" == "${PRIOR[$k]}" ]] || continue
+    top="${k#"${TARGET%/}"/}"; top="${TARGET%/}/${top%%/*}"
+    [[ -v PRIOR_APPLIED["$top"] ]] || continue
+    bind_mode PRIOR_KEEP "$k"
+    [[ "$BIND_MODE" == "${PRIOR[$k]}" ]] && continue
+    contested+=("$k")
   done
+  (( ${#contested[@]} )) || return 0
+  mapfile -t contested < <(printf '%s\n' "${contested[@]}" | sort)
+  log "Retrying ${#contested[@]} bind(s) of the prior"
+  DD_FAILED=()
+  case "$PRUNE_STRATEGY" in
+    ddmin)  group_test n "" 0 "${contested[@]}" ;;
+    linear) for k in "${contested[@]}"; do group_test n "" 0 "$k"; done ;;
+  esac
+  for k in "${DD_FAILED[@]}"; do
+    [[ "${CONFIG[$k]}" == w ]] || continue
+    bind_mode PRIOR_KEEP "$k"; [[ "$BIND_MODE" == w ]] || writable+=("$k")
+  done
+  (( ${#writable[@]} )) || return 0
+  case "$PRUNE_STRATEGY" in
+    ddmin)  group_test r w 0 "${writable[@]}" ;;
+    linear) for k in "${writable[@]}"; do group_test r w 0 "$k"; done ;;
+  esac
+  return 0
 }
 
 # ── compaction (best-effort) ─────────────────────────────────────────────────
@@ -275,7 +946,14 @@ demote_writable_parents() {
       [[ "$maybe" == "$parent"* && "$maybe" != "$parent" ]] || continue
       [[ "${CONFIG[$maybe]:-}" == "w" ]] && { any_w=true; break; }
     done
-    $any_w || CONFIG["$parent"]="r"
+    $any_w && continue
+    # w was chosen by a failing r build; only keep the demotion if a build
+    # with r still passes (a leaf that writes itself must stay w)
+    CONFIG["$parent"]="r"
+    if ! test_build_script r "$parent"; then
+      log "$parent => still needs w"
+      CONFIG["$parent"]="w"
+    fi
   done
 }
 
@@ -287,9 +965,12 @@ save_configuration() {
     echo "$key -> ${CONFIG[$key]}" >> "$outfile"
   done
   echo "Total Command Attempts: $BWRAP_COMMAND_COUNT" >> "$outfile"
+  echo "Prune Attempts (${PRUNE_LABEL:-$PRUNE_STRATEGY}): $(( BWRAP_COMMAND_COUNT - BASELINE_ATTEMPTS ))" >> "$outfile"
   echo "Base options: ${BASE_OPTIONS[*]}" >> "$outfile"
   echo "Tail options: ${TAIL_OPTIONS[*]}" >> "$outfile"
   log "Total Command Attempts: $BWRAP_COMMAND_COUNT"
+  log "Prune Attempts (${PRUNE_LABEL:-$PRUNE_STRATEGY}): $(( BWRAP_COMMAND_COUNT - BASELINE_ATTEMPTS ))"
+  (( PRUNE_SPEC_JOBS > 1 )) && log "Speculative attempts: ${#SPEC_CMDS[@]} started, ${SPEC_TAKEN} used"
   log "Base options: ${BASE_OPTIONS[*]}"
   log "Tail options: ${TAIL_OPTIONS[*]}"
 }
@@ -299,16 +980,66 @@ log "Initializing configuration for target: $TARGET"
 init_config
 for key in "${!CONFIG[@]}"; do CONFIG["$key"]="w"; done
 
+if [[ -n "$PRUNE_PRIOR" ]]; then
+  load_binds "$PRUNE_PRIOR" PRIOR
+  [[ -z "$PRUNE_PRIOR_KEEP" ]] || load_binds "$PRUNE_PRIOR_KEEP" PRIOR_KEEP
+  log "Prior: ${#PRIOR[@]} bind(s) from $PRUNE_PRIOR, keep set: ${#PRIOR_KEEP[@]}"
+  if (( ! ${#PRIOR[@]} )); then
+    warn "prior $PRUNE_PRIOR has no binds; pruning without it"
+    PRUNE_PRIOR=""
+  elif [[ "$PRUNE_TRACE" == 1 ]]; then
+    log "--trace is not used together with --prior"
+    PRUNE_TRACE=0
+  fi
+fi
+
+if [[ "$PRUNE_TRACE" == 1 ]]; then
+  if tracer=$(command -v strace); then
+    rm -f "$TRACE_FILE"
+    TRACE_PREFIX="$tracer -f -qq -s 4096 -e trace=%file -o $TRACE_FILE "
+  else
+    warn "--trace requested but strace not found; pruning without a trace"
+    PRUNE_TRACE=0
+  fi
+fi
+
 log "Testing with full writable configuration..."
-if ! test_build_script; then
+if ! test_build_script w "$TARGET"; then
   log "Build script failed even with full writable configuration. Aborting."
   exit 1
 fi
+TRACE_PREFIX=""
+
+BASELINE_ATTEMPTS=$BWRAP_COMMAND_COUNT
+if (( PRUNE_TIMEOUT_FACTOR > 0 )); then
+  ATTEMPT_TIMEOUT_MS=$(( LAST_ATTEMPT_MS * PRUNE_TIMEOUT_FACTOR ))
+  (( ATTEMPT_TIMEOUT_MS >= PRUNE_TIMEOUT_MIN * 1000 )) || ATTEMPT_TIMEOUT_MS=$(( PRUNE_TIMEOUT_MIN * 1000 ))
+  log "Baseline took ${LAST_ATTEMPT_MS}ms; per-attempt timeout ${ATTEMPT_TIMEOUT_MS}ms"
+fi
 
-log "Running pruning for exercises of ${LANG:-<unknown>}..."
-prune_tree "$TARGET"
+seeded=0
+PRUNE_LABEL="$PRUNE_STRATEGY"
+if [[ -n "$PRUNE_PRIOR" ]]; then
+  ATTEMPT_PHASE="prior"
+  seed_from_prior
+  seeded=1
+  PRUNE_LABEL="prior"; (( ${#PRIOR_FAILED[@]} )) && PRUNE_LABEL="prior+$PRUNE_STRATEGY"
+elif [[ "$PRUNE_TRACE" == 1 ]]; then
+  ATTEMPT_PHASE="trace"
+  if seed_from_trace; then seeded=1; PRUNE_LABEL="trace"; else PRUNE_LABEL="trace+$PRUNE_STRATEGY"; fi
+fi
+
+ATTEMPT_PHASE="prune"
+if (( ! seeded )); then
+  log "Running pruning for exercises of ${LANG:-<unknown>} (strategy: $PRUNE_STRATEGY)..."
+  case "$PRUNE_STRATEGY" in
+    ddmin)  prune_tree_ddmin "$TARGET" ;;
+    linear) prune_tree "$TARGET" ;;
+  esac
+fi
 
 # never fail a successful prune during compaction
+ATTEMPT_PHASE="compact"
 set +e
 demote_writable_parents || true
 collapse_readonly_parents || true
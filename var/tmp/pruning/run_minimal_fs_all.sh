@@ -5,17 +5,54 @@ trap 'echo "[ERR ] aborted at line $LINENO (status $?)" >&2' ERR
 
 HELPER_DIR="${HELPER_DIR:-/var/tmp/helpers}"
 EMIT_HELPER="$HELPER_DIR/emit_artifacts.py"
+CACHE_HELPER="$HELPER_DIR/prune_cache.py"
+QUEUE_HELPER="$HELPER_DIR/prune_queue.py"
 PHOBOS_KEEP_LOG="${PHOBOS_KEEP_LOG:-0}"
 
 LOG_ENABLED=0
 CACHE_DIR=""
+JOBS=1
+TRACE=0
+RESULT_CACHE="${PRUNE_RESULT_CACHE:-/var/tmp/prune_cache}"
+BATCH_EMIT=0
+PRIOR=""
+WORKDIR_MODE="${PRUNE_WORKDIR:-shared}"
+SPEC_JOBS="${PRUNE_SPEC_JOBS:-1}"
+STORE="${ARTIFACT_STORE:-}"
+QUEUE=""
 lang=""
 
 usage() {
   cat >&2 <<EOF
-Usage: $0 [--verbose] [--cache-dir PATH] <lang>
+Usage: $0 [--verbose] [--cache-dir PATH] [--jobs N] [--trace]
+          [--result-cache DIR | --no-result-cache] [--batch-emit]
+          [--prior FILE|auto] [--workdir-mode MODE] [--spec-jobs N]
+          [--store DB] [--queue DIR] <lang>
   --verbose        enable debug logging
   --cache-dir PATH bind PATH read-write inside Bubblewrap (tool-agnostic cache)
+  --jobs N         prune up to N exercises concurrently (default 1)
+  --trace          seed each prune from an strace of the baseline build
+  --result-cache DIR
+                   reuse artifacts of exercises whose inputs are unchanged
+                   (default /var/tmp/prune_cache)
+  --no-result-cache
+                   always prune
+  --batch-emit     emit all artifacts with one emit_artifacts.py run at the end
+  --prior FILE|auto
+                   verify FILE (<lang>_union.paths or BaseLanguage-<lang>.cfg)
+                   first and only search where it fails; auto = the
+                   <lang>_union.paths of a previous run in OUTPUT_DIR, if any
+  --workdir-mode MODE
+                   what each attempt binds as the exercise: shared (the
+                   exercise copy, default) or a clean view per attempt:
+                   fresh (best available), overlay, reflink, hardlink, copy
+  --spec-jobs N    let each prune run up to N attempts at once, the extra
+                   ones speculatively (implies a non-shared --workdir-mode)
+  --store DB       also record every exercise in this SQLite artifact store
+                   (artifact_store.py; default \$ARTIFACT_STORE)
+  --queue DIR      instead of every exercise below the language folder, keep
+                   claiming <lang> jobs from this shared queue (prune_queue.py)
+                   until it is drained; --jobs workers claim independently
 EOF
   exit 1
 }
@@ -24,6 +61,23 @@ while [[ $# -gt 0 ]]; do
     --verbose) LOG_ENABLED=1; shift;;
     --cache-dir) [[ $# -ge 2 ]] || { echo "Missing path after --cache-dir" >&2; usage; }
                  CACHE_DIR=$2; shift 2;;
+    --jobs|-j) [[ $# -ge 2 && $2 =~ ^[1-9][0-9]*$ ]] || { echo "--jobs needs a positive integer" >&2; usage; }
+               JOBS=$2; shift 2;;
+    --trace) TRACE=1; shift;;
+    --result-cache) [[ $# -ge 2 ]] || { echo "Missing path after --result-cache" >&2; usage; }
+                    RESULT_CACHE=$2; shift 2;;
+    --no-result-cache) RESULT_CACHE=""; shift;;
+    --batch-emit) BATCH_EMIT=1; shift;;
+    --workdir-mode) [[ $# -ge 2 ]] || { echo "Missing mode after --workdir-mode" >&2; usage; }
+                    WORKDIR_MODE=$2; shift 2;;
+    --spec-jobs) [[ $# -ge 2 && $2 =~ ^[1-9][0-9]*$ ]] || { echo "--spec-jobs needs a positive integer" >&2; usage; }
+                 SPEC_JOBS=$2; shift 2;;
+    --store) [[ $# -ge 2 ]] || { echo "Missing path after --store" >&2; usage; }
+             STORE=$2; shift 2;;
+    --queue) [[ $# -ge 2 ]] || { echo "Missing dir after --queue" >&2; usage; }
+             QUEUE=$2; shift 2;;
+    --prior) [[ $# -ge 2 ]] || { echo "Missing file after --prior" >&2; usage; }
+             PRIOR=$2; shift 2;;
     -h|--help) usage;;
     --*) echo "Unknown flag: $1" >&2; usage;;
     *)  if [[ -z ${lang:-} ]]; then lang=$1; else echo "Unexpected arg: $1" >&2; usage; fi; shift;;
@@ -31,65 +85,189 @@ while [[ $# -gt 0 ]]; do
 done
 [[ -n ${lang:-} ]] || usage
 
-log()   { (( LOG_ENABLED )) && echo "[LOG ] $*"; }
+log()   { (( LOG_ENABLED )) && echo "[LOG ] $*"; return 0; }
 info()  { echo "[INFO] $*"; }
 error() { echo "[FAIL] $*" >&2; exit 1; }
 
-EX_ROOT="/var/tmp/testing-dir/$lang"
-PRUNE_SCRIPT="/var/tmp/pruning/detect_minimal_fs.sh"
-OUTPUT_DIR="/var/tmp/path_sets"
+EX_ROOT="${TESTS_ROOT:-/var/tmp/testing-dir}/$lang"
+PRUNE_SCRIPT="${PRUNE_SCRIPT:-/var/tmp/pruning/detect_minimal_fs.sh}"
+OUTPUT_DIR="${OUTPUT_DIR:-/var/tmp/path_sets}"
 
-[[ -d "$EX_ROOT"      ]] || error "Language folder not found: $EX_ROOT"
+[[ -n "$QUEUE" || -d "$EX_ROOT" ]] || error "Language folder not found: $EX_ROOT"
+[[ -z "$QUEUE" || -f "$QUEUE_HELPER" ]] || error "Queue helper not found: $QUEUE_HELPER"
 [[ -x "$PRUNE_SCRIPT" ]] || error "Prune script not exec: $PRUNE_SCRIPT"
 mkdir -p "$OUTPUT_DIR" "$HELPER_DIR" 2>/dev/null || true
 
+# speculative attempts never share a tree; say so in the cache key, too.
+# --spec-jobs itself is not part of the key: it does not change the result
+(( SPEC_JOBS > 1 )) && [[ "$WORKDIR_MODE" == shared ]] && WORKDIR_MODE=fresh
+
+if [[ "$PRIOR" == auto ]]; then
+  PRIOR="$OUTPUT_DIR/${lang}_union.paths"
+  [[ -f "$PRIOR" ]] && info "Seeding from $PRIOR" || { log "No $PRIOR yet; full search"; PRIOR=""; }
+fi
+if [[ -n "$PRIOR" ]]; then
+  [[ -f "$PRIOR" ]] || error "Prior not found: $PRIOR"
+  PRIOR="$(cd "$(dirname "$PRIOR")" && pwd)/$(basename "$PRIOR")"   # pruners run from the exercise copy
+fi
+
+STORE_ARGS=()
+[[ -n "$STORE" ]] && STORE_ARGS=( --store "$STORE" )
+
 if [[ -n "$CACHE_DIR" ]]; then
   mkdir -p "$CACHE_DIR"
   export BWRAP_EXTRA_RW="$CACHE_DIR"
   log "Cache directory bound RW: $CACHE_DIR"
 fi
 
+# ── result cache key inputs (shared by all exercises of this run) ───────────
+CACHE_KEY_ARGS=()
+if [[ -n "$RESULT_CACHE" && -f "$CACHE_HELPER" ]]; then
+  mkdir -p "$RESULT_CACHE"
+  # toolchain fingerprint: anything that changes what a build touches
+  TOOLCHAIN_FILE=$(mktemp "/tmp/prune_${lang}_toolchain_XXXX")
+  {
+    for t in java javac python3 pip3 gcc make mvn; do
+      command -v "$t" >/dev/null 2>&1 || continue
+      echo "## $t"; "$t" --version 2>&1 | head -n 3 || true
+    done
+    for d in /usr/lib /usr/local/lib /usr/lib/jvm /opt; do
+      [[ -d $d ]] && { echo "## ls $d"; ls -1 "$d"; }
+    done
+  } > "$TOOLCHAIN_FILE" 2>/dev/null || true
+  # a prior changes how a passing config is found, not that it is verified,
+  # so only its use (not its content) is part of the key. The bwrap binary
+  # is: sets pruned through a stand-in (bench/bwrap-oracle.sh) must never be
+  # served to a run through the real one
+  bwrap_path=$(command -v "${BWRAP_BIN:-bwrap}" || true)
+  CACHE_KEY_ARGS=( --lang "$lang" --toolchain-file "$TOOLCHAIN_FILE"
+                   --script "$PRUNE_SCRIPT" --script "$EMIT_HELPER"
+                   ${bwrap_path:+--script "$bwrap_path"}
+                   --option "bwrap=${BWRAP_BIN:-bwrap}"
+                   --option "strategy=${PRUNE_STRATEGY:-ddmin}" --option "trace=$TRACE"
+                   --option "target=${PRUNE_TARGET:-/}"
+                   --option "prior=${PRIOR:+on}"
+                   --option "workdir=$WORKDIR_MODE"
+                   --option "cache_dir=$CACHE_DIR"
+                   --option "extra_ro=${BWRAP_EXTRA_RO:-}" --option "extra_rw=${BWRAP_EXTRA_RW:-}"
+                   --option "build_opts=${BUILD_OPTS:-}"
+                   --option "build_home=${PERSISTENT_BUILD_HOME:-}"
+                   --option "ignorable=${IGNORABLE_FAILURE_PATTERNS:-}"
+                   --option "unignorable=${UNIGNORABLE_SUCCESS_PATTERNS:-}"
+                   --option "infra=${INFRA_FAILURE_PATTERNS:-}"
+                   --option "abort=${PRUNE_ABORT_PATTERNS-${INFRA_FAILURE_PATTERNS:-}}"
+                   --option "timeout_factor=${PRUNE_TIMEOUT_FACTOR:-5}"
+                   --option "timeout_min=${PRUNE_TIMEOUT_MIN:-30}" )
+  log "Result cache: $RESULT_CACHE"
+else
+  RESULT_CACHE=""
+fi
+
 shopt -s nullglob
-exercises=("$EX_ROOT"/*)
-[[ ${#exercises[@]} -gt 0 ]] || error "No exercises found for $lang"
+exercises=()
+if [[ -z "$QUEUE" ]]; then
+  exercises=("$EX_ROOT"/*)
+  [[ ${#exercises[@]} -gt 0 ]] || error "No exercises found for $lang"
+fi
+
+# a queued exercise counts as done once its artifacts exist, so queue workers
+# emit as they go
+if (( BATCH_EMIT )) && [[ -n "$QUEUE" ]]; then
+  log "--batch-emit has no effect with --queue."
+  BATCH_EMIT=0
+fi
+# --batch-emit: workers park final_bindings.txt + one manifest line here and
+# a single emit_artifacts.py --batch run turns them into artifacts at the end
+if (( BATCH_EMIT )) && [[ ! -x "$EMIT_HELPER" ]]; then
+  log "emit_artifacts helper not found ($EMIT_HELPER); --batch-emit ignored."
+  BATCH_EMIT=0
+fi
+STAGE_DIR=""
+(( BATCH_EMIT )) && STAGE_DIR=$(mktemp -d "/tmp/prune_${lang}_stage_XXXX")
+
+json_str() { local s=${1//\\/\\\\}; s=${s//\"/\\\"}; printf '"%s"' "$s"; }
 
-for ex_dir in "${exercises[@]}"; do
+# ── one exercise: copy → prune → emit ───────────────────────────────────────
+# Runs in the caller's shell for --jobs 1 and in a background subshell
+# otherwise; everything it touches on disk is private to the exercise.
+process_exercise() {
+  local ex_dir=$1 ex_name build_script_rel workroot host_workdir build_log_dir
   if   [[ -x "$ex_dir/build_script"    ]]; then build_script_rel="build_script"
   elif [[ -x "$ex_dir/build_script.sh" ]]; then build_script_rel="build_script.sh"
-  else log "Skipping $(basename "$ex_dir") – build_script not found or not exec"; continue
+  else log "Skipping $(basename "$ex_dir") – build_script not found or not exec"; return 0
   fi
-  [[ -d "$ex_dir/assignment" ]] || { log "Skipping $(basename "$ex_dir") – missing assignment"; continue; }
+  [[ -d "$ex_dir/assignment" ]] || { log "Skipping $(basename "$ex_dir") – missing assignment"; return 0; }
 
   ex_name=$(basename "$ex_dir")
+
+  local cache_key="" key_manifest=""
+  if [[ -n "$RESULT_CACHE" ]]; then
+    key_manifest=$(mktemp "${STAGE_DIR:-/tmp}/prune_${lang}_${ex_name}_key_XXXX")
+    cache_key=$(python3 "$CACHE_HELPER" key "${CACHE_KEY_ARGS[@]}" \
+                  --exercise-dir "$ex_dir" --manifest-out "$key_manifest")
+    if python3 "$CACHE_HELPER" fetch --cache-dir "$RESULT_CACHE" --key "$cache_key" \
+         --lang "$lang" --exercise "$ex_name" --out-dir "$OUTPUT_DIR"; then
+      info "=== $ex_name ($lang): unchanged, reused cached artifacts ${cache_key:0:12} ==="
+      if [[ -n "$STORE" ]]; then
+        python3 "$HELPER_DIR/artifact_store.py" import --db "$STORE" "$OUTPUT_DIR/${lang}_${ex_name}.json" \
+          || echo "[WARN] could not add cached $ex_name to $STORE" >&2
+      fi
+      rm -f "$key_manifest"
+      return 0
+    fi
+  fi
   info "=== Processing $ex_name ($lang) ==="
 
   # per-exercise scratch (host), then copy exercise there
   workroot=$(mktemp -d "/tmp/prune_${lang}_${ex_name}_XXXX")
   host_workdir="$workroot/exercise"
   mkdir -p "$host_workdir"
-  cp -a "$ex_dir"/. "$host_workdir"/
+  cp -a --reflink=auto "$ex_dir"/. "$host_workdir"/
   chmod -R u+w "$host_workdir"
 
+  # attempt logs (build-N-*.log) live next to nothing else, so workers never
+  # overwrite each other's numbered logs. They are kept only with --verbose
+  # or PHOBOS_KEEP_LOG=1; otherwise they go with the exercise's scratch, or
+  # with STAGE_DIR once the batch emit has read attempts.jsonl
+  local log_root=/tmp
+  (( LOG_ENABLED || PHOBOS_KEEP_LOG )) || log_root=${STAGE_DIR:-/tmp}
+  build_log_dir=$(mktemp -d "$log_root/prune_logs_${lang}_${ex_name}_XXXX")
+
   # production-like sandbox paths
-  IN_SB_ROOT="/var/tmp/testing-dir"
-  IN_SB_SCRIPT="$IN_SB_ROOT/$build_script_rel"
-  IN_SB_ASSIGN="$IN_SB_ROOT/assignment"
-  IN_SB_TESTS="$IN_SB_ROOT"
+  local IN_SB_ROOT="/var/tmp/testing-dir"
+  local IN_SB_SCRIPT="$IN_SB_ROOT/$build_script_rel"
+  local IN_SB_ASSIGN="$IN_SB_ROOT/assignment"
+  local IN_SB_TESTS="$IN_SB_ROOT"
 
   pushd "$host_workdir" >/dev/null
-  PRUNE_ARGS=( --script "$IN_SB_SCRIPT" --lang "$lang"
-               --assignment-dir "$IN_SB_ASSIGN" --test-dir "$IN_SB_TESTS" )
+  local PRUNE_ARGS=( --script "$IN_SB_SCRIPT" --lang "$lang"
+                     --assignment-dir "$IN_SB_ASSIGN" --test-dir "$IN_SB_TESTS" )
   (( LOG_ENABLED )) && PRUNE_ARGS=( --verbose "${PRUNE_ARGS[@]}" )
+  (( TRACE )) && PRUNE_ARGS+=( --trace )
+  PRUNE_ARGS+=( --workdir-mode "$WORKDIR_MODE" --spec-jobs "$SPEC_JOBS" )
+  [[ -n "$PRIOR" ]] && PRUNE_ARGS+=( --prior "$PRIOR" )
 
-  # Explicitly export HOST_WORKDIR so the pruner can bind it into /var/tmp/testing-dir
-  export HOST_WORKDIR="$host_workdir"
-  "$PRUNE_SCRIPT" "${PRUNE_ARGS[@]}"
+  # HOST_WORKDIR lets the pruner bind the copy into /var/tmp/testing-dir
+  HOST_WORKDIR="$host_workdir" BUILD_LOG_DIR="$build_log_dir" \
+  PRUNE_EVENTS="$build_log_dir/attempts.jsonl" \
+    "$PRUNE_SCRIPT" "${PRUNE_ARGS[@]}"
   popd >/dev/null
+  log "Attempt logs for $ex_name: $build_log_dir"
 
-  bindings_src="$host_workdir/final_bindings.txt"
+  local bindings_src="$host_workdir/final_bindings.txt"
   [[ -f "$bindings_src" ]] || error "final_bindings.txt missing for $ex_name"
 
-  if [[ -x "$EMIT_HELPER" ]]; then
+  if (( BATCH_EMIT )); then
+    # the workdir only matters as a string to strip from the log
+    mv "$bindings_src" "$STAGE_DIR/${ex_name}.bindings"
+    printf '{"lang": %s, "exercise": %s, "config_file": %s, "workdir": %s, "cache_key": %s, "key_manifest": %s, "events": %s}\n' \
+      "$(json_str "$lang")" "$(json_str "$ex_name")" "$(json_str "$STAGE_DIR/${ex_name}.bindings")" \
+      "$(json_str "$host_workdir")" "$(json_str "$cache_key")" "$(json_str "$key_manifest")" \
+      "$(json_str "$build_log_dir/attempts.jsonl")" \
+      > "$STAGE_DIR/${ex_name}.entry"
+    rm -rf "$workroot"
+    return 0
+  elif [[ -x "$EMIT_HELPER" ]]; then
     log "Emitting artifacts for $ex_name -> $OUTPUT_DIR"
     if python3 "$EMIT_HELPER" \
          --lang "$lang" \
@@ -97,7 +275,15 @@ for ex_dir in "${exercises[@]}"; do
          --config-file "$bindings_src" \
          --workdir "$host_workdir" \
          --runtime-root "/var/tmp/testing-dir" \
+         --cache-key "$cache_key" \
+         --events "$build_log_dir/attempts.jsonl" \
+         "${STORE_ARGS[@]}" \
          --out-dir "$OUTPUT_DIR"; then
+      if [[ -n "$cache_key" ]]; then
+        python3 "$CACHE_HELPER" store --cache-dir "$RESULT_CACHE" --key "$cache_key" \
+          --lang "$lang" --exercise "$ex_name" --out-dir "$OUTPUT_DIR" \
+          --manifest "$key_manifest" || echo "[WARN] could not store $ex_name in result cache" >&2
+      fi
       (( PHOBOS_KEEP_LOG )) && mv "$bindings_src" "$OUTPUT_DIR/final_bindings_${lang}_${ex_name}.txt" || rm -f "$bindings_src"
     else
       echo "[WARN] emit_artifacts.py failed; copying raw log untouched." >&2
@@ -109,6 +295,103 @@ for ex_dir in "${exercises[@]}"; do
   fi
 
   rm -rf "$workroot"
-done
+  (( LOG_ENABLED || PHOBOS_KEEP_LOG )) || rm -rf "$build_log_dir"
+  [[ -z "$key_manifest" ]] || rm -f "$key_manifest"
+}
+
+# ── queue worker: claim → heartbeat → process → finish, until drained ───────
+queue_worker() {
+  local failed_file=$1 owner="${HOSTNAME:-$(uname -n)}:$BASHPID" job ex_name ex_dir hold rc t0
+  local Q=( python3 "$QUEUE_HELPER" --queue "$QUEUE" )
+  while job=$("${Q[@]}" claim --wait --lang "$lang" --owner "$owner"); do
+    ex_name=${job%%$'\t'*}; ex_dir=${job#*$'\t'}
+    "${Q[@]}" hold --lang "$lang" --exercise "$ex_name" --owner "$owner" --pid "$BASHPID" &
+    hold=$!
+    t0=$SECONDS
+    ( set -e; process_exercise "$ex_dir" )
+    rc=$?
+    kill "$hold" 2>/dev/null; wait "$hold" 2>/dev/null
+    "${Q[@]}" finish --lang "$lang" --exercise "$ex_name" --owner "$owner" \
+      --rc "$rc" --seconds "$(( SECONDS - t0 ))"
+    (( rc == 0 )) || echo "$ex_name (rc=$rc)" >>"$failed_file"
+  done
+}
+
+if [[ -n "$QUEUE" ]]; then
+  info "Claiming $lang exercises from $QUEUE with $JOBS worker(s)"
+  status_dir=$(mktemp -d "/tmp/prune_${lang}_status_XXXX")
+  for (( w = 0; w < JOBS; w++ )); do
+    ( trap - ERR; set +e; queue_worker "$status_dir/failed" ) &
+  done
+  wait
+  failed=()
+  [[ -s "$status_dir/failed" ]] && mapfile -t failed <"$status_dir/failed"
+  rm -rf "$status_dir"
+  (( ${#failed[@]} == 0 )) || error "${#failed[@]} exercise(s) failed: ${failed[*]}"
+elif (( JOBS == 1 )); then
+  for ex_dir in "${exercises[@]}"; do
+    process_exercise "$ex_dir"
+  done
+else
+  # bounded worker pool: keep at most JOBS exercises in flight
+  info "Pruning ${#exercises[@]} candidate(s) with $JOBS workers"
+  declare -A worker_ex=()
+  failed=()
+  status_dir=$(mktemp -d "/tmp/prune_${lang}_status_XXXX")
+  # `wait -n -p` needs bash 5.1; workers drop their exit code into
+  # status_dir/<pid> instead so this also runs on 20.04 images
+  reap_one() {
+    wait -n 2>/dev/null || true
+    local pid rc
+    for pid in "${!worker_ex[@]}"; do
+      kill -0 "$pid" 2>/dev/null && continue
+      rc=1; [[ -s "$status_dir/$pid" ]] && rc=$(<"$status_dir/$pid")
+      (( rc == 0 )) || failed+=("$(basename "${worker_ex[$pid]}") (rc=$rc)")
+      unset 'worker_ex[$pid]'
+    done
+  }
+  for ex_dir in "${exercises[@]}"; do
+    while (( ${#worker_ex[@]} >= JOBS )); do reap_one; done
+    ( trap - ERR; set +e
+      ( set -e; process_exercise "$ex_dir" )
+      echo "$?" >"$status_dir/$BASHPID" ) &
+    worker_ex[$!]="$ex_dir"
+  done
+  while (( ${#worker_ex[@]} > 0 )); do reap_one; done
+  rm -rf "$status_dir"
+  (( ${#failed[@]} == 0 )) || error "${#failed[@]} exercise(s) failed: ${failed[*]}"
+fi
+
+if [[ -n "$STAGE_DIR" ]]; then
+  entries=("$STAGE_DIR"/*.entry)
+  if (( ${#entries[@]} )); then
+    cat "${entries[@]}" > "$STAGE_DIR/manifest.jsonl"
+    info "Emitting artifacts for ${#entries[@]} exercise(s) -> $OUTPUT_DIR"
+    python3 "$EMIT_HELPER" --batch "$STAGE_DIR/manifest.jsonl" "${STORE_ARGS[@]}" \
+      --runtime-root "/var/tmp/testing-dir" --out-dir "$OUTPUT_DIR" \
+      || echo "[WARN] emit_artifacts.py --batch reported failures; raw logs kept." >&2
+    if [[ -n "$RESULT_CACHE" ]]; then
+      python3 "$CACHE_HELPER" store --cache-dir "$RESULT_CACHE" --out-dir "$OUTPUT_DIR" \
+        --batch "$STAGE_DIR/manifest.jsonl" || echo "[WARN] could not store results in result cache" >&2
+    fi
+    for e in "${entries[@]}"; do
+      ex_name=$(basename "$e" .entry)
+      # keep the raw log unless this batch emitted the exercise: a .paths
+      # from an earlier run does not count
+      emitted=0
+      if [[ "$(<"$e")" =~ \"cache_key\":\ \"([0-9a-f]+)\" ]]; then
+        python3 "$CACHE_HELPER" fresh --out-dir "$OUTPUT_DIR" --key "${BASH_REMATCH[1]}" \
+          --lang "$lang" --exercise "$ex_name" && emitted=1
+      elif [[ "$OUTPUT_DIR/${lang}_${ex_name}.paths" -nt "$e" ]]; then
+        emitted=1
+      fi
+      if (( PHOBOS_KEEP_LOG || ! emitted )); then
+        mv "$STAGE_DIR/${ex_name}.bindings" "$OUTPUT_DIR/final_bindings_${lang}_${ex_name}.txt"
+      fi
+    done
+  fi
+  rm -rf "$STAGE_DIR"
+fi
 
+[[ -z "${TOOLCHAIN_FILE:-}" ]] || rm -f "$TOOLCHAIN_FILE"
 info "All $lang exercises pruned – artifacts in $OUTPUT_DIR"